@@ -2,27 +2,19 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from openai import OpenAI
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
+from llm_client import LLMUnavailableError, get_client
+from narrative_cache import stream_chat_completion
+from data_cube import DataCube
+from waterfall_index import waterfall_index
+from figure_cache import dataset_key, figure_cache, make_figure_key
+from ingest import format_memory_report, read_upload, should_stream, stream_csv, upload_extension
+from chart_reduction import DOWNSAMPLED_CHART_TYPES, RENDER_POINT_BUDGET, TOP_N_CHART_TYPES, downsample_frame, scatter_figure, top_n_frame, zoomable_x_bounds
 
-# Memuat variabel lingkungan dari file .env
-load_dotenv()
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Setup client Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-# Fungsi untuk menghasilkan narasi dari AI
-def generate_narrative(prompt):
-    response = client.chat.completions.create(
+# Fungsi untuk menghasilkan narasi dari AI secara streaming (token demi token)
+def generate_narrative_stream(prompt, chart_type=None):
+    return stream_chat_completion(
+        get_client(),
+        chart_type=chart_type,
         model="gpt-35-turbo",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
@@ -32,29 +24,36 @@ def generate_narrative(prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
 # Title
 st.title("Konversi Informasi Penting dalam Chart Menjadi Narasi")
 
-# Fungsi untuk memuat data
-def load_data(file_path):
+# Fungsi untuk memuat data langsung dari buffer upload (jalur yang sama dengan deployapp2.load_file)
+def load_data(uploaded_file):
     try:
-        df = pd.read_csv(file_path)
-        st.success("Data berhasil dimuat.")
+        df = read_upload(uploaded_file)
+        st.success(f"Data berhasil dimuat. {format_memory_report(df.attrs['memory_report'])}")
         return df
     except Exception as e:
         st.error(f"Gagal memuat data: {str(e)}")
         return None
 
+# Fungsi untuk mengambil data agregat per kategori (dari cube jika tersedia), dibatasi ke anggaran mark:
+# kategori di luar N teratas digabung menjadi "Other"
+def aggregate_for_chart(dataframe, x_col, y_col, cube=None):
+    if cube is not None and cube.supports([x_col], y_col):
+        return top_n_frame(cube.query([x_col], y_col), x_col, y_col)
+    return top_n_frame(dataframe, x_col, y_col)
+
 # Fungsi untuk membuat grafik berdasarkan pilihan pengguna
-def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
+def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None, cube=None, x_range=None):
     if chart_type == 'Bar Chart':
         uniform_color = ['#1f77b4']  # Semua bar akan berwarna biru
         
         # Contoh warna yang berbeda untuk setiap bar
         different_colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
-        fig = px.bar(dataframe, x=x_col, y=y_col, color_discrete_sequence=uniform_color)#, color_discrete_sequence=color_theme)
+        chart_data = aggregate_for_chart(dataframe, x_col, y_col, cube)
+        fig = px.bar(chart_data, x=x_col, y=y_col, color_discrete_sequence=uniform_color)#, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Bar Chart",
             xaxis_title=x_col,
@@ -64,7 +63,8 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
         )
         return fig
     elif chart_type == 'Line Chart':
-        fig = px.line(dataframe, x=x_col, y=y_col, color_discrete_sequence=color_theme)
+        plot_data = downsample_frame(dataframe, x_col, y_col, x_range=x_range)
+        fig = px.line(plot_data, x=x_col, y=y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Line Chart",
             xaxis_title=x_col,
@@ -74,7 +74,8 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
         )
         return fig
     elif chart_type == 'Pie Chart':
-        fig = px.pie(dataframe, names=x_col, values=y_col, color_discrete_sequence=color_theme)
+        chart_data = aggregate_for_chart(dataframe, x_col, y_col, cube)
+        fig = px.pie(chart_data, names=x_col, values=y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Pie Chart",
             template='plotly_white',
@@ -82,7 +83,7 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
         )
         return fig
     elif chart_type == 'Scatter Plot':
-        fig = px.scatter(dataframe, x=x_col, y=y_col, color_discrete_sequence=color_theme)
+        fig = scatter_figure(dataframe, x_col, y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Scatter Plot",
             xaxis_title=x_col,
@@ -92,7 +93,8 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
         )
         return fig
     elif chart_type == 'Area Chart':
-        fig = px.area(dataframe, x=x_col, y=y_col, color_discrete_sequence=color_theme)
+        plot_data = downsample_frame(dataframe, x_col, y_col, x_range=x_range)
+        fig = px.area(plot_data, x=x_col, y=y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Area Chart",
             xaxis_title=x_col,
@@ -104,7 +106,8 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
     elif chart_type == 'Double Line Chart':
         y_cols = st.multiselect('Pilih kolom sumbu Y kedua', dataframe.columns, key="y_col_2")
         if len(y_cols) > 1:
-            fig = px.line(dataframe, x=x_col, y=y_cols, color_discrete_sequence=color_theme)
+            plot_data = downsample_frame(dataframe, x_col, y_cols, x_range=x_range)
+            fig = px.line(plot_data, x=x_col, y=y_cols, color_discrete_sequence=color_theme)
             fig.update_layout(
                 title="Double Line Chart",
                 xaxis_title=x_col,
@@ -114,9 +117,10 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
             )
             return fig
     elif chart_type == 'Waterfall Chart':
-        return create_waterfall(dataframe, year, 'Monthly' if 'Month Name' in dataframe.columns else 'Yearly')
+        return create_waterfall(dataframe, year, 'Monthly' if 'Month Name' in dataframe.columns else 'Yearly', cube)
     elif chart_type == 'Tree Map':
-        fig = px.treemap(dataframe, path=[x_col], values=y_col, color_discrete_sequence=color_theme)
+        chart_data = aggregate_for_chart(dataframe, x_col, y_col, cube)
+        fig = px.treemap(chart_data, path=[x_col], values=y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Tree Map",
             template='plotly_white',
@@ -124,7 +128,7 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
         )
         return fig
     elif chart_type == 'Bubble Chart':
-        fig = px.scatter(dataframe, x=x_col, y=y_col, size=dataframe[y_col], color_discrete_sequence=color_theme)
+        fig = scatter_figure(dataframe, x_col, y_col, size_col=y_col, color_discrete_sequence=color_theme)
         fig.update_layout(
             title="Bubble Chart",
             xaxis_title=x_col,
@@ -138,19 +142,34 @@ def create_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None):
 # Menentukan tema warna yang akan digunakan
 color_theme = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
 
-# Fungsi untuk membuat grafik waterfall
-def create_waterfall(data, year, profit_type):
+# Fungsi untuk membuat grafik melalui cache figure per spesifikasi grafik (dibagi antar sesi).
+# Double Line Chart dilewati karena create_chart menampilkan widget pilihan kolomnya.
+def cached_chart(dataframe, chart_type, x_col, y_col, color_theme, year=None, cube=None, x_range=None):
+    if chart_type == 'Double Line Chart':
+        return create_chart(dataframe, chart_type, x_col, y_col, color_theme, year, cube, x_range)
+    figure_key = make_figure_key(dataset=dataset_key(dataframe), chart_type=chart_type, x_col=x_col, y_col=y_col,
+                                 year=year, theme=color_theme, x_range=x_range)
+    return figure_cache.get_or_build(
+        figure_key, lambda: create_chart(dataframe, chart_type, x_col, y_col, color_theme, year, cube, x_range), chart_type
+    )
+
+# Fungsi untuk membuat grafik waterfall dari indeks waterfall dataset (total bulanan/tahunan yang sudah
+# dipartisi per tahun), sehingga mengganti tahun tidak memfilter ulang seluruh baris
+def create_waterfall(data, year, profit_type, cube=None):
+    index = waterfall_index(cube, data)
     if profit_type == 'Monthly' and year is not None:
-        filtered_data = data[data['Order Year'] == year]
-        filtered_data['Period'] = filtered_data['Month Name']
+        series = index.monthly(year, 'Profit', data)
+        periods = index.month_labels(series['Order Month'].iloc[:-1], data)
     else:
-        filtered_data = data.groupby('Order Year').agg({'Profit': 'sum'}).reset_index()
-        filtered_data['Period'] = filtered_data['Order Year'].astype(str)
-    
+        series = index.yearly('Profit', data)
+        periods = series['Order Year'].iloc[:-1].astype(str)
+    # Baris Total hanya untuk deskripsi narasi; grafik menampilkan langkah per periode
+    series = series.iloc[:-1]
+
     fig = go.Figure(go.Waterfall(
-        x=filtered_data['Period'],
-        y=filtered_data['Profit'],
-        measure=['relative'] * len(filtered_data),
+        x=periods,
+        y=series['Profit'],
+        measure=series['Measure'],
         increasing=dict(marker_color='green'),
         decreasing=dict(marker_color='red'),
         totals=dict(marker_color='blue'),
@@ -165,47 +184,95 @@ def create_waterfall(data, year, profit_type):
     return fig
 
 # Fungsi untuk membuat deskripsi data yang otomatis hanya berisi informasi data pada chart
-def create_data_description(dataframe, x_col, y_col, chart_type, year=None):
+def create_data_description(dataframe, x_col, y_col, chart_type, year=None, cube=None):
     if chart_type == 'Waterfall Chart':
+        # Deret bulanan tahun terpilih (atau deret tahunan) beserta measure dan total, dari indeks waterfall
+        index = waterfall_index(cube, dataframe)
         if 'Order Month' in dataframe.columns:
-            # Menghitung total profit atau sales bulanan untuk tahun yang dipilih
-            monthly_data = dataframe[dataframe['Order Year'] == year].groupby(['Order Month'])[y_col].sum().reset_index()
-            monthly_data['Measure'] = 'relative'
-            monthly_data.loc[0, 'Measure'] = 'absolute'
-            annual_total = monthly_data[y_col].sum()
-            total_row = pd.DataFrame({'Order Month': ['Total'], y_col: [annual_total], 'Measure': ['total']})
-            monthly_data = pd.concat([monthly_data, total_row])
-
-            # Mengurutkan DataFrame berdasarkan Order Month
-            month_order = list(range(1, 13)) + ['Total']
-            monthly_data['Order Month'] = pd.Categorical(monthly_data['Order Month'], categories=month_order, ordered=True)
-            monthly_data = monthly_data.sort_values('Order Month')
-
-            summary_dict = monthly_data.to_dict(orient='list')
+            summary_dict = index.monthly(year, y_col, dataframe).to_dict(orient='list')
         else:
-            # Menghitung total profit atau sales tahunan
-            annual_data = dataframe.groupby(['Order Year'])[y_col].sum().reset_index()
-            annual_data['Measure'] = 'relative'
-            annual_data.loc[0, 'Measure'] = 'absolute'
-            total_row = pd.DataFrame({'Order Year': ['Total'], y_col: [annual_data[y_col].sum()], 'Measure': ['total']})
-            annual_data = pd.concat([annual_data, total_row])
-
-            summary_dict = annual_data.to_dict(orient='list')
+            summary_dict = index.yearly(y_col, dataframe).to_dict(orient='list')
+    elif chart_type in TOP_N_CHART_TYPES:
+        # Tabel top-N + Other yang sama dengan grafik
+        summary = aggregate_for_chart(dataframe, x_col, y_col, cube)
+        summary_dict = summary.to_dict(orient='list')
+        reduction = summary.attrs.get('category_reduction')
+        if reduction:
+            summary_dict['keterangan'] = (
+                f"{reduction['digabung']:,} dari {reduction['jumlah_kategori']:,} kategori {x_col} "
+                f"digabung menjadi '{reduction['label_lainnya']}'"
+            )
     else:
-        summary = dataframe.groupby(x_col)[y_col].sum().reset_index()
+        if cube is not None and cube.supports([x_col], y_col):
+            summary = cube.query([x_col], y_col)
+        else:
+            # Kolom y non-numerik (misal teks categorical) dihitung jumlah barisnya, seperti pada grafik kategori
+            grouped = dataframe.groupby(x_col, observed=True)[y_col]
+            summary = (grouped.sum() if pd.api.types.is_numeric_dtype(dataframe[y_col]) else grouped.count()).reset_index()
         summary_dict = summary.to_dict(orient='list')
     return summary_dict
 
+# Fungsi untuk menentukan apakah grafik atau deskripsinya membutuhkan data per baris (mode streaming)
+def needs_row_data(columns, chart_type, x_col, y_col, cube, for_description=False):
+    if chart_type == 'Waterfall Chart':
+        if for_description:
+            group_by = ['Order Year', 'Order Month'] if 'Order Month' in columns else ['Order Year']
+            return not cube.supports(group_by, y_col)
+        return 'Month Name' in columns or not cube.supports(['Order Year'], 'Profit')
+    if for_description or chart_type in ['Bar Chart', 'Pie Chart', 'Tree Map']:
+        return not cube.supports([x_col], y_col)
+    return True
+
+# Fungsi untuk memuat seluruh baris dari upload yang dibaca secara streaming, hanya sekali saat dibutuhkan
+def row_level_data(uploaded_file):
+    if st.session_state.get('current_df') is None:
+        with st.spinner("Memuat data per baris..."):
+            st.session_state['current_df'] = load_data(uploaded_file)
+    return st.session_state['current_df']
+
+# Fungsi untuk membaca upload besar per potongan ke cube agregat; error ditampilkan sama seperti load_data
+def load_data_streaming(uploaded_file, dataset_id, file_path):
+    progress = st.progress(0.0, text="Membaca data...")
+    try:
+        cube, preview, row_count = stream_csv(
+            uploaded_file, uploaded_file.size,
+            on_progress=lambda fraction, rows: progress.progress(fraction or 0.0, text=f"Membaca data... {rows:,} baris")
+        )
+    except Exception as e:
+        st.error(f"Gagal memuat data: {str(e)}")
+        return False
+    finally:
+        progress.empty()
+    st.session_state.update(data_cube=cube, data_cube_id=dataset_id, data_preview=preview,
+                            data_row_count=row_count, current_df=None, dataset_name=file_path)
+    return True
+
 # Upload File Data
 uploaded_file = st.file_uploader("Pilih file CSV")
 dataframe = None
-if uploaded_file is not None:
+streamed = False
+if uploaded_file is not None and should_stream(uploaded_file.size, upload_extension(uploaded_file.name)):
+    # File CSV besar dibaca per potongan: cube agregat diperbarui bertahap dan data per baris
+    # baru dimuat saat grafik yang dipilih membutuhkannya
+    streamed = True
     file_path = uploaded_file.name
-    dataframe = load_data(file_path)
+    dataset_id = getattr(uploaded_file, 'file_id', file_path)
+    if st.session_state.get('data_cube_id') == dataset_id or load_data_streaming(uploaded_file, dataset_id, file_path):
+        st.success(f"Data berhasil dimuat secara bertahap ({st.session_state['data_row_count']:,} baris).")
+        dataframe = st.session_state['data_preview']
+        st.dataframe(dataframe)
+elif uploaded_file is not None:
+    file_path = uploaded_file.name
+    dataframe = load_data(uploaded_file)
     if dataframe is not None:
         st.dataframe(dataframe.head())
         st.session_state['current_df'] = dataframe
         st.session_state['dataset_name'] = file_path
+        # Cube agregat dibangun sekali per dataset yang diunggah
+        dataset_id = getattr(uploaded_file, 'file_id', file_path)
+        if st.session_state.get('data_cube_id') != dataset_id:
+            st.session_state['data_cube'] = DataCube(dataframe)
+            st.session_state['data_cube_id'] = dataset_id
 
 if dataframe is not None:
     dataset_name = st.session_state['dataset_name']
@@ -218,21 +285,42 @@ if dataframe is not None:
     y_col = st.selectbox('Pilih kolom sumbu Y', dataframe.columns, key="y_col")
     year = None
     if chart_type == 'Waterfall Chart' and 'Order Year' in dataframe.columns:
-        year = st.selectbox('Pilih Tahun', dataframe['Order Year'].unique(), key="year")
+        # Daftar tahun diambil dari cube (terurut) tanpa memindai kolom per baris di setiap rerun
+        years = st.session_state['data_cube'].members('Order Year')
+        year = st.selectbox('Pilih Tahun', years, key="year")
 
 
 
     # Create and display chart
     if st.button('Buat Grafik', key="create_chart"):
-        chart = create_chart(dataframe, chart_type, x_col, y_col, color_theme, year)
-        if chart:
-            st.session_state['chart'] = chart
-        else:
-            st.warning("Grafik tidak valid. Silakan konfigurasikan opsi grafik Anda dan tekan 'Buat Grafik'.")
+        chart_data = dataframe
+        if streamed and needs_row_data(dataframe.columns, chart_type, x_col, y_col, st.session_state['data_cube']):
+            chart_data = row_level_data(uploaded_file)
+        # Jika data per baris gagal dimuat, error sudah ditampilkan oleh load_data
+        if chart_data is not None:
+            chart = cached_chart(chart_data, chart_type, x_col, y_col, color_theme, year, st.session_state.get('data_cube'))
+            if chart:
+                st.session_state['chart'] = chart
+                st.session_state['chart_spec'] = (chart_type, x_col, y_col, year)
+            else:
+                st.warning("Grafik tidak valid. Silakan konfigurasikan opsi grafik Anda dan tekan 'Buat Grafik'.")
 
 if 'chart' in st.session_state:
     st.header("Generated Chart")
-    st.plotly_chart(st.session_state['chart'])
+    chart = st.session_state['chart']
+    # Zoom pada grafik yang di-downsample: rentang yang dipilih diambil ulang dari data asli
+    chart_spec = st.session_state.get('chart_spec')
+    current_df = st.session_state.get('current_df')
+    # Double Line Chart tidak di-zoom ulang karena pilihan kolomnya berada di dalam create_chart
+    if chart_spec and chart_spec[0] in DOWNSAMPLED_CHART_TYPES and chart_spec[0] != 'Double Line Chart' and current_df is not None \
+            and chart_spec[1] in current_df.columns and len(current_df) > RENDER_POINT_BUDGET:
+        x_bounds = zoomable_x_bounds(current_df, chart_spec[1])
+        if x_bounds is not None and x_bounds[0] < x_bounds[1]:
+            x_range = st.slider("Rentang sumbu X (zoom)", min_value=x_bounds[0], max_value=x_bounds[1], value=x_bounds, key=f"x_zoom_{chart_spec[1]}_{len(current_df)}")
+            if tuple(x_range) != tuple(x_bounds):
+                chart = cached_chart(current_df, chart_spec[0], chart_spec[1], chart_spec[2], color_theme, chart_spec[3],
+                                     st.session_state.get('data_cube'), x_range) or chart
+    st.plotly_chart(chart)
 
 # User Query Input
 st.header("Generate Insight")
@@ -243,10 +331,19 @@ if st.button("Hasilkan Narasi", key="generate_narrative"):
         chart_type = st.session_state.get('chart_type', 'Unknown Chart Type')
         x_col = st.session_state['x_col']
         y_col = st.session_state['y_col']
+        description_df = st.session_state['current_df']
+        if description_df is None:
+            # Mode streaming: deskripsi dijawab dari cube, data per baris dimuat hanya jika cube tidak cukup
+            description_df = st.session_state['data_preview']
+            if needs_row_data(description_df.columns, chart_type, x_col, y_col, st.session_state['data_cube'], for_description=True):
+                description_df = row_level_data(uploaded_file)
+                if description_df is None:
+                    # Error sudah ditampilkan oleh load_data
+                    st.stop()
         year = None
-        if chart_type == 'Waterfall Chart' and 'Order Month' in st.session_state['current_df'].columns:
+        if chart_type == 'Waterfall Chart' and 'Order Month' in description_df.columns:
             year = st.session_state['year']
-        description_of_data = create_data_description(st.session_state['current_df'], x_col, y_col, chart_type, year)
+        description_of_data = create_data_description(description_df, x_col, y_col, chart_type, year, st.session_state.get('data_cube'))
         
         # System prompt
         system_prompt = (
@@ -261,9 +358,14 @@ if st.button("Hasilkan Narasi", key="generate_narrative"):
         user_prompt = user_query
         
         if user_prompt:
-            narrative = generate_narrative(f"{system_prompt} {user_prompt}")
             st.write("## Narasi yang Dihasilkan AI")
-            st.write(narrative)
+            try:
+                st.write_stream(generate_narrative_stream(f"{system_prompt} {user_prompt}", chart_type))
+            except LLMUnavailableError as e:
+                st.error(str(e))
+            except Exception as e:
+                # Error di tengah stream (misal koneksi terputus); narasi yang sudah tampil dibiarkan
+                st.error(f"Gagal menghasilkan narasi: {str(e)}")
         else:
             st.error("Masukkan pertanyaan untuk menghasilkan narasi.")
     else:
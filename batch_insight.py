@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from llm_client import get_async_client
+from llm_scheduler import BATCH, request_scheduler
+from narrative_cache import cached_chat_completion_async
+
+# Load environment variables
+load_dotenv()
+
+# Jumlah maksimum request yang berjalan bersamaan
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+
+# Pemetaan jenis chart ke modul generate_insight_*, fungsi penyusun prompt, kolom yang dibutuhkan,
+# bentuk data yang diterima fungsi ('dict' atau 'frame'), dan judul pada file output
+CHART_MODULES = {
+    'bar': ('generate_insight_barchart', 'buat_prompt_dari_grafik', ['label_x', 'label_y'], 'dict', 'Insight Grafik Batang'),
+    'line': ('generate_insight_linechart', 'buat_prompt_dari_grafik', ['label_x', 'label_y'], 'dict', 'Insight Grafik Garis'),
+    'pie': ('generate_insight_piechart', 'buat_prompt_dari_grafik', ['label_x', 'label_y'], 'dict', 'Insight Grafik Pie'),
+    'scatter': ('generate_insight_scatter', 'buat_prompt_dari_grafik', ['label_x', 'label_y'], 'dict', 'Insight Grafik Scatter'),
+    'waterfall': ('generate_insight_waterfallchart', 'buat_prompt_dari_grafik', ['label_x', 'label_y'], 'dict', 'Insight Grafik Waterfall'),
+    'funnel': ('generate_insight_funnelchart', 'buat_prompt_dari_grafik', ['stages_col', 'values_col'], 'frame', 'Insight Funnel Chart'),
+    'sankey': ('generate_insight_sankeydiagram', 'buat_prompt_dari_grafik', ['sumbu_x', 'sumbu_y', 'nilai'], 'frame', 'Insight Grafik Sankey'),
+    'gauge': ('generate_insight_gaugechart', 'menghasilkan_prompt_dari_chart', ['kolom_total', 'kolom_target'], 'frame', 'Insight Gauge Chart'),
+    'stacked_bar': ('generate_insight_stackedbarchart', 'menghasilkan_prompt_dari_chart', ['kolom_1', 'kolom_2'], 'frame', 'Insight Stacked Bar Chart'),
+    'double_line': ('generate_insight_doublelinechart', 'menghasilkan_prompt_dari_chart', ['kolom_1', 'kolom_2'], 'frame', 'Insight Line Chart'),
+}
+
+
+# Fungsi untuk membaca manifest job (JSON list atau JSON Lines)
+def load_manifest(manifest_path):
+    with open(manifest_path, encoding='utf-8') as file:
+        content = file.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+# Fungsi untuk menyusun prompt sebuah job memakai modul generate_insight_* yang sesuai
+def build_job_prompts(job):
+    chart_type = job['chart_type']
+    if chart_type not in CHART_MODULES:
+        raise ValueError(f"Jenis chart tidak dikenal: {chart_type}")
+    module_name, function_name, column_keys, data_shape, _ = CHART_MODULES[chart_type]
+    prompt_builder = getattr(importlib.import_module(module_name), function_name)
+    columns = [job['columns'][key] for key in column_keys]
+    df = pd.read_csv(job['data_file'])
+    if data_shape == 'dict':
+        data = {column: df[column].tolist() for column in columns}
+    else:
+        data = df
+    return prompt_builder(data, *columns, job['title'])
+
+
+# Fungsi untuk menentukan lokasi file output sebuah job
+def output_path_for(job, output_dir=None):
+    if job.get('output_file'):
+        return job['output_file']
+    stem = os.path.splitext(os.path.basename(job['data_file']))[0]
+    directory = output_dir or os.path.dirname(job['data_file'])
+    return os.path.join(directory, f"insight_output_{job['chart_type']}_{stem}.txt")
+
+
+# Fungsi untuk menjalankan satu job: menyusun prompt, memanggil AI, lalu menulis output
+async def run_job(client, semaphore, job, output_dir=None):
+    async with semaphore:
+        # Latensi diukur setelah mendapat slot agar waktu antre tidak ikut terhitung
+        started = time.perf_counter()
+        try:
+            system_prompt, user_prompt = await asyncio.to_thread(build_job_prompts, job)
+            # Job batch mengalah pada request interaktif saat kuota RPM/TPM menipis
+            narrative = await cached_chat_completion_async(
+                client,
+                priority=BATCH,
+                chart_type=job['chart_type'],
+                model="gpt-35-turbo",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=800,
+                top_p=0.95,
+                frequency_penalty=0,
+                presence_penalty=0,
+                stop=None
+            )
+        except Exception as e:
+            return {'job': job, 'ok': False, 'error': str(e), 'latency': time.perf_counter() - started}
+        latency = time.perf_counter() - started
+    output_file = output_path_for(job, output_dir)
+    # Kegagalan menulis output (path tidak valid, disk penuh) hanya menggagalkan job ini, bukan seluruh batch
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        with open(output_file, "w", encoding="utf-8") as file:
+            file.write(f"{CHART_MODULES[job['chart_type']][4]}:\n")
+            file.write(narrative or "")
+    except OSError as e:
+        return {'job': job, 'ok': False, 'error': str(e), 'latency': latency}
+    return {'job': job, 'ok': True, 'output_file': output_file, 'latency': latency}
+
+
+# Fungsi untuk menjalankan seluruh job secara konkuren dan menulis output segera setelah selesai
+async def run_batch(jobs, concurrency=BATCH_CONCURRENCY, output_dir=None, client=None):
+    client = client or get_async_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    results = []
+    for finished in asyncio.as_completed([run_job(client, semaphore, job, output_dir) for job in jobs]):
+        result = await finished
+        results.append(result)
+        status = result['output_file'] if result['ok'] else f"GAGAL: {result['error']}"
+        print(f"[{len(results)}/{len(jobs)}] {result['job']['chart_type']} {result['job']['data_file']} -> {status}")
+    wall_time = time.perf_counter() - started
+    return results, summarize_batch(results, wall_time, concurrency)
+
+
+# Fungsi untuk meringkas throughput batch dibandingkan baseline sekuensial
+def summarize_batch(results, wall_time, concurrency):
+    # Baseline sekuensial adalah batas atas: jumlah latensi tiap job yang diukur di bawah konkurensi,
+    # termasuk waktu tunggu kuota RPM/TPM yang tidak akan terjadi bila job dijalankan satu per satu
+    sequential_upper_bound = sum(result['latency'] for result in results)
+    return {
+        'jobs': len(results),
+        'succeeded': sum(1 for result in results if result['ok']),
+        'failed': sum(1 for result in results if not result['ok']),
+        'concurrency': concurrency,
+        'wall_time_s': wall_time,
+        'sequential_upper_bound_s': sequential_upper_bound,
+        'throughput_jobs_per_s': len(results) / wall_time if wall_time else 0.0,
+        'sequential_throughput_lower_bound_jobs_per_s': len(results) / sequential_upper_bound if sequential_upper_bound else 0.0,
+        'speedup_upper_bound': sequential_upper_bound / wall_time if wall_time else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Menjalankan generate_insight_* untuk banyak dataset secara konkuren.")
+    parser.add_argument('manifest', help="File manifest JSON/JSONL berisi chart_type, data_file, columns, title")
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY, help="Jumlah request AI yang berjalan bersamaan")
+    parser.add_argument('--output-dir', default=None, help="Direktori output (default: direktori file data)")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    _, summary = asyncio.run(run_batch(jobs, concurrency=args.concurrency, output_dir=args.output_dir))
+    print(
+        f"Selesai {summary['succeeded']}/{summary['jobs']} job dalam {summary['wall_time_s']:.2f} s "
+        f"({summary['throughput_jobs_per_s']:.2f} job/s, konkurensi {summary['concurrency']}). "
+        f"Baseline sekuensial paling lama {summary['sequential_upper_bound_s']:.2f} s "
+        f"(jumlah latensi per job, {summary['sequential_throughput_lower_bound_jobs_per_s']:.2f} job/s), "
+        f"speedup paling tinggi {summary['speedup_upper_bound']:.1f}x."
+    )
+    quota = request_scheduler.stats()
+    waits = quota['per_priority'][BATCH]
+    print(
+        f"Antrean kuota: tunggu rata-rata {waits['wait_ms_avg']:.0f} ms, p95 {waits['wait_ms_p95']:.0f} ms, "
+        f"maks {waits['wait_ms_max']:.0f} ms; antrean ditahan {quota['throttled']} kali karena 429."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Jalur parsing yang dibandingkan: label -> (ekstensi file, gunakan parser lama)
+VARIANTS = {
+    'pandas CSV (lama)': ('csv', True),
+    'Arrow CSV': ('csv', False),
+    'Parquet': ('parquet', False),
+    'Feather': ('feather', False),
+}
+
+
+# Fungsi untuk membuat salinan modified_data.csv yang diperbesar dalam berbagai format.
+# Dijalankan di proses terpisah: ru_maxrss proses anak mewarisi puncak memori induknya.
+def prepare_files(directory, scale):
+    df = pd.read_csv(os.path.join(ROOT, 'modified_data.csv'))
+    big = pd.concat([df] * scale, ignore_index=True)
+    paths = {'csv': os.path.join(directory, 'data.csv')}
+    big.to_csv(paths['csv'], index=False)
+    parsed = pd.read_csv(paths['csv'])
+    paths['parquet'] = os.path.join(directory, 'data.parquet')
+    parsed.to_parquet(paths['parquet'])
+    paths['feather'] = os.path.join(directory, 'data.feather')
+    parsed.to_feather(paths['feather'])
+    print(len(big))
+
+
+# Dijalankan di proses terpisah agar puncak memori (RSS) setiap jalur tidak saling memengaruhi
+def run_variant(label, path):
+    from ingest import optimize_dtypes, parse_upload
+    file_extension, legacy = VARIANTS[label]
+    with open(path, 'rb') as handle:
+        buffer = io.BytesIO(handle.read())
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if legacy:
+        df, _ = optimize_dtypes(pd.read_csv(buffer))
+    else:
+        df = parse_upload(buffer, file_extension)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KB di Linux
+    print(f"{elapsed * 1000:.1f} {(peak - baseline) / 1024:.1f} {len(df)}")
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    with tempfile.TemporaryDirectory() as directory:
+        n_rows = int(subprocess.run(
+            [sys.executable, __file__, '--prepare', directory, str(scale)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()[-1])
+        paths = {extension: os.path.join(directory, f'data.{extension}') for extension in ['csv', 'parquet', 'feather']}
+        csv_mb = os.path.getsize(paths['csv']) / (1024 * 1024)
+        print(f"modified_data.csv x{scale}: {n_rows:,} baris, CSV {csv_mb:.0f} MB")
+        print(f"{'jalur':<20} {'ukuran (MB)':>12} {'waktu (ms)':>11} {'puncak RSS (MB)':>16}")
+        for label, (file_extension, _) in VARIANTS.items():
+            output = subprocess.run(
+                [sys.executable, __file__, '--run', label, paths[file_extension]],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            elapsed_ms, peak_mb, rows = float(output[0]), float(output[1]), int(output[2])
+            assert rows == n_rows, (label, rows)
+            size_mb = os.path.getsize(paths[file_extension]) / (1024 * 1024)
+            print(f"{label:<20} {size_mb:>12.1f} {elapsed_ms:>11.1f} {peak_mb:>16.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run_variant(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == '--prepare':
+        prepare_files(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
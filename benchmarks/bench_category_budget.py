@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scaling import parse_size
+from chart_reduction import CATEGORY_MARK_BUDGET, top_n_frame
+from synthetic_data import make_categories
+
+# Grafik dari baris mentah (cara lama) hanya diukur sampai jumlah baris ini
+RAW_FIGURE_MAX_ROWS = 200_000
+
+FIGURES = {
+    'Bar Chart': lambda data, x_col, y_col: px.bar(data, x=x_col, y=y_col),
+    'Pie Chart': lambda data, x_col, y_col: px.pie(data, names=x_col, values=y_col),
+    'Tree Map': lambda data, x_col, y_col: px.treemap(data, path=[x_col], values=y_col),
+}
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-N + Other untuk Bar/Pie/Tree Map dengan kardinalitas tinggi.")
+    parser.add_argument('--rows', default='1m', help="Jumlah baris data, misal 1m")
+    parser.add_argument('--cardinalities', default='10,1k,100k,1m', help="Jumlah kategori X, misal 10,1k,100k,1m")
+    parser.add_argument('--budget', type=int, default=CATEGORY_MARK_BUDGET, help="Anggaran mark per grafik")
+    args = parser.parse_args()
+
+    n_rows = parse_size(args.rows)
+    print(f"{'kategori':>9} {'grafik':<10} {'mark':>6} {'top-N (ms)':>11} {'figure (ms)':>12} {'JSON (KB)':>10} {'mentah (ms)':>12} {'mentah (KB)':>12}")
+    for cardinality in [parse_size(size) for size in args.cardinalities.split(',')]:
+        df = make_categories(n_rows, cardinality)
+        for chart_type, build in FIGURES.items():
+            reduced, reduce_time = timed(lambda: top_n_frame(df, 'Product Name', 'Sales', budget=args.budget))
+            fig, figure_time = timed(lambda: build(reduced, 'Product Name', 'Sales'))
+            size_kb = len(fig.to_json()) / 1024
+            raw = f"{'dilewati':>12} {'':>12}"
+            if n_rows <= RAW_FIGURE_MAX_ROWS:
+                raw_fig, raw_time = timed(lambda: build(df, 'Product Name', 'Sales'))
+                raw = f"{raw_time * 1000:>12,.1f} {len(raw_fig.to_json()) / 1024:>12,.1f}"
+            print(f"{cardinality:>9,} {chart_type:<10} {len(reduced):>6} {reduce_time * 1000:>11,.1f} {figure_time * 1000:>12,.1f} {size_kb:>10,.1f} {raw}")
+    print(f"Anggaran: {args.budget} mark per grafik (uji top-N + Other: tests/test_chart_reduction.py).")
+
+
+if __name__ == "__main__":
+    main()
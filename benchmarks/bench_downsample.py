@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_reduction import RENDER_POINT_BUDGET, downsample_frame
+from synthetic_data import make_series
+
+
+def main():
+    print(f"{'baris':>9} {'metode':>7} {'titik':>7} {'waktu (ms)':>11}")
+    for n_rows in [10_000, 100_000, 1_000_000]:
+        df = make_series(n_rows)
+        for method in ['minmax', 'lttb']:
+            started = time.perf_counter()
+            reduced = downsample_frame(df, 'Order Date', ['Sales', 'Profit'], method=method)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{n_rows:>9} {method:>7} {len(reduced):>7} {elapsed:>11.1f}")
+
+        # Zoom ke rentang sempit mengembalikan resolusi penuh
+        sorted_dates = df['Order Date'].sort_values()
+        x_range = (sorted_dates.iloc[n_rows // 2], sorted_dates.iloc[n_rows // 2 + 1000])
+        started = time.perf_counter()
+        zoomed = downsample_frame(df, 'Order Date', ['Sales'], x_range=x_range)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{n_rows:>9} {'zoom':>7} {len(zoomed):>7} {elapsed:>11.1f}")
+    print(f"Anggaran render: {RENDER_POINT_BUDGET} titik (uji ekstrem visual: tests/test_chart_reduction.py).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ingest
+from ingest import EXCEL_ENGINE, excel_sheet_names, read_upload
+from upload_cache import ParsedFrameCache
+
+
+# Tiruan UploadedFile Streamlit
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+# Fungsi untuk membuat workbook dengan beberapa sheet berisi modified_data.csv yang diperbesar
+def make_workbook(scale, n_sheets):
+    df = pd.read_csv(os.path.join(ROOT, 'modified_data.csv'))
+    big = pd.concat([df] * scale, ignore_index=True)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for index in range(n_sheets):
+            big.to_excel(writer, sheet_name=f'Sheet{index + 1}', index=False)
+    return buffer.getvalue(), len(big)
+
+
+# Fungsi untuk mengukur waktu sebuah fungsi dalam milidetik
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    n_sheets = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    data, n_rows = make_workbook(scale, n_sheets)
+    print(f"workbook: {n_sheets} sheet x {n_rows:,} baris, {len(data) / (1024 * 1024):.1f} MB; mesin: {EXCEL_ENGINE or 'openpyxl'}")
+
+    upload = FakeUpload(data, 'data.xlsx')
+    _, openpyxl_ms = timed(lambda: pd.read_excel(io.BytesIO(data), sheet_name='Sheet2', engine='openpyxl'))
+    print(f"{'read_excel openpyxl (lama)':<34} {openpyxl_ms:>10.1f} ms")
+    if EXCEL_ENGINE:
+        _, engine_ms = timed(lambda: pd.read_excel(io.BytesIO(data), sheet_name='Sheet2', engine=EXCEL_ENGINE))
+        print(f"{'read_excel ' + EXCEL_ENGINE:<34} {engine_ms:>10.1f} ms")
+
+    names, names_ms = timed(lambda: excel_sheet_names(upload))
+    assert names == [f'Sheet{index + 1}' for index in range(n_sheets)], names
+    print(f"{'daftar sheet':<34} {names_ms:>10.1f} ms")
+    # Rerun: daftar sheet diambil dari cache berdasarkan hash isi, workbook tidak dibuka lagi
+    rerun_names, rerun_names_ms = timed(lambda: excel_sheet_names(FakeUpload(data, 'data.xlsx')))
+    assert rerun_names == names
+    print(f"{'daftar sheet rerun (cache)':<34} {rerun_names_ms:>10.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        ingest.excel_sheet_cache = ParsedFrameCache(spill_dir=directory)
+        cold, cold_ms = timed(lambda: read_upload(upload, sheet_name='Sheet2'))
+        _, warm_ms = timed(lambda: read_upload(upload, sheet_name='Sheet2'))
+        # Proses server baru (atau cache memori penuh): sheet dibaca dari salinan Parquet
+        ingest.excel_sheet_cache = ParsedFrameCache(spill_dir=directory)
+        from_disk, disk_ms = timed(lambda: read_upload(upload, sheet_name='Sheet2'))
+        assert ingest.excel_sheet_cache.stats()['disk_hits'] == 1
+        # Kategori berbasis string Arrow kembali sebagai kategori str dari Parquet; nilainya tetap sama
+        pd.testing.assert_frame_equal(cold, from_disk, check_dtype=False, check_categorical=False)
+        assert len(cold) == n_rows
+        print(f"{'read_upload pertama (parse+konversi)':<34} {cold_ms:>10.1f} ms")
+        print(f"{'read_upload rerun (memori)':<34} {warm_ms:>10.1f} ms")
+        print(f"{'read_upload proses baru (Parquet)':<34} {disk_ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_reduction import downsample_frame, scatter_figure
+from figure_cache import FigureCache, dataset_key, make_figure_key
+
+
+# Pembuat figure per jenis grafik, mengikuti create_charts di deployapp2.py
+def build_figure(chart_type, df, x_col, y_col):
+    if chart_type == 'Line Chart':
+        return px.line(downsample_frame(df, x_col, y_col), x=x_col, y=y_col, title='Line Chart')
+    if chart_type == 'Bar Chart':
+        return px.bar(df, x=x_col, y=y_col, title='Bar Chart')
+    if chart_type == 'Pie Chart':
+        return px.pie(df, names=x_col, values=y_col, title='Pie Chart')
+    if chart_type == 'Scatter Plot':
+        return scatter_figure(df, x_col, y_col, title='Scatter Plot')
+    if chart_type == 'Area Chart':
+        return px.area(downsample_frame(df, x_col, y_col), x=x_col, y=y_col, title='Area Chart')
+    if chart_type == 'Tree Map':
+        return px.treemap(df, path=[x_col], values=y_col, title='Tree Map')
+    if chart_type == 'Waterfall Chart':
+        return go.Figure(go.Waterfall(x=df[x_col], y=df[y_col], measure=['relative'] * len(df)))
+    if chart_type == 'Bubble Chart':
+        return scatter_figure(df, x_col, y_col, size_col=y_col, color=y_col, title='Bubble Chart')
+    return None
+
+
+# Spesifikasi yang diuji: (jenis grafik, sumbu X, sumbu Y)
+SPECS = [
+    ('Bar Chart', 'Region', 'Sales'),
+    ('Pie Chart', 'Category', 'Sales'),
+    ('Tree Map', 'Sub-Category', 'Sales'),
+    ('Line Chart', 'Order Date', 'Sales'),
+    ('Area Chart', 'Order Date', 'Profit'),
+    ('Scatter Plot', 'Sales', 'Profit'),
+    ('Bubble Chart', 'Discount', 'Sales'),
+    ('Waterfall Chart', 'Order Month', 'Profit'),
+]
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modified_data.csv'))
+    df = pd.concat([df] * scale, ignore_index=True)
+    df['Order Date'] = pd.to_datetime(df['Order Date'])
+    waterfall = df.groupby('Order Month', as_index=False)['Profit'].sum()
+    cache = FigureCache()
+    print(f"{len(df):,} baris")
+    print(f"{'grafik':<16} {'build (ms)':>11} {'cache (ms)':>11} {'JSON (KB)':>10} {'percepatan':>11}")
+    for chart_type, x_col, y_col in SPECS:
+        data = waterfall if chart_type == 'Waterfall Chart' else df
+        # Kunci dihitung seperti di aplikasi; dataset_key(df) meng-hash data yang tidak punya attrs
+        data.attrs['dataset_key'] = f'bench-{scale}'
+        key = make_figure_key(dataset=dataset_key(data), chart_type=chart_type, x_col=x_col, y_col=y_col)
+        started = time.perf_counter()
+        built = cache.get_or_build(key, lambda: build_figure(chart_type, data, x_col, y_col), chart_type)
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        loaded = cache.get_or_build(key, lambda: build_figure(chart_type, data, x_col, y_col), chart_type)
+        load_ms = (time.perf_counter() - started) * 1000
+        assert json.loads(loaded.to_json()) == json.loads(built.to_json()), chart_type
+        size_kb = len(built.to_json()) / 1024
+        print(f"{chart_type:<16} {build_ms:>11.1f} {load_ms:>11.1f} {size_kb:>10.0f} {build_ms / load_ms:>10.1f}x")
+    stats = cache.stats()
+    print(f"hit {stats['hits']}, miss {stats['misses']}, {stats['bytes'] / (1024 * 1024):.1f} MB di cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Retry dibuat cukup panjang agar varian tanpa penjadwal tetap selesai (kegagalan tetap dihitung)
+os.environ.setdefault('LLM_MAX_RETRIES', '8')
+os.environ.setdefault('LLM_BACKOFF_BASE', '0.05')
+os.environ.setdefault('LLM_BACKOFF_MAX', '1')
+os.environ['NARRATIVE_CACHE_DB'] = ''
+
+import llm_client
+from llm_client import LLMUnavailableError, chat_completion
+from llm_scheduler import BATCH, INTERACTIVE, RequestScheduler
+from llm_stub_server import QuotaStub, StubLLM, serve
+
+# "Menit" kuota diperkecil agar benchmark selesai dalam hitungan detik
+PERIOD = 2.0
+RPM = 20
+TPM = 6000
+LATENCY = 0.05
+MAX_TOKENS = 200
+
+
+# Satu "pengguna": beberapa request berurutan dengan prioritas tertentu
+def run_user(priority, owner, count, prompt, latencies, failures):
+    for index in range(count):
+        started = time.perf_counter()
+        try:
+            chat_completion(
+                priority=priority, owner=owner, model='gpt-35-turbo', max_tokens=MAX_TOKENS,
+                messages=[{'role': 'user', 'content': f"{prompt} #{owner}-{index}"}]
+            )
+            latencies.append(time.perf_counter() - started)
+        except LLMUnavailableError:
+            failures.append(owner)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else float('nan')
+
+
+def run_variant(name, scheduler, sessions, batch_jobs, requests_per_user):
+    quota = QuotaStub(RPM, TPM, PERIOD)
+    server = serve(StubLLM(latency=LATENCY, token_delay=0, quota=quota, responses={'default': 'ok'}))
+    os.environ['AZURE_ENDPOINT'] = f"http://127.0.0.1:{server.server_port}"
+    llm_client.azure_endpoint = os.environ['AZURE_ENDPOINT']
+    llm_client.api_key = 'stub'
+    llm_client.api_version = '2024-02-01'
+    llm_client._client = None
+    llm_client.request_scheduler = scheduler
+    prompt = 'x' * 400
+    results = {INTERACTIVE: ([], []), BATCH: ([], [])}
+    threads = [
+        threading.Thread(target=run_user, args=(BATCH, f"job{index}", requests_per_user, prompt, *results[BATCH]))
+        for index in range(batch_jobs)
+    ]
+    for thread in threads:
+        thread.start()
+    # Sesi interaktif datang setelah job batch sudah memenuhi antrean
+    time.sleep(0.2)
+    interactive = [
+        threading.Thread(target=run_user, args=(INTERACTIVE, f"sesi{index}", requests_per_user, prompt, *results[INTERACTIVE]))
+        for index in range(sessions)
+    ]
+    started = time.perf_counter()
+    for thread in interactive:
+        thread.start()
+    for thread in interactive + threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    server.shutdown()
+    inter_latency, inter_failed = results[INTERACTIVE]
+    batch_latency, batch_failed = results[BATCH]
+    print(
+        f"{name:<16} {quota.accepted:>6} {quota.rejected:>6} {len(inter_failed) + len(batch_failed):>6} "
+        f"{percentile(inter_latency, 0.5) * 1000:>9.0f} {percentile(inter_latency, 0.95) * 1000:>9.0f} "
+        f"{percentile(batch_latency, 0.95) * 1000:>9.0f} {wall:>7.1f}"
+    )
+    return scheduler.stats()
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    batch_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    requests_per_user = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f"Kuota stub: {RPM} request dan {TPM} token per {PERIOD:.0f} s; "
+          f"{sessions} sesi interaktif + {batch_jobs} job batch, masing-masing {requests_per_user} request")
+    print(f"{'varian':<16} {'sukses':>6} {'429':>6} {'gagal':>6} {'int p50':>9} {'int p95':>9} {'bat p95':>9} {'total s':>7}")
+    run_variant('tanpa penjadwal', RequestScheduler(rpm=0, tpm=0, period=PERIOD), sessions, batch_jobs, requests_per_user)
+    stats = run_variant('penjadwal', RequestScheduler(rpm=RPM, tpm=TPM, period=PERIOD), sessions, batch_jobs, requests_per_user)
+    for priority, waits in stats['per_priority'].items():
+        print(f"  antre {priority:<12} rata-rata {waits['wait_ms_avg']:.0f} ms, p95 {waits['wait_ms_p95']:.0f} ms, "
+              f"maks {waits['wait_ms_max']:.0f} ms ({waits['granted']} request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Skenario grafik yang digilir antar pengguna: (jenis grafik, kolom X, kolom Y)
+SCENARIOS = [
+    ('Bar Chart', 'Category', 'Sales'),
+    ('Line Chart', 'Order Date', 'Sales'),
+    ('Pie Chart', 'Region', 'Profit'),
+    ('Tree Map', 'Sub-Category', 'Sales'),
+]
+PROMPT = "Jelaskan pola utama pada grafik ini dan berikan rekomendasi singkat"
+STEPS = ['buka', 'upload', 'grafik', 'insight']
+
+# Label widget per aplikasi yang dipakai dalam perjalanan pengguna
+APPS = {
+    'deployapp2': {
+        'uploader': "Pilih File", 'chart_type': "Pilih Tipe Chart:", 'x_col': "Masukkan Kolom (Sumbu X)",
+        'y_col': "Masukkan Baris (Sumbu Y)", 'chart_button': "Hasilkan Chart",
+        'prompt': "Masukkan prompt untuk AI:", 'insight_button': "Hasilkan Insight",
+    },
+    'app4': {
+        'uploader': "Pilih file CSV", 'chart_type': "Pilih jenis grafik", 'x_col': "Pilih kolom sumbu X",
+        'y_col': "Pilih kolom sumbu Y", 'chart_button': "Buat Grafik",
+        'prompt': "Masukkan pertanyaan Anda di sini...", 'insight_button': "Hasilkan Narasi",
+    },
+}
+
+
+# Klien satu sesi browser terhadap server Streamlit yang berjalan: rerun dikirim lewat websocket
+# /_stcore/stream seperti frontend, file diunggah lewat endpoint upload, dan nilai widget disimpan
+# antar rerun (kecuali klik tombol, yang hanya berlaku untuk satu rerun)
+class AppSession:
+    def __init__(self, base_url, timeout=120.0):
+        from websockets.sync.client import connect
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connection = connect(base_url.replace('http', 'ws', 1) + '/_stcore/stream', max_size=None, open_timeout=timeout)
+        self.websocket = None
+        self.session_id = None
+        self.widgets = {}
+        self.states = {}
+        self.errors = []
+
+    def __enter__(self):
+        self.websocket = self.connection.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.connection.__exit__(*exc)
+
+    # Fungsi untuk menjalankan ulang skrip dengan nilai widget saat ini; menunggu sampai skrip selesai
+    def rerun(self, triggers=()):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.widget_states.widgets.extend(
+            state for widget_id, state in self.states.items() if widget_id in self.widgets.values()
+        )
+        message.rerun_script.widget_states.widgets.extend(triggers)
+        self.websocket.send(message.SerializeToString())
+        self.widgets = {}
+        self.errors = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.websocket.recv(timeout=self.timeout))
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session':
+                self.session_id = forward.new_session.initialize.session_id
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                self.read_element(forward.delta.new_element)
+            elif kind == 'script_finished':
+                return self
+
+    def read_element(self, element):
+        kind = element.WhichOneof('type')
+        if kind in ('selectbox', 'text_area', 'button', 'file_uploader'):
+            widget = getattr(element, kind)
+            self.widgets[(kind, widget.label)] = widget.id
+        elif kind == 'exception':
+            self.errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == 'alert' and element.alert.format == 1:
+            self.errors.append(element.alert.body)
+
+    def widget_id(self, kind, label):
+        try:
+            return self.widgets[(kind, label)]
+        except KeyError:
+            raise LookupError(f"Widget {kind} '{label}' tidak ditemukan di halaman") from None
+
+    def set_string(self, kind, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        widget_id = self.widget_id(kind, label)
+        self.states[widget_id] = WidgetState(id=widget_id, string_value=value)
+
+    def click(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return self.rerun([WidgetState(id=self.widget_id('button', label), trigger_value=True)])
+
+    # Fungsi untuk mengunggah file ke sesi ini lalu menjalankan ulang skrip dengan file terpilih
+    def upload(self, label, name, content, mime):
+        import requests
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        widget_id = self.widget_id('file_uploader', label)
+        file_id = str(uuid.uuid4())
+        response = requests.put(f"{self.base_url}/_stcore/upload_file/{self.session_id}/{file_id}",
+                                files={'file': (name, content, mime)}, timeout=self.timeout)
+        response.raise_for_status()
+        state = WidgetState(id=widget_id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id = file_id
+        info.name = name
+        info.size = len(content)
+        info.file_urls.file_id = file_id
+        info.file_urls.upload_url = f"/_stcore/upload_file/{self.session_id}/{file_id}"
+        info.file_urls.delete_url = info.file_urls.upload_url
+        self.states[widget_id] = state
+        return self.rerun()
+
+
+# Fungsi untuk menyusun langkah perjalanan satu pengguna: buka halaman, upload file, buat grafik, minta insight
+def journey_steps(labels, upload, chart_type, x_col, y_col, prompt):
+    def make_chart(session):
+        session.set_string('selectbox', labels['chart_type'], chart_type)
+        session.set_string('selectbox', labels['x_col'], x_col)
+        session.set_string('selectbox', labels['y_col'], y_col)
+        session.click(labels['chart_button'])
+
+    def make_insight(session):
+        session.set_string('text_area', labels['prompt'], prompt)
+        session.click(labels['insight_button'])
+
+    return [
+        lambda session: session.rerun(),
+        lambda session: session.upload(labels['uploader'], *upload),
+        make_chart,
+        make_insight,
+    ]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else float('nan')
+
+
+# Satu pengguna simulasi: setiap iterasi adalah sesi browser baru yang menjalankan seluruh langkah
+# berurutan, dengan jeda berpikir acak di antara langkah
+def run_user(user, args, base_url, upload, timings, failures):
+    rng = random.Random(user)
+    for iteration in range(args.iterations):
+        chart_type, x_col, y_col = SCENARIOS[(user + iteration) % len(SCENARIOS)]
+        # Prompt unik per pengguna agar setiap insight benar-benar memanggil endpoint (kecuali --same-prompt)
+        prompt = PROMPT if args.same_prompt else f"{PROMPT} (pengguna {user}, sesi {iteration})"
+        name = 'koneksi'
+        try:
+            with AppSession(base_url, args.timeout) as session:
+                for name, step in zip(STEPS, journey_steps(APPS[args.app], upload, chart_type, x_col, y_col, prompt)):
+                    started = time.perf_counter()
+                    step(session)
+                    timings[name].append(time.perf_counter() - started)
+                    if session.errors:
+                        raise RuntimeError(session.errors[0][:200])
+                    if args.think:
+                        time.sleep(rng.uniform(0, 2 * args.think))
+            timings['sesi'].append(1)
+        except Exception as e:
+            failures.append((name, f"{type(e).__name__}: {e}"))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Fungsi untuk menjalankan aplikasi dengan `streamlit run` di proses terpisah dan menunggu sampai siap
+def start_app(app, env, log_path):
+    port = free_port()
+    command = [
+        sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, f"{app}.py"),
+        '--server.port', str(port), '--server.headless', 'true', '--server.fileWatcherType', 'none',
+        # Hanya untuk server uji lokal: upload dari klien tanpa cookie XSRF browser
+        '--server.enableXsrfProtection', 'false', '--browser.gatherUsageStats', 'false',
+    ]
+    log = open(log_path, 'w', encoding='utf-8')
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server {app} berhenti; lihat {log_path}")
+        try:
+            urllib.request.urlopen(base_url + '/_stcore/health', timeout=1)
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server {app} tidak siap dalam 60 detik; lihat {log_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban: N pengguna simulasi menjalankan upload → grafik → insight terhadap aplikasi Streamlit.")
+    parser.add_argument('--app', choices=sorted(APPS), default='deployapp2')
+    parser.add_argument('--url', default=None, help="Server Streamlit yang sudah berjalan (default: jalankan --app dengan endpoint stub)")
+    parser.add_argument('--users', type=int, default=8, help="Jumlah pengguna bersamaan")
+    parser.add_argument('--iterations', type=int, default=3, help="Jumlah sesi berurutan per pengguna")
+    parser.add_argument('--ramp', type=float, default=2.0, help="Rentang waktu (detik) untuk memulai seluruh pengguna")
+    parser.add_argument('--think', type=float, default=0.2, help="Rata-rata jeda berpikir antar langkah (detik)")
+    parser.add_argument('--file', default=os.path.join(ROOT, 'modified_data.csv'), help="File yang diunggah setiap pengguna")
+    parser.add_argument('--endpoint', default=None, help="Endpoint chat completions untuk server (default: stub lokal di proses ini)")
+    parser.add_argument('--latency', type=float, default=0.3, help="Latensi stub sebelum token pertama (detik)")
+    parser.add_argument('--token-delay', type=float, default=0.01, help="Jeda stub antar token (detik)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Peluang stub menolak request dengan 429")
+    parser.add_argument('--same-prompt', action='store_true', help="Semua pengguna memakai prompt yang sama (menguji cache narasi)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Batas waktu satu rerun (detik)")
+    parser.add_argument('--json', default=None, help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    cache_dir = os.path.join(ROOT, '.cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    metrics_path = os.path.join(cache_dir, 'bench_load_metrics.jsonl')
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)
+    stub = None
+    if args.endpoint is None and args.url is None:
+        from llm_stub_server import StubLLM, serve
+        stub = StubLLM(latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate, seed=0)
+        args.endpoint = f"http://127.0.0.1:{serve(stub).server_port}"
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        # Variabel yang diset di sini menang atas .env karena load_dotenv tidak menimpa nilai yang sudah ada
+        env = dict(os.environ, AZURE_ENDPOINT=args.endpoint, LLM_METRICS_PATH=metrics_path, LOTTIE_TIMEOUT='1')
+        env.setdefault('API_KEY', 'stub')
+        env.setdefault('API_VERSION', '2024-02-01')
+        if not args.same_prompt:
+            env['NARRATIVE_CACHE_DB'] = ''
+        process, base_url = start_app(args.app, env, os.path.join(cache_dir, 'bench_load_server.log'))
+
+    with open(args.file, 'rb') as handle:
+        upload = (os.path.basename(args.file), handle.read(), 'text/csv')
+    timings = {name: [] for name in STEPS + ['sesi']}
+    failures = []
+    threads = [threading.Thread(target=run_user, args=(user, args, base_url, upload, timings, failures)) for user in range(args.users)]
+    print(f"{args.app}: {args.users} pengguna x {args.iterations} sesi terhadap {base_url}, endpoint {args.endpoint or '(server)'}")
+    started = time.perf_counter()
+    try:
+        for user, thread in enumerate(threads):
+            thread.start()
+            if user < args.users - 1:
+                time.sleep(args.ramp / (args.users - 1))
+        for thread in threads:
+            thread.join()
+    finally:
+        wall = time.perf_counter() - started
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    sessions = len(timings.pop('sesi'))
+    steps = sum(len(values) for values in timings.values())
+    print(f"\nSelesai dalam {wall:.1f} s: {sessions} sesi lengkap ({sessions / wall * 60:.1f}/menit), "
+          f"{steps} langkah ({steps / wall:.2f}/s), {len(failures)} gagal")
+    print(f"  {'langkah':<10} {'jumlah':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'maks ms':>9}")
+    report = {'app': args.app, 'users': args.users, 'iterations': args.iterations, 'wall_s': wall,
+              'sessions_per_min': sessions / wall * 60, 'steps_per_s': steps / wall, 'failures': failures, 'steps': {}}
+    for name, values in timings.items():
+        row = {'count': len(values), **{f"p{int(q * 100)}_ms": percentile(values, q) * 1000 for q in (0.5, 0.95, 0.99)},
+               'max_ms': max(values, default=float('nan')) * 1000}
+        report['steps'][name] = row
+        print(f"  {name:<10} {row['count']:>7} {row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} {row['max_ms']:>9.0f}")
+    for name, message in failures[:5]:
+        print(f"  gagal di {name}: {message}")
+
+    # Telemetri narasi ditulis oleh proses server (hanya jika server dijalankan oleh skrip ini)
+    from llm_metrics_report import summarize_metrics
+    from llm_telemetry import read_metrics
+    records = read_metrics(metrics_path)
+    narratives = summarize_metrics(records)
+    if not narratives.empty:
+        print("\nPanggilan narasi (telemetri server):")
+        print(narratives[['calls', 'cache_hit_rate', 'errors', 'latency_ms_p50', 'latency_ms_p95', 'ttft_ms_p50', 'ttft_ms_p95']]
+              .to_string(float_format='{:,.0f}'.format))
+        # Antrean penjadwal kuota (LLM_RPM_LIMIT/LLM_TPM_LIMIT) ikut masuk ke latensi insight
+        waits = [record.get('queue_wait_ms', 0) for record in records]
+        report['queue_wait_ms'] = {'p50': percentile(waits, 0.5), 'p95': percentile(waits, 0.95), 'max': max(waits)}
+        print(f"Antre kuota: p50 {report['queue_wait_ms']['p50']:,.0f} ms, p95 {report['queue_wait_ms']['p95']:,.0f} ms, "
+              f"maks {report['queue_wait_ms']['max']:,.0f} ms")
+    if stub is not None:
+        report['stub'] = stub.stats()
+        print(f"\nStub: {report['stub']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Hasil disimpan ke {args.json}")
+
+
+if __name__ == "__main__":
+    main()
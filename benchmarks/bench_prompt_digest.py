@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_digest import build_data_digest, digest_reduction
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modified_data.csv')
+
+
+# Fungsi untuk menyusun teks data yang dulu diinline kedua kalinya di deskripsi chart
+def inline_lists(*columns):
+    return "".join(str(column.tolist()) for column in columns)
+
+
+def main():
+    data = pd.read_csv(DATA_FILE)
+
+    funnel = pd.DataFrame({
+        'Stages': ['Visit', 'Product View', 'Add to Cart', 'Checkout', 'Purchase'],
+        'Values': [len(data) * 20, len(data) * 8, len(data) * 3, len(data) * 2, len(data)],
+    })
+    gauge = pd.DataFrame({'total_sales': [data['Sales'].sum()], 'target_sales': [2500000.0]})
+    sankey = data[['City', 'Category', 'Sales']]
+    stacked = data[['Category', 'Sales', 'Profit']]
+
+    cases = {
+        'sankey': (sankey, dict(group_cols=['City', 'Category'], value_cols=['Sales']),
+                   inline_lists(sankey['City'], sankey['Category'], sankey['Category'], sankey['Sales'])),
+        'funnel': (funnel, dict(group_cols=['Stages'], value_cols=['Values'], sort_by_value=False),
+                   inline_lists(funnel['Stages'], funnel['Values'])),
+        'gauge': (gauge, dict(value_cols=['total_sales', 'target_sales']),
+                  f"{gauge['total_sales'].iloc[0]}{gauge['target_sales'].iloc[0]}"),
+        'stacked_bar': (stacked, dict(group_cols=['Category'], value_cols=['Sales', 'Profit']), ""),
+        'double_line': (stacked, dict(group_cols=['Category'], value_cols=['Sales', 'Profit']), ""),
+    }
+
+    print(f"{'chart':<12} {'baris':>7} {'token asli':>11} {'token digest':>13} {'pengurangan':>12}")
+    for chart_type, (df, options, duplicated) in cases.items():
+        digest = build_data_digest(df, **options)
+        report = digest_reduction(df, digest, duplicated)
+        print(f"{chart_type:<12} {len(df):>7} {report['original_tokens']:>11} {report['digest_tokens']:>13} {report['reduction']:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
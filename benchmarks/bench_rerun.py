@@ -0,0 +1,199 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Endpoint narasi diarahkan ke stub lokal tanpa latensi agar yang terukur hanya biaya rerun aplikasi;
+# harus diset sebelum modul aplikasi diimpor oleh skrip Streamlit
+os.environ['NARRATIVE_CACHE_DB'] = ''
+os.environ['LLM_METRICS_PATH'] = ''
+os.environ.setdefault('LOTTIE_TIMEOUT', '1')
+
+from bench_scaling import clear_parse_caches, compare, dataset_path, parse_size
+from llm_stub_server import StubLLM, serve
+
+# Lokasi default baseline
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_rerun.json')
+
+# Ukuran dataset yang diunggah; file di atas STREAM_INGEST_MIN_MB memakai jalur streaming
+DEFAULT_SIZES = '10k,100k'
+DEFAULT_REPEAT = 5
+CHART = ('Bar Chart', 'Category', 'Sales')
+PROMPT = "Jelaskan pola utama pada grafik ini"
+
+
+def select(at, label, value):
+    next(widget for widget in at.selectbox if widget.label == label).set_value(value)
+
+
+# Urutan interaksi di deployapp2.py; setiap langkah adalah satu rerun
+def deployapp2_steps(upload, prompt):
+    chart_type, x_col, y_col = CHART
+
+    def choose_chart(at):
+        select(at, "Pilih Tipe Chart:", chart_type)
+        select(at, "Masukkan Kolom (Sumbu X)", x_col)
+        select(at, "Masukkan Baris (Sumbu Y)", y_col)
+        at.run()
+
+    return [
+        ('buka', lambda at: at.run()),
+        ('upload', lambda at: at.file_uploader[0].set_value(upload).run()),
+        ('pilih grafik', choose_chart),
+        ('hasilkan chart', lambda at: at.button(key='generate_chart').click().run()),
+        ('ketik prompt', lambda at: at.text_area[0].input(prompt).run()),
+        ('hasilkan insight', lambda at: at.button(key='generate_insight').click().run()),
+        ('ganti tipe grafik', lambda at: (select(at, "Pilih Tipe Chart:", 'Pie Chart'), at.run())),
+    ]
+
+
+# Urutan interaksi di app4.py; setiap langkah adalah satu rerun
+def app4_steps(upload, prompt):
+    chart_type, x_col, y_col = CHART
+
+    def choose_chart(at):
+        at.selectbox(key='chart_type').set_value(chart_type)
+        at.selectbox(key='x_col').set_value(x_col)
+        at.selectbox(key='y_col').set_value(y_col)
+        at.run()
+
+    return [
+        ('buka', lambda at: at.run()),
+        ('upload', lambda at: at.file_uploader[0].set_value(upload).run()),
+        ('pilih grafik', choose_chart),
+        ('hasilkan chart', lambda at: at.button(key='create_chart').click().run()),
+        ('ketik prompt', lambda at: at.text_area(key='user_question').input(prompt).run()),
+        ('hasilkan insight', lambda at: at.button(key='generate_narrative').click().run()),
+        ('ganti tipe grafik', lambda at: (at.selectbox(key='chart_type').set_value('Pie Chart'), at.run())),
+    ]
+
+
+APPS = {'deployapp2': deployapp2_steps, 'app4': app4_steps}
+
+
+# Fungsi untuk menghapus cache tingkat proses sehingga setiap urutan meniru pengguna baru dengan file baru
+def clear_process_caches():
+    from figure_cache import figure_cache
+    from narrative_cache import narrative_cache
+    clear_parse_caches()
+    figure_cache.clear()
+    narrative_cache.clear()
+
+
+# Fungsi untuk menjalankan satu urutan interaksi pada sesi AppTest baru; mengembalikan waktu (dan puncak
+# alokasi jika traced) per langkah. Exception atau st.error di halaman dianggap kegagalan benchmark.
+def run_sequence(app, upload, prompt, timeout, traced=False):
+    from streamlit.testing.v1 import AppTest
+    clear_process_caches()
+    at = AppTest.from_file(os.path.join(ROOT, f"{app}.py"), default_timeout=timeout)
+    measured = {}
+    for name, step in APPS[app](upload, prompt):
+        if traced:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        step(at)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] - base if traced else None
+        measured[name] = (elapsed, peak)
+        problems = [element.value for element in at.exception] + [element.value for element in at.error]
+        if problems:
+            raise RuntimeError(f"{app} gagal pada langkah '{name}': {str(problems[0])[:300]}")
+    return measured
+
+
+# Fungsi untuk mengukur satu aplikasi: satu urutan pemanasan (impor, Lottie, template Plotly), beberapa
+# urutan terukur tanpa tracemalloc, lalu satu urutan dengan tracemalloc untuk puncak alokasi per rerun
+def bench_app(app, upload, repeat, timeout):
+    run_sequence(app, upload, f"{PROMPT} (pemanasan)", timeout)
+    times = {}
+    for index in range(repeat):
+        for name, (elapsed, _) in run_sequence(app, upload, f"{PROMPT} ({index})", timeout).items():
+            times.setdefault(name, []).append(elapsed)
+    tracemalloc.start()
+    try:
+        peaks = run_sequence(app, upload, f"{PROMPT} (traced)", timeout, traced=True)
+    finally:
+        tracemalloc.stop()
+    return {
+        f"{app} {name}": {
+            'time_s': min(values),
+            'time_median_s': statistics.median(values),
+            'peak_mb': peaks[name][1] / (1024 * 1024),
+            'runs': len(values),
+        }
+        for name, values in times.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu dan alokasi per rerun Streamlit untuk urutan interaksi umum.")
+    parser.add_argument('--apps', default='deployapp2,app4', help="Aplikasi yang diukur (dipisah koma)")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Jumlah baris file yang diunggah, misal 10k,100k,1m")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Jumlah urutan terukur per aplikasi")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Batas waktu satu rerun (detik)")
+    parser.add_argument('--save', nargs='?', const=BASELINE_PATH, default=None, help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, default=None, help="Bandingkan dengan baseline JSON")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Batas kenaikan waktu/memori relatif sebelum dianggap regresi")
+    args = parser.parse_args()
+
+    # Peringatan Streamlit saat dijalankan tanpa server tidak relevan di sini
+    logging.disable(logging.WARNING)
+    server = serve(StubLLM(latency=0, token_delay=0))
+    os.environ['AZURE_ENDPOINT'] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault('API_KEY', 'stub')
+    os.environ.setdefault('API_VERSION', '2024-02-01')
+
+    results = {}
+    for rows in [parse_size(size) for size in args.sizes.split(',')]:
+        path = dataset_path(rows)
+        with open(path, 'rb') as handle:
+            upload = ('modified_data.csv', handle.read(), 'text/csv')
+        print(f"\nUpload {rows:,} baris")
+        print(f"  {'rerun':<36} {'min (ms)':>10} {'median (ms)':>12} {'puncak MB':>10}")
+        results[str(rows)] = {}
+        for app in args.apps.split(','):
+            measured = bench_app(app, upload, args.repeat, args.timeout)
+            results[str(rows)].update(measured)
+            for name, result in measured.items():
+                print(f"  {name:<36} {result['time_s'] * 1000:>10,.1f} {result['time_median_s'] * 1000:>12,.1f} {result['peak_mb']:>10,.1f}")
+    server.shutdown()
+
+    import pandas as pd
+    import streamlit
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'streamlit': streamlit.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nBaseline disimpan ke {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresi melebihi {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nTidak ada regresi melebihi {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
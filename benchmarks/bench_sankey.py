@@ -0,0 +1,111 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scaling import parse_size
+from sankey import sankey_links
+
+# Cara lama (apply + unique().index per baris) berbiaya O(baris x baris); hanya diukur sampai ukuran ini
+LEGACY_APPLY_MAX_ROWS = 20_000
+
+SUB_CATEGORIES = {
+    'Furniture': ['Bookcases', 'Chairs', 'Furnishings', 'Tables'],
+    'Office Supplies': ['Appliances', 'Art', 'Binders', 'Envelopes', 'Fasteners', 'Labels', 'Paper', 'Storage', 'Supplies'],
+    'Technology': ['Accessories', 'Copiers', 'Machines', 'Phones'],
+}
+
+
+# Fungsi untuk membuat tabel aliran sintetis City -> Category -> Sub-Category dengan nilai Sales
+def make_flows(n_rows, n_cities=500, seed=0):
+    rng = np.random.default_rng(seed)
+    pairs = [(category, sub) for category, subs in SUB_CATEGORIES.items() for sub in subs]
+    picks = rng.integers(0, len(pairs), n_rows)
+    return pd.DataFrame({
+        'City': np.array([f"City {i:03d}" for i in range(n_cities)])[rng.zipf(1.3, n_rows) % n_cities],
+        'Category': np.array([pair[0] for pair in pairs])[picks],
+        'Sub-Category': np.array([pair[1] for pair in pairs])[picks],
+        'Sales': rng.gamma(2.0, 120.0, n_rows).round(2),
+    })
+
+
+# Cara lama dari generate_insight_sankeydiagram.py: indeks dicari per baris, satu link per baris
+def legacy_apply_links(df, source_col, target_col, value_col):
+    labels = df[source_col].unique().tolist() + df[target_col].unique().tolist()
+    source = df[source_col].apply(lambda x: df[source_col].unique().tolist().index(x)).tolist()
+    target = df[target_col].apply(lambda x: df[target_col].unique().tolist().index(x) + len(df[source_col].unique().tolist())).tolist()
+    return labels, source, target, df[value_col].tolist()
+
+
+# Cara lama dengan indeks yang sudah di-cache: linear, tetapi tetap satu link per baris
+def per_row_links(df, source_col, target_col, value_col):
+    sources = df[source_col].unique().tolist()
+    targets = df[target_col].unique().tolist()
+    source_index = {label: i for i, label in enumerate(sources)}
+    target_index = {label: i + len(sources) for i, label in enumerate(targets)}
+    return (sources + targets, df[source_col].map(source_index).tolist(), df[target_col].map(target_index).tolist(),
+            df[value_col].tolist())
+
+
+# Figure Sankey minimal dari (label, source, target, value); sama untuk semua metode
+def links_figure(links):
+    if isinstance(links, dict):
+        links = links['labels'], links['source'], links['target'], links['value']
+    labels, source, target, value = links
+    return go.Figure(data=[go.Sankey(node=dict(label=labels), link=dict(source=source, target=target, value=value))])
+
+
+# Fungsi untuk memeriksa bahwa link teragregasi sama dengan groupby per pasangan pada setiap tingkat
+def check_links(df, path, value_col, links):
+    labels = links['labels']
+    got = pd.Series(links['value'], index=pd.MultiIndex.from_arrays(
+        [[labels[s] for s in links['source']], [labels[t] for t in links['target']]]))
+    for source_col, target_col in zip(path, path[1:]):
+        expected = df.groupby([source_col, target_col], sort=False)[value_col].sum()
+        expected.index = expected.index.set_names([None, None])
+        pairs = got.loc[got.index.isin(expected.index)]
+        assert len(pairs) >= len(expected), f"link {source_col} -> {target_col} hilang"
+        assert np.allclose(pairs.reindex(expected.index).to_numpy(), expected.to_numpy()), f"nilai {source_col} -> {target_col} berbeda"
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pembentukan link Sankey: per baris vs teragregasi.")
+    parser.add_argument('--sizes', default='10k,100k,1m', help="Jumlah baris tabel aliran, misal 10k,100k,1m")
+    args = parser.parse_args()
+
+    print(f"{'baris':>9} {'metode':<30} {'link':>9} {'link (ms)':>10} {'figure (ms)':>12} {'JSON (KB)':>10}")
+    for n_rows in [parse_size(size) for size in args.sizes.split(',')]:
+        df = make_flows(n_rows)
+        cases = []
+        if n_rows <= LEGACY_APPLY_MAX_ROWS:
+            cases.append(('per baris, apply (lama)', lambda: legacy_apply_links(df, 'City', 'Category', 'Sales')))
+        else:
+            print(f"{n_rows:>9,} {'per baris, apply (lama)':<30} {'dilewati: O(baris x baris)':>26}")
+        cases.append(('per baris, indeks di-cache', lambda: per_row_links(df, 'City', 'Category', 'Sales')))
+        for path in (['City', 'Category'], ['City', 'Category', 'Sub-Category']):
+            cases.append((f"agregat {len(path)} tingkat", lambda path=path: sankey_links(df, path, 'Sales')))
+        for name, build_links in cases:
+            links, links_time = timed(build_links)
+            link_count = len(links[1]) if isinstance(links, tuple) else len(links['source'])
+            fig, figure_time = timed(lambda: links_figure(links))
+            size_kb = len(fig.to_json()) / 1024
+            print(f"{n_rows:>9,} {name:<30} {link_count:>9,} {links_time * 1000:>10,.1f} {figure_time * 1000:>12,.1f} {size_kb:>10,.1f}")
+            if not isinstance(links, tuple):
+                check_links(df, ['City', 'Category', 'Sub-Category'][:len(links['level_sizes'])], 'Sales', links)
+    print("Link teragregasi sama dengan groupby per pasangan di setiap tingkat.")
+
+
+if __name__ == "__main__":
+    main()
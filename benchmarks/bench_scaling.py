@@ -0,0 +1,310 @@
+import argparse
+import ast
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ingest import excel_sheet_cache
+from upload_cache import parsed_frame_cache
+
+# Lokasi default baseline dan dataset sintetis
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_scaling.json')
+DATASET_DIR = os.path.join(ROOT, '.cache', 'bench_scaling')
+
+# Ukuran dataset default; 10M baris bisa diminta lewat --sizes 10k,100k,1m,10m
+DEFAULT_SIZES = '10k,100k,1m'
+
+# Pengukuran diulang minimal DEFAULT_REPEAT kali; fungsi cepat diulang sampai total waktunya mencapai
+# MIN_SAMPLE_SECONDS (maksimal MAX_REPEAT kali), fungsi lambat berhenti setelah satu jalan > MIN_REPEAT_SECONDS
+DEFAULT_REPEAT = 3
+MAX_REPEAT = 25
+MIN_SAMPLE_SECONDS = 1.0
+MIN_REPEAT_SECONDS = 2.0
+
+# Grafik per aplikasi: (jenis grafik, sumbu X, sumbu Y)
+DEPLOYAPP2_CHARTS = [
+    ('Line Chart', 'Order Date', 'Sales'),
+    ('Bar Chart', 'Category', 'Sales'),
+    ('Pie Chart', 'Region', 'Sales'),
+    ('Scatter Plot', 'Sales', 'Profit'),
+    ('Area Chart', 'Order Date', 'Profit'),
+    ('Stacked Bar Chart', 'Segment', 'Sales'),
+    ('Waterfall Chart', 'Order Month', 'Profit'),
+    ('Bubble Chart', 'Discount', 'Sales'),
+    ('Tree Map', 'Sub-Category', 'Sales'),
+    ('Gauge Chart', 'Sales', 'Profit'),
+]
+APP4_CHARTS = [
+    ('Bar Chart', 'Category', 'Sales'),
+    ('Line Chart', 'Order Date', 'Sales'),
+    ('Pie Chart', 'Region', 'Sales'),
+    ('Scatter Plot', 'Sales', 'Profit'),
+    ('Area Chart', 'Order Date', 'Profit'),
+    ('Double Line Chart', 'Order Date', 'Sales'),
+    ('Waterfall Chart', 'Order Year', 'Profit'),
+    ('Tree Map', 'Sub-Category', 'Sales'),
+    ('Bubble Chart', 'Discount', 'Sales'),
+]
+DESCRIPTIONS = [
+    ('Bar Chart', 'Category', 'Sales'),
+    ('Line Chart', 'Order Date', 'Sales'),
+    ('Waterfall Chart', 'Order Month', 'Profit'),
+]
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+
+
+# Fungsi untuk mengubah '10k', '1m', '10000' menjadi jumlah baris
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+# Fungsi untuk membuat dataset sintetis berbentuk modified_data.csv: kombinasi kategori diambil dari
+# data asli (pasangan Category/Sub-Category, City/State, dst. tetap konsisten), tanggal dan angka diacak
+def make_dataset(rows, seed=0):
+    base = pd.read_csv(os.path.join(ROOT, 'modified_data.csv'))
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    order_date = pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 4 * 365, rows), unit='D')
+    ship_date = order_date + pd.to_timedelta(rng.integers(0, 8, rows), unit='D')
+    df['Order ID'] = [f"CA-{year}-{number:07d}" for year, number in zip(order_date.year, rng.integers(0, 10_000_000, rows))]
+    df['Order Date'] = order_date.strftime('%Y-%m-%d')
+    df['Ship Date'] = ship_date.strftime('%m/%d/%Y')
+    df['Sales'] = (df['Sales'] * rng.lognormal(0, 0.2, rows)).round(2)
+    df['Profit'] = (df['Profit'] * rng.lognormal(0, 0.2, rows)).round(4)
+    df['Order Year'] = order_date.year
+    df['Order Month'] = order_date.month
+    df['Order Day'] = order_date.day
+    df['Order Day of Week'] = order_date.day_name()
+    return df
+
+
+# Fungsi untuk mengambil (atau membuat sekali) file CSV sintetis dengan jumlah baris tertentu
+def dataset_path(rows):
+    path = os.path.join(DATASET_DIR, f'modified_data_{rows}.csv')
+    if not os.path.exists(path):
+        os.makedirs(DATASET_DIR, exist_ok=True)
+        started = time.perf_counter()
+        make_dataset(rows).to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        print(f"  dataset {rows:,} baris dibuat dalam {time.perf_counter() - started:.1f} s")
+    return path
+
+
+# Fungsi untuk mengambil fungsi dari skrip Streamlit tanpa menjalankan halamannya:
+# hanya import, definisi fungsi, dan konstanta tingkat atas yang dieksekusi
+def load_app_functions(script_name):
+    path = os.path.join(ROOT, script_name)
+    with open(path, encoding='utf-8') as handle:
+        tree = ast.parse(handle.read(), path)
+    keep = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef)):
+            keep.append(node)
+        elif isinstance(node, ast.Assign) and isinstance(node.value, (ast.Constant, ast.List, ast.Tuple, ast.Dict)):
+            keep.append(node)
+    namespace = {'__name__': f'bench_{os.path.splitext(script_name)[0]}', '__file__': path}
+    exec(compile(ast.Module(body=keep, type_ignores=[]), path, 'exec'), namespace)
+    return namespace
+
+
+# Streamlit pengganti untuk widget di dalam fungsi aplikasi (misal pilihan kolom Double Line Chart)
+class StreamlitShim:
+    def __init__(self, module, **overrides):
+        self._module = module
+        self._overrides = overrides
+
+    def __getattr__(self, name):
+        if name in self._overrides:
+            return self._overrides[name]
+        return getattr(self._module, name)
+
+
+# Objek upload tiruan dengan antarmuka UploadedFile Streamlit yang dipakai aplikasi
+def make_upload(data, name):
+    upload = io.BytesIO(data)
+    upload.name = name
+    upload.size = len(data)
+    upload.file_id = name
+    return upload
+
+
+# Fungsi untuk mengukur satu fungsi: satu jalan pemanasan, waktu tercepat (tanpa tracemalloc; paling tahan
+# terhadap gangguan proses lain), lalu puncak alokasi Python pada satu jalan terpisah dengan tracemalloc. setup() dipanggil sebelum setiap jalan (tidak diukur).
+def measure(func, repeat=DEFAULT_REPEAT, setup=None):
+    def run():
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
+    times = [run()]
+    if times[0] <= MIN_REPEAT_SECONDS:
+        times = []
+        while len(times) < repeat or (sum(times) < MIN_SAMPLE_SECONDS and len(times) < MAX_REPEAT):
+            times.append(run())
+            if times[-1] > MIN_REPEAT_SECONDS:
+                break
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time_s': min(times), 'time_median_s': float(np.median(times)), 'peak_mb': peak / (1024 * 1024), 'runs': len(times)}
+
+
+def clear_parse_caches():
+    parsed_frame_cache.clear()
+    excel_sheet_cache.clear()
+
+
+# Fungsi untuk memeriksa bahwa waterfall tanpa cube (agregasi langsung dari data hasil ingest, yang tipe
+# kolom tahun/bulannya sudah diturunkan) sama dengan waterfall dari cube, sehingga yang diukur adalah hasil yang benar
+def check_waterfall_paths(app4, monthly, cube):
+    with_cube = app4['waterfall_index'](cube)
+    without_cube = app4['waterfall_index'](None, monthly)
+    pd.testing.assert_frame_equal(without_cube.yearly('Profit'), with_cube.yearly('Profit'), check_dtype=False)
+    for year in cube.members('Order Year'):
+        expected = with_cube.monthly(year, 'Profit')
+        assert len(expected) == 13, f"deret bulanan {year} tidak lengkap"
+        pd.testing.assert_frame_equal(without_cube.monthly(year, 'Profit'), expected, check_dtype=False)
+        assert without_cube.month_labels(expected['Order Month'].iloc[:-1]) == MONTH_NAMES
+    for chart_type, x_col, y_col in DESCRIPTIONS:
+        if chart_type == 'Waterfall Chart':
+            without = app4['create_data_description'](monthly, x_col, y_col, chart_type, 2016)
+            expected = app4['create_data_description'](monthly, x_col, y_col, chart_type, 2016, cube)
+            assert without.keys() == expected.keys() and np.allclose(without[y_col], expected[y_col]) and all(
+                without[key] == expected[key] for key in expected if key != y_col
+            ), "deskripsi waterfall tanpa cube berbeda dengan cube"
+
+
+# Fungsi untuk menjalankan seluruh benchmark pada satu ukuran dataset
+def run_size(rows, repeat, deployapp2, app4, only=None):
+    with open(dataset_path(rows), 'rb') as handle:
+        data = handle.read()
+    results = {}
+
+    def bench(name, func, setup=None):
+        if only and not any(part in name for part in only):
+            return
+        result = measure(func, repeat, setup)
+        results[name] = result
+        print(f"  {name:<58} {result['time_s'] * 1000:>11,.1f} {result['peak_mb']:>10,.1f}")
+
+    upload = make_upload(data, 'modified_data.csv')
+    bench('deployapp2.load_file', lambda: deployapp2['load_file'](upload), clear_parse_caches)
+    bench('app4.load_data', lambda: app4['load_data'](upload), clear_parse_caches)
+
+    df = deployapp2['load_file'](upload)
+    cube = app4['DataCube'](df)
+    bench('app4.DataCube', lambda: app4['DataCube'](df))
+
+    for chart_type, x_col, y_col in DEPLOYAPP2_CHARTS:
+        bench(f'deployapp2.create_charts[{chart_type}]',
+              lambda: deployapp2['create_charts'](chart_type, df, x_col, y_col))
+
+    app4['st'] = StreamlitShim(app4['st'], multiselect=lambda *args, **kwargs: ['Sales', 'Profit'])
+    for chart_type, x_col, y_col in APP4_CHARTS:
+        bench(f'app4.create_chart[{chart_type}]',
+              lambda: app4['create_chart'](df, chart_type, x_col, y_col, app4['color_theme'], 2016, cube))
+
+    monthly = df.assign(**{'Month Name': pd.Categorical.from_codes(df['Order Month'].astype(int) - 1, MONTH_NAMES)})
+    check_waterfall_paths(app4, monthly, cube)
+    bench('app4.create_waterfall[Monthly]', lambda: app4['create_waterfall'](monthly, 2016, 'Monthly'))
+    bench('app4.create_waterfall[Yearly]', lambda: app4['create_waterfall'](df, None, 'Yearly'))
+
+    for chart_type, x_col, y_col in DESCRIPTIONS:
+        bench(f'app4.create_data_description[{chart_type}]',
+              lambda: app4['create_data_description'](df, x_col, y_col, chart_type, 2016, cube))
+        bench(f'app4.create_data_description[{chart_type}, tanpa cube]',
+              lambda: app4['create_data_description'](df, x_col, y_col, chart_type, 2016))
+    return results
+
+
+# Fungsi untuk membandingkan hasil dengan baseline; mengembalikan daftar regresi
+def compare(results, baseline, threshold, min_time=0.02):
+    regressions = []
+    print(f"\n{'ukuran':>10} {'benchmark':<58} {'waktu':>9} {'memori':>9}")
+    for size, benches in results.items():
+        for name, result in benches.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            time_ratio = result['time_s'] / base['time_s'] if base['time_s'] else 1.0
+            memory_ratio = result['peak_mb'] / base['peak_mb'] if base['peak_mb'] else 1.0
+            # Benchmark yang sangat cepat mudah terpengaruh noise; hanya dibandingkan di atas min_time
+            slower = time_ratio > 1 + threshold and result['time_s'] >= min_time
+            bigger = memory_ratio > 1 + threshold and result['peak_mb'] >= 1
+            flag = ' REGRESI' if slower or bigger else ''
+            print(f"{int(size):>10,} {name:<58} {time_ratio:>8.2f}x {memory_ratio:>8.2f}x{flag}")
+            if flag:
+                regressions.append((size, name, time_ratio, memory_ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skala untuk ingest, grafik, dan deskripsi data.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Ukuran dataset, misal 10k,100k,1m,10m")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Jumlah pengulangan per benchmark")
+    parser.add_argument('--only', default=None, help="Hanya benchmark yang namanya memuat salah satu teks ini (dipisah koma)")
+    parser.add_argument('--save', nargs='?', const=BASELINE_PATH, default=None, help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH, default=None, help="Bandingkan dengan baseline JSON")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Batas kenaikan waktu/memori relatif sebelum dianggap regresi (mesin bersama cukup berisik)")
+    args = parser.parse_args()
+
+    # Streamlit berjalan tanpa server (bare mode); peringatan ScriptRunContext tidak relevan di sini
+    logging.disable(logging.WARNING)
+    deployapp2 = load_app_functions('deployapp2.py')
+    app4 = load_app_functions('app4.py')
+    only = args.only.split(',') if args.only else None
+    results = {}
+    for rows in [parse_size(size) for size in args.sizes.split(',')]:
+        print(f"\n{rows:,} baris")
+        print(f"  {'benchmark':<58} {'min (ms)':>11} {'puncak MB':>10}")
+        results[str(rows)] = run_size(rows, args.repeat, deployapp2, app4, only)
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nBaseline disimpan ke {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresi melebihi {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nTidak ada regresi melebihi {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import parse_upload
+
+
+# Tiruan UploadedFile Streamlit: buffer di memori yang sudah berisi seluruh isi upload
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+# Fungsi untuk membuat CSV sintetis berbentuk modified_data.csv
+def make_csv(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Order Date': pd.date_range('2014-01-01', periods=n_rows, freq='min').strftime('%Y-%m-%d'),
+        'Region': rng.choice(['Central', 'East', 'South', 'West'], n_rows),
+        'Category': rng.choice(['Furniture', 'Office Supplies', 'Technology'], n_rows),
+        'Sales': rng.gamma(2, 100, n_rows).round(2),
+        'Profit': rng.normal(20, 50, n_rows).round(2),
+        'Quantity': rng.integers(1, 10, n_rows),
+    })
+    return df.to_csv(index=False).encode('utf-8')
+
+
+# Fungsi untuk mengukur waktu dan puncak alokasi memori Python sebuah fungsi
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main():
+    print(f"{'baris':>9} {'jalur':<28} {'waktu (ms)':>11} {'puncak (MB)':>12} {'baca disk (MB)':>15}")
+    for n_rows in [100_000, 1_000_000]:
+        data = make_csv(n_rows)
+        upload = FakeUpload(data, 'data.csv')
+        size_mb = len(data) / (1024 * 1024)
+        with tempfile.TemporaryDirectory() as directory:
+            # Jalur lama app4: file dengan nama yang sama harus ada di disk dan dibaca ulang
+            path = os.path.join(directory, upload.name)
+            with open(path, 'wb') as handle:
+                handle.write(data)
+            def read_from_disk():
+                with open(path, 'rb') as handle:
+                    return parse_upload(handle, 'csv')
+            old, old_ms, old_peak = measure(read_from_disk)
+        # Salinan bytes tambahan sebelum parsing (misal bytes(upload.getbuffer()))
+        copied, copy_ms, copy_peak = measure(lambda: parse_upload(io.BytesIO(bytes(upload.getbuffer())), 'csv'))
+        # Jalur baru: parsing langsung dari buffer upload
+        new, new_ms, new_peak = measure(lambda: parse_upload(upload, 'csv'))
+        pd.testing.assert_frame_equal(old, new)
+        pd.testing.assert_frame_equal(copied, new)
+        print(f"{n_rows:>9} {'baca ulang dari disk (lama)':<28} {old_ms:>11.1f} {old_peak:>12.1f} {size_mb:>15.1f}")
+        print(f"{n_rows:>9} {'salinan bytes':<28} {copy_ms:>11.1f} {copy_peak:>12.1f} {0:>15.1f}")
+        print(f"{n_rows:>9} {'buffer upload (baru)':<28} {new_ms:>11.1f} {new_peak:>12.1f} {0:>15.1f}")
+    print("Hasil parsing identik di semua jalur.")
+
+
+if __name__ == "__main__":
+    main()
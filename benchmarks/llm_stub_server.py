@@ -0,0 +1,245 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Narasi bawaan jika tidak ada respons kalengan yang cocok dengan prompt
+DEFAULT_RESPONSE = (
+    "Grafik ini menunjukkan pola yang cukup jelas. Nilai tertinggi terkonsentrasi pada beberapa kategori utama, "
+    "sementara kategori lainnya memberikan kontribusi yang jauh lebih kecil. Tren dari waktu ke waktu cenderung naik "
+    "dengan beberapa penurunan musiman. Secara keseluruhan, data ini menunjukkan peluang untuk memfokuskan strategi "
+    "pada kategori dengan kinerja terbaik sambil mengevaluasi kategori yang tertinggal."
+)
+
+
+# Kuota RPM/TPM tiruan seperti deployment Azure OpenAI (token bucket, biaya prompt + max_tokens)
+class QuotaStub:
+    def __init__(self, rpm, tpm, period=60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.period = period
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def admit(self, cost):
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.updated
+            self.updated = now
+            self.requests = min(self.rpm, self.requests + elapsed * self.rpm / self.period)
+            self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / self.period)
+            if self.requests >= 1 and self.tokens >= cost:
+                self.requests -= 1
+                self.tokens -= cost
+                self.accepted += 1
+                return None
+            self.rejected += 1
+            wait = max((1 - self.requests) * self.period / self.rpm, (cost - self.tokens) * self.period / self.tpm)
+            return max(wait, 0.01)
+
+
+# Server chat completions tiruan yang kompatibel dengan klien AzureOpenAI: latensi sebelum token pertama,
+# jeda antar token untuk stream, injeksi 429 acak dan/atau kuota RPM/TPM, serta respons kalengan
+# berdasarkan kata kunci di prompt
+class StubLLM:
+    def __init__(self, latency=0.3, latency_jitter=0.0, token_delay=0.02, error_rate=0.0, retry_after=1.0,
+                 quota=None, responses=None, seed=None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.quota = quota
+        self.responses = {key.lower(): value for key, value in (responses or {}).items()}
+        self.random = random.Random(seed)
+        self.counts = {'requests': 0, 'streamed': 0, 'ok': 0, 'rate_limited': 0, 'completion_tokens': 0}
+        self.lock = threading.Lock()
+
+    def count(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                self.counts[name] += value
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+    # Fungsi untuk memutuskan penolakan 429; mengembalikan Retry-After (detik) atau None jika diterima
+    def reject(self, cost):
+        with self.lock:
+            injected = self.error_rate > 0 and self.random.random() < self.error_rate
+        if injected:
+            return self.retry_after
+        if self.quota is not None:
+            return self.quota.admit(cost)
+        return None
+
+    def first_token_delay(self):
+        with self.lock:
+            jitter = self.random.uniform(-self.latency_jitter, self.latency_jitter) if self.latency_jitter else 0.0
+        return max(0.0, self.latency + jitter)
+
+    # Fungsi untuk memilih respons kalengan: kata kunci pertama yang muncul di prompt, selain itu 'default'
+    def respond(self, messages):
+        prompt = ' '.join(str(message.get('content') or '') for message in messages).lower()
+        for keyword, text in self.responses.items():
+            if keyword != 'default' and keyword in prompt:
+                return text
+        return self.responses.get('default', DEFAULT_RESPONSE)
+
+
+# Fungsi untuk memperkirakan token prompt dengan aturan yang sama seperti data_digest.estimate_tokens
+def prompt_token_count(messages):
+    return sum((len(str(message.get('content') or '')) + 3) // 4 + 4 for message in messages)
+
+
+# Fungsi untuk memecah teks menjadi "token" stream (kata beserta spasi sesudahnya)
+def split_tokens(text):
+    return re.findall(r'\S+\s*', text) or [text]
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))) or b'{}')
+            if not self.path.split('?')[0].endswith('/chat/completions'):
+                self.reply(404, {'error': {'code': '404', 'message': 'Resource not found'}})
+                return
+            messages = body.get('messages') or []
+            prompt_tokens = prompt_token_count(messages)
+            stub.count(requests=1)
+            retry_after = stub.reject(prompt_tokens + (body.get('max_tokens') or 800))
+            if retry_after is not None:
+                stub.count(rate_limited=1)
+                self.reply(429, {'error': {'code': '429', 'message': 'Rate limit exceeded'}},
+                           {'retry-after-ms': str(int(retry_after * 1000)), 'retry-after': str(max(1, round(retry_after)))})
+                return
+            tokens = split_tokens(stub.respond(messages))
+            max_tokens = body.get('max_tokens')
+            if max_tokens:
+                tokens = tokens[:max_tokens]
+            stub.count(ok=1, completion_tokens=len(tokens))
+            time.sleep(stub.first_token_delay())
+            model = body.get('model') or self.path.split('/deployments/')[-1].split('/')[0]
+            usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens), 'total_tokens': prompt_tokens + len(tokens)}
+            if body.get('stream'):
+                stub.count(streamed=1)
+                try:
+                    self.stream(model, tokens, usage, (body.get('stream_options') or {}).get('include_usage'))
+                except (BrokenPipeError, ConnectionResetError):
+                    # Klien menutup stream sebelum selesai (misalnya sesi Streamlit dihentikan)
+                    self.close_connection = True
+                return
+            time.sleep(stub.token_delay * len(tokens))
+            self.reply(200, {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion', 'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(tokens)}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+
+        def reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('content-type', 'application/json')
+            self.send_header('content-length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        # Stream server-sent events dengan chunked transfer; seperti Azure, chunk pertama tanpa choices
+        def stream(self, model, tokens, usage, include_usage):
+            self.send_response(200)
+            self.send_header('content-type', 'text/event-stream')
+            self.send_header('transfer-encoding', 'chunked')
+            self.end_headers()
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+            def chunk(choices, **extra):
+                return {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                        'model': model, 'choices': choices, **extra}
+
+            self.send_event({'id': '', 'object': '', 'created': 0, 'model': '', 'choices': [], 'prompt_filter_results': []})
+            self.send_event(chunk([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}]))
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(stub.token_delay)
+                self.send_event(chunk([{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]))
+            self.send_event(chunk([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+            if include_usage:
+                self.send_event(chunk([], usage=usage))
+            self.send_chunk(b'data: [DONE]\n\n')
+            self.send_chunk(b'')
+
+        def send_event(self, payload):
+            self.send_chunk(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+
+        def send_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+    return Handler
+
+
+# Fungsi untuk menjalankan server tiruan di thread latar; port 0 memilih port bebas
+def serve(stub, host='127.0.0.1', port=0):
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server chat completions tiruan untuk menjalankan aplikasi dan uji beban tanpa kuota Azure.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--latency', type=float, default=0.3, help="Jeda sebelum token pertama (detik)")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Variasi acak latensi, +/- detik")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="Jeda antar token stream (detik)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Peluang request ditolak dengan 429 (0-1)")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After untuk 429 yang diinjeksi (detik)")
+    parser.add_argument('--rpm', type=int, default=0, help="Kuota request per menit (0 = tanpa kuota)")
+    parser.add_argument('--tpm', type=int, default=0, help="Kuota token per menit (0 = tanpa kuota)")
+    parser.add_argument('--responses', default=None, help="File JSON {kata kunci: narasi}; kunci 'default' untuk selainnya")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, encoding='utf-8') as handle:
+            responses = json.load(handle)
+    quota = None
+    if args.rpm or args.tpm:
+        quota = QuotaStub(args.rpm or 10 ** 9, args.tpm or 10 ** 12)
+    stub = StubLLM(args.latency, args.latency_jitter, args.token_delay, args.error_rate, args.retry_after,
+                   quota, responses, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    server.daemon_threads = True
+    print(f"Stub chat completions berjalan di http://{args.host}:{server.server_port}")
+    print("Jalankan aplikasi dengan:")
+    print(f"  AZURE_ENDPOINT=http://{args.host}:{server.server_port} API_KEY=stub API_VERSION=2024-02-01 streamlit run app4.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Ringkasan: {stub.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from chart_reduction import CATEGORY_OTHER_LABEL
+
+
+# Fungsi untuk membuat deret acak (random walk) dengan lonjakan tajam yang harus tetap terlihat setelah downsampling
+def make_spiky_values(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.normal(0, 1, n_rows))
+    spikes = rng.choice(n_rows, size=20, replace=False)
+    values[spikes[:10]] += 500
+    values[spikes[10:]] -= 500
+    return values
+
+
+# Fungsi untuk membuat deret waktu sintetis dengan lonjakan tajam; urutan baris diacak seperti data ekspor mentah
+def make_series(n_rows, seed=0):
+    values = make_spiky_values(n_rows, seed)
+    dates = pd.date_range('2000-01-01', periods=n_rows, freq='min')
+    order = np.random.default_rng(seed + 1).permutation(n_rows)
+    return pd.DataFrame({'Order Date': dates[order], 'Sales': values[order], 'Profit': -values[order]})
+
+
+# Fungsi untuk membuat data sintetis dengan jumlah kategori tertentu (distribusi berekor panjang),
+# termasuk nilai negatif dan kategori yang kebetulan bernama "Other"
+def make_categories(n_rows, cardinality, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = np.arange(n_rows) % cardinality if cardinality >= n_rows else rng.zipf(1.2, n_rows) % cardinality
+    names = np.array([f"Produk {i:07d}" for i in range(cardinality)], dtype=object)
+    names[cardinality // 2] = CATEGORY_OTHER_LABEL
+    return pd.DataFrame({
+        'Product Name': names[codes],
+        'Sales': rng.gamma(1.5, 200.0, n_rows).round(2),
+        'Profit': rng.normal(20.0, 150.0, n_rows).round(2),
+        'Segment': rng.choice(['Consumer', 'Corporate', 'Home Office'], n_rows),
+    })
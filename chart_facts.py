@@ -0,0 +1,217 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from sankey import sankey_links, sankey_path
+
+# Jumlah kategori teratas/terbawah yang dilaporkan
+FACTS_TOP_K = 5
+
+
+# Fungsi untuk membulatkan angka agar ringkas di prompt
+def _num(value, digits=2):
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    return round(float(value), digits)
+
+
+# Fungsi untuk mengubah label (kategori, tanggal, angka) menjadi teks/angka JSON
+def _label(value):
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value if isinstance(value, (int, float, str)) else str(value)
+
+
+# Fungsi untuk mengambil pasangan (label, nilai) dari sebuah Series
+def _pairs(series):
+    return [[_label(index), _num(value)] for index, value in series.items()]
+
+
+# Fungsi untuk menjumlahkan y per kategori x (atau menghitung baris jika y bukan numerik)
+def _aggregate(df, x_col, y_col, sort_index=False):
+    if pd.api.types.is_numeric_dtype(df[y_col]):
+        series = df.groupby(x_col, sort=sort_index, observed=True)[y_col].sum()
+    else:
+        series = df.groupby(x_col, sort=sort_index, observed=True)[y_col].count()
+    return series
+
+
+# Fakta untuk Pie Chart, Tree Map, dan Bar Chart: total, porsi, dan kategori terbesar/terkecil
+def _share_facts(df, x_col, y_col, top_k):
+    totals = _aggregate(df, x_col, y_col).sort_values(ascending=False)
+    grand_total = totals.sum()
+    shares = totals / grand_total * 100 if grand_total else totals * 0
+    top = totals.head(top_k)
+    facts = {
+        'jumlah_kategori': int(len(totals)),
+        'total': _num(grand_total),
+        'teratas': [[_label(name), _num(value), _num(shares[name], 1)] for name, value in top.items()],
+        'terbawah': _pairs(totals.tail(top_k).iloc[::-1]),
+    }
+    if len(totals) > top_k:
+        facts['porsi_lainnya_persen'] = _num(100 - shares.head(top_k).sum(), 1)
+    return facts
+
+
+# Fakta untuk Line Chart dan Area Chart: pertumbuhan, puncak, dan lembah
+def _trend_facts(df, x_col, y_col, top_k):
+    series = _aggregate(df, x_col, y_col, sort_index=True)
+    values = series.to_numpy(dtype=float)
+    facts = {
+        'jumlah_titik': int(len(series)),
+        'awal': [_label(series.index[0]), _num(values[0])],
+        'akhir': [_label(series.index[-1]), _num(values[-1])],
+        'rata_rata': _num(values.mean()),
+        'maksimum': [_label(series.idxmax()), _num(series.max())],
+        'minimum': [_label(series.idxmin()), _num(series.min())],
+    }
+    if values[0]:
+        facts['pertumbuhan_total_persen'] = _num((values[-1] - values[0]) / abs(values[0]) * 100, 1)
+    if len(series) > 1:
+        changes = series.diff().iloc[1:]
+        facts['kenaikan_terbesar'] = _pairs(changes.nlargest(min(top_k, 3)))
+        facts['penurunan_terbesar'] = _pairs(changes.nsmallest(min(top_k, 3)))
+    return facts
+
+
+# Fakta untuk Scatter Plot dan Bubble Chart: korelasi, tren linier, dan outlier
+def _relation_facts(df, x_col, y_col, top_k):
+    if not (pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col])):
+        return _share_facts(df, x_col, y_col, top_k)
+    pairs = df[[x_col, y_col]].dropna()
+    x = pairs[x_col].to_numpy(dtype=float)
+    y = pairs[y_col].to_numpy(dtype=float)
+    facts = {'jumlah_titik': int(len(pairs))}
+    if len(pairs) < 2 or x.std() == 0 or y.std() == 0:
+        return facts
+    slope, intercept = np.polyfit(x, y, 1)
+    residuals = y - (slope * x + intercept)
+    zscores = np.abs((residuals - residuals.mean()) / residuals.std()) if residuals.std() else np.zeros(len(residuals))
+    outliers = np.flatnonzero(zscores > 3)
+    worst = outliers[np.argsort(zscores[outliers])[::-1][:top_k]]
+    facts.update({
+        'korelasi_pearson': _num(np.corrcoef(x, y)[0, 1], 3),
+        'korelasi_spearman': _num(pairs[x_col].rank().corr(pairs[y_col].rank()), 3),
+        'kemiringan_tren': _num(slope, 4),
+        'rentang_x': [_num(x.min()), _num(x.max())],
+        'rentang_y': [_num(y.min()), _num(y.max())],
+        'jumlah_outlier': int(len(outliers)),
+        'outlier_terbesar': [[_num(x[i]), _num(y[i])] for i in worst],
+    })
+    return facts
+
+
+# Fakta untuk Waterfall Chart: total berjalan dan langkah terbesar
+def _waterfall_facts(df, x_col, y_col, top_k):
+    steps = _aggregate(df, x_col, y_col)
+    running = steps.cumsum()
+    facts = {
+        'jumlah_langkah': int(len(steps)),
+        'nilai_awal': [_label(steps.index[0]), _num(steps.iloc[0])],
+        'total_akhir': _num(running.iloc[-1]),
+        'langkah_positif': int((steps > 0).sum()),
+        'langkah_negatif': int((steps < 0).sum()),
+        'kenaikan_terbesar': _pairs(steps.nlargest(min(top_k, 3))),
+        'penurunan_terbesar': _pairs(steps.nsmallest(min(top_k, 3))),
+        'total_berjalan_tertinggi': [_label(running.idxmax()), _num(running.max())],
+        'total_berjalan_terendah': [_label(running.idxmin()), _num(running.min())],
+    }
+    return facts
+
+
+# Fakta untuk Gauge Chart: pencapaian terhadap target (mengikuti nilai baris pertama seperti pada grafik)
+def _gauge_facts(df, x_col, y_col, top_k):
+    value = df[x_col].iloc[0]
+    target = df[y_col].iloc[0]
+    if not (pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col])):
+        return {'nilai': _label(value), 'target': _label(target)}
+    # Skalar numpy diubah ke angka Python agar selisih tidak overflow pada kolom integer sempit
+    value, target = (item.item() if isinstance(item, np.generic) else item for item in (value, target))
+    facts = {'nilai': _num(value), 'target': _num(target), 'selisih': _num(value - target)}
+    if target:
+        facts['pencapaian_persen'] = _num(value / target * 100, 1)
+    return facts
+
+
+# Fakta untuk Stacked Bar Chart: total per batang dan komposisi segmen di dalamnya
+def _stack_facts(df, x_col, y_col, top_k):
+    if not pd.api.types.is_numeric_dtype(df[y_col]):
+        return _share_facts(df, x_col, y_col, top_k)
+    grouped = df.groupby(x_col, sort=False, observed=True)[y_col]
+    summary = pd.DataFrame({'total': grouped.sum(), 'segmen': grouped.count(), 'segmen_terbesar': grouped.max()})
+    summary = summary.sort_values('total', ascending=False)
+    summary['porsi_segmen_terbesar_persen'] = summary['segmen_terbesar'] / summary['total'].where(summary['total'] != 0) * 100
+    grand_total = summary['total'].sum()
+    return {
+        'jumlah_batang': int(len(summary)),
+        'total': _num(grand_total),
+        'batang_tertinggi': [
+            [_label(name), _num(row['total']), int(row['segmen']), _num(row['porsi_segmen_terbesar_persen'], 1)]
+            for name, row in summary.head(top_k).iterrows()
+        ],
+        'batang_terendah': _pairs(summary['total'].tail(top_k).iloc[::-1]),
+        'rata_rata_segmen_per_batang': _num(summary['segmen'].mean(), 1),
+    }
+
+
+# Fakta untuk Sankey Diagram: jalur, aliran terbesar/terkecil, dan sumber dengan aliran keluar terbesar
+def _flow_facts(df, x_col, y_col, top_k, levels=None):
+    path, value_col = sankey_path(df, x_col, y_col, levels)
+    if len(path) < 2:
+        return _share_facts(df, x_col, y_col, top_k)
+    links = sankey_links(df, path, value_col)
+    labels = links['labels']
+    flows = pd.Series(links['value'], index=[f"{labels[s]} -> {labels[t]}" for s, t in zip(links['source'], links['target'])])
+    flows = flows.sort_values(ascending=False)
+    first_level = links['source'] < links['level_sizes'][0]
+    outflow = pd.Series(links['value'][first_level]).groupby(links['source'][first_level]).sum().nlargest(top_k)
+    return {
+        'jalur': path,
+        'nilai_aliran': value_col or 'jumlah baris',
+        'jumlah_node': int(len(labels)),
+        'jumlah_aliran': int(len(flows)),
+        'aliran_terbesar': _pairs(flows.head(top_k)),
+        'aliran_terkecil': _pairs(flows.tail(top_k).iloc[::-1]),
+        'sumber_terbesar': [[labels[source], _num(value)] for source, value in outflow.items()],
+    }
+
+
+# Pemetaan jenis chart ke fungsi ekstraksi fakta
+CHART_FACT_EXTRACTORS = {
+    'Pie Chart': _share_facts,
+    'Tree Map': _share_facts,
+    'Bar Chart': _share_facts,
+    'Line Chart': _trend_facts,
+    'Area Chart': _trend_facts,
+    'Scatter Plot': _relation_facts,
+    'Bubble Chart': _relation_facts,
+    'Waterfall Chart': _waterfall_facts,
+    'Gauge Chart': _gauge_facts,
+    'Stacked Bar Chart': _stack_facts,
+    'Sankey Diagram': _flow_facts,
+}
+
+
+# Fungsi untuk menghitung fakta ringkas sebuah grafik; ukurannya tetap berapa pun jumlah barisnya.
+# levels (tingkat aliran tambahan) hanya dipakai oleh Sankey Diagram
+def extract_chart_facts(df, chart_type, x_col, y_col, top_k=FACTS_TOP_K, levels=None):
+    extractor = CHART_FACT_EXTRACTORS.get(chart_type, _share_facts)
+    facts = {'jenis_grafik': chart_type, 'sumbu_x': x_col, 'sumbu_y': y_col, 'jumlah_baris': int(df.attrs.get('source_rows', len(df)))}
+    # Tabel top-N (chart_reduction.top_n_frame): catat berapa kategori yang digabung ke "Other"
+    if 'category_reduction' in df.attrs:
+        facts['pengurangan_kategori'] = df.attrs['category_reduction']
+    if len(df) == 0:
+        return facts
+    options = {'levels': levels} if levels else {}
+    facts.update(extractor(df, x_col, y_col, top_k, **options))
+    return facts
+
+
+# Fungsi untuk mengubah fakta menjadi teks ringkas untuk prompt
+def format_chart_facts(facts):
+    return json.dumps(facts, ensure_ascii=False, separators=(', ', ': '), default=str)
@@ -0,0 +1,263 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Batas jumlah titik per grafik garis/area yang dikirim ke browser
+RENDER_POINT_BUDGET = int(os.getenv('RENDER_POINT_BUDGET', '5000'))
+
+# Jenis grafik yang melewati tahap downsampling
+DOWNSAMPLED_CHART_TYPES = ['Line Chart', 'Area Chart', 'Double Line Chart']
+
+# Ambang jumlah titik untuk Scatter Plot dan Bubble Chart: di atas ambang pertama memakai WebGL,
+# di atas ambang kedua titik diagregasi ke bin 2D di server
+SCATTER_WEBGL_THRESHOLD = int(os.getenv('SCATTER_WEBGL_THRESHOLD', '5000'))
+SCATTER_DENSITY_THRESHOLD = int(os.getenv('SCATTER_DENSITY_THRESHOLD', '200000'))
+SCATTER_DENSITY_BINS = int(os.getenv('SCATTER_DENSITY_BINS', '100'))
+
+# Batas jumlah mark (batang, irisan, kotak) pada grafik kategori; kategori di luar N teratas digabung
+# menjadi satu kategori "Other"
+CATEGORY_MARK_BUDGET = int(os.getenv('CATEGORY_MARK_BUDGET', '30'))
+CATEGORY_OTHER_LABEL = os.getenv('CATEGORY_OTHER_LABEL', 'Other')
+
+# Jenis grafik kategori yang melewati tahap top-N
+TOP_N_CHART_TYPES = ['Bar Chart', 'Pie Chart', 'Tree Map']
+
+
+# Fungsi untuk mendapatkan indeks titik min dan max dari setiap bucket (NaN diabaikan)
+def _bucket_extrema(y, bucket):
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) == 0:
+        return np.array([], dtype=np.int64)
+    # Urutkan per bucket lalu per nilai: elemen pertama tiap bucket = min, terakhir = max
+    order = valid[np.lexsort((y[valid], bucket[valid]))]
+    buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    return np.r_[order[starts], order[ends]]
+
+
+# Fungsi untuk memilih indeks titik min dan max di setiap bucket (puncak dan lembah selalu dipertahankan)
+def minmax_indices(y, n_out):
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(1, (n_out - 2) // 2)
+    bucket = np.arange(n) * n_buckets // n
+    return np.unique(np.r_[0, _bucket_extrema(y, bucket), n - 1])
+
+
+# Fungsi untuk menghitung batas bucket LTTB: titik pertama dan terakhir berdiri sendiri,
+# titik di antaranya dibagi rata ke n_buckets bucket
+def lttb_bucket_edges(n, n_buckets):
+    return np.arange(n_buckets + 1) * (n - 2) // n_buckets + 1
+
+
+# Fungsi untuk memilih indeks titik dengan algoritma Largest-Triangle-Three-Buckets (LTTB).
+# Selain titik LTTB, min dan max setiap bucket ikut dipertahankan sehingga puncak dan lembah
+# tidak hilang; karena itu setiap bucket menyumbang paling banyak tiga titik.
+def lttb_indices(x, y, n_out):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    n_buckets = max(1, (n_out - 2) // 3)
+    edges = lttb_bucket_edges(n, n_buckets)
+    selected = np.empty(n_buckets + 2, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_buckets):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 <= n_buckets else n
+        if next_start >= next_end:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    inner = np.arange(1, n - 1)
+    bucket = np.searchsorted(edges, inner, side='right') - 1
+    return np.unique(np.r_[selected, inner[_bucket_extrema(y[1:-1], bucket)]])
+
+
+# Fungsi untuk mengecek apakah sumbu X berurutan menurut nilainya (angka atau tanggal); sumbu lain
+# (teks, kategori) mengikuti urutan baris
+def _is_ordered_axis(x):
+    return pd.api.types.is_datetime64_any_dtype(x) or pd.api.types.is_numeric_dtype(x)
+
+
+# Fungsi untuk mengubah kolom sumbu X menjadi angka (tanggal -> epoch, kategori -> posisi)
+def _x_as_numbers(x):
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=float)
+    return np.arange(len(x), dtype=float)
+
+
+# Fungsi untuk mendapatkan batas sumbu X yang bisa di-zoom (hanya untuk sumbu numerik/tanggal)
+def zoomable_x_bounds(df, x_col):
+    x = df[x_col]
+    if len(x) == 0 or not (pd.api.types.is_numeric_dtype(x) or pd.api.types.is_datetime64_any_dtype(x)):
+        return None
+    low, high = x.min(), x.max()
+    if isinstance(low, pd.Timestamp):
+        return low.to_pydatetime(), high.to_pydatetime()
+    if pd.api.types.is_integer_dtype(x):
+        return int(low), int(high)
+    return float(low), float(high)
+
+
+# Fungsi untuk mengurangi jumlah titik grafik garis/area sesuai anggaran render.
+# x_range (opsional) memfilter data ke rentang zoom terlebih dahulu sehingga rentang sempit
+# kembali ditampilkan dengan resolusi penuh.
+def downsample_frame(df, x_col, y_cols, budget=None, method='minmax', x_range=None):
+    budget = RENDER_POINT_BUDGET if budget is None else budget
+    if isinstance(y_cols, str):
+        y_cols = [y_cols]
+    data = df
+    if x_range is not None:
+        data = data[(data[x_col] >= x_range[0]) & (data[x_col] <= x_range[1])]
+    # Sumbu angka/tanggal diurutkan sebelum pemeriksaan anggaran agar urutan titik tidak bergantung pada
+    # jumlah baris; sumbu teks/kategori (misal nama bulan) tetap memakai urutan baris aslinya
+    if _is_ordered_axis(data[x_col]):
+        data = data.sort_values(x_col, kind='stable')
+    if len(data) <= budget:
+        return data
+    x_values = _x_as_numbers(data[x_col])
+    per_column = max(3, budget // len(y_cols))
+    selected = []
+    for y_col in y_cols:
+        if not pd.api.types.is_numeric_dtype(data[y_col]):
+            return data
+        y_values = data[y_col].to_numpy(dtype=float)
+        if method == 'lttb':
+            # Titik NaN dibuang sebelum LTTB; titik awal dan akhir tetap dipertahankan seperti pada min/max
+            valid = np.flatnonzero(~np.isnan(y_values))
+            selected.append(np.r_[0, valid[lttb_indices(x_values[valid], y_values[valid], per_column)], len(data) - 1])
+        else:
+            selected.append(minmax_indices(y_values, per_column))
+    return data.iloc[np.unique(np.concatenate(selected))]
+
+
+# Fungsi untuk mengagregasi grafik kategori per kategori X (jumlah y, atau banyak baris jika y bukan numerik)
+# dan membatasi jumlah kategori ke anggaran mark: N-1 kategori dengan nilai absolut terbesar dipertahankan
+# (urut menurun) dan sisanya dijumlahkan ke satu kategori "Other" di akhir. Ringkasan penggabungan
+# disimpan di attrs['category_reduction'] agar prompt narasi memakai tabel yang sama dengan grafik.
+def top_n_frame(df, x_col, y_col, budget=None, other_label=None):
+    budget = CATEGORY_MARK_BUDGET if budget is None else budget
+    other_label = CATEGORY_OTHER_LABEL if other_label is None else other_label
+    source_rows = df.attrs.get('source_rows', len(df))
+    # x dan y kolom yang sama: tidak ada measure terpisah, kategori diperingkat menurut banyak barisnya
+    # dan tabel hasilnya hanya berisi satu kolom label
+    same_column = x_col == y_col
+    if same_column:
+        totals = df.groupby(x_col, sort=False, observed=True).size()
+    else:
+        grouped = df.groupby(x_col, sort=False, observed=True)[y_col]
+        totals = grouped.sum() if pd.api.types.is_numeric_dtype(df[y_col]) else grouped.count()
+    if len(totals) <= budget:
+        result = pd.DataFrame({x_col: totals.index}) if same_column else totals.reset_index()
+        result.attrs['source_rows'] = source_rows
+        return result
+
+    keep = max(1, budget - 1)
+    values = totals.to_numpy()
+    magnitude = np.abs(np.nan_to_num(values.astype(float)))
+    top = np.argpartition(-magnitude, keep - 1)[:keep]
+    top = top[np.argsort(-values[top].astype(float), kind='stable')]
+    rest = np.ones(len(values), dtype=bool)
+    rest[top] = False
+    labels = totals.index[top]
+    if not (pd.api.types.is_object_dtype(labels) or pd.api.types.is_string_dtype(labels)):
+        labels = labels.astype(str)
+    labels = labels.tolist()
+    if other_label in labels:
+        other_label = f"{other_label} ({int(rest.sum()):,})"
+    if same_column:
+        result = pd.DataFrame({x_col: labels + [other_label]})
+    else:
+        result = pd.DataFrame({x_col: labels + [other_label], y_col: np.r_[values[top], np.nansum(values[rest])]})
+    result.attrs['source_rows'] = source_rows
+    result.attrs['category_reduction'] = {
+        'jumlah_kategori': int(len(values)),
+        'ditampilkan': int(keep),
+        'digabung': int(rest.sum()),
+        'label_lainnya': other_label,
+    }
+    return result
+
+
+# Fungsi untuk menentukan mode render scatter: 'svg', 'webgl', atau 'density'
+def scatter_render_mode(df, x_col, y_col):
+    numeric = pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col])
+    if len(df) > SCATTER_DENSITY_THRESHOLD and numeric:
+        return 'density'
+    if len(df) > SCATTER_WEBGL_THRESHOLD:
+        return 'webgl'
+    return 'svg'
+
+
+# Fungsi untuk mengelompokkan titik scatter ke bin persegi 2D (rata-rata posisi, jumlah titik, dan total ukuran per bin)
+def bin_scatter(df, x_col, y_col, size_col=None, bins=None):
+    bins = SCATTER_DENSITY_BINS if bins is None else bins
+    columns = [x_col, y_col] + ([size_col] if size_col and size_col not in (x_col, y_col) else [])
+    data = df[columns].dropna()
+    x = data[x_col].to_numpy(dtype=float)
+    y = data[y_col].to_numpy(dtype=float)
+    x_bin = np.clip(((x - x.min()) / ((x.max() - x.min()) or 1) * bins).astype(np.int64), 0, bins - 1)
+    y_bin = np.clip(((y - y.min()) / ((y.max() - y.min()) or 1) * bins).astype(np.int64), 0, bins - 1)
+    frame = pd.DataFrame({'x_bin': x_bin, 'y_bin': y_bin, 'x': x, 'y': y})
+    named = {x_col: ('x', 'mean'), y_col: ('y', 'mean'), 'Jumlah Titik': ('x', 'size')}
+    if size_col:
+        frame['size'] = data[size_col].to_numpy(dtype=float)
+        named[f'Total {size_col}'] = ('size', 'sum')
+    return frame.groupby(['x_bin', 'y_bin'], sort=False).agg(**named).reset_index(drop=True)
+
+
+# Fungsi untuk membuat Scatter Plot / Bubble Chart yang tetap interaktif berapa pun jumlah barisnya
+def scatter_figure(df, x_col, y_col, size_col=None, **px_kwargs):
+    mode = scatter_render_mode(df, x_col, y_col)
+    if mode != 'density':
+        if mode == 'webgl':
+            px_kwargs['render_mode'] = 'webgl'
+        if size_col is not None:
+            px_kwargs['size'] = size_col
+        return px.scatter(df, x=x_col, y=y_col, **px_kwargs)
+
+    title = px_kwargs.get('title')
+    if size_col is None:
+        # Scatter Plot: heatmap kepadatan yang dihitung di server
+        data = df[[x_col, y_col]].dropna()
+        counts, x_edges, y_edges = np.histogram2d(data[x_col], data[y_col], bins=SCATTER_DENSITY_BINS)
+        fig = go.Figure(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=np.where(counts.T > 0, counts.T, np.nan),
+            colorscale='Blues',
+            colorbar=dict(title='Jumlah Titik'),
+        ))
+        fig.update_layout(title=title, xaxis_title=x_col, yaxis_title=y_col)
+        return fig
+
+    # Bubble Chart: satu gelembung per bin dengan ukuran hasil agregasi
+    binned = bin_scatter(df, x_col, y_col, size_col)
+    return px.scatter(
+        binned, x=x_col, y=y_col, size=f'Total {size_col}', color='Jumlah Titik',
+        render_mode='webgl', title=title,
+        color_discrete_sequence=px_kwargs.get('color_discrete_sequence'),
+    )
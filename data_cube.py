@@ -0,0 +1,199 @@
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+# Dimensi bawaan untuk data berbentuk modified_data.csv
+DEFAULT_DIMENSIONS = [
+    'Order Year', 'Order Month', 'Order Day', 'Region', 'Segment',
+    'Category', 'Sub-Category', 'Ship Mode'
+]
+
+# Kolom di luar dimensi bawaan hanya dijadikan cuboid baru jika rasio nilai unik per baris di bawah ambang ini
+# (ambang yang sama dengan konversi categorical di ingest); kolom hampir unik (Order ID, Product Name)
+# dan kolom float dijawab langsung dari data per baris
+DIMENSION_MAX_UNIQUE_RATIO = 0.5
+
+# Jumlah hasil query yang disimpan per cube (LRU)
+CUBE_RESULTS_MAX_ENTRIES = int(os.getenv('CUBE_RESULTS_MAX_ENTRIES', '128'))
+
+# Hierarki dimensi untuk roll-up dan drill-down
+HIERARCHIES = {
+    'waktu': ['Order Year', 'Order Month', 'Order Day'],
+    'produk': ['Category', 'Sub-Category'],
+}
+
+
+# Cube agregat (sum dan count per measure) yang dibangun sekali per dataset.
+# Cuboid yang lebih halus dipakai untuk menjawab query yang lebih kasar (roll-up),
+# sehingga query tidak perlu memindai ulang baris mentah.
+class DataCube:
+    def __init__(self, df, dimensions=None, measures=None):
+        self._df = df
+        self._configure(df, dimensions, measures)
+        for dims in self._base_dim_sets():
+            self._build_cuboid(dims)
+
+    # Membangun cube secara bertahap dari potongan DataFrame (misal pd.read_csv(chunksize=...)).
+    # Sum dan count setiap potongan dijumlahkan sehingga data mentah tidak pernah dimuat utuh;
+    # cube hasilnya hanya menjawab query yang tercakup oleh cuboid dasar.
+    @classmethod
+    def from_chunks(cls, chunks, dimensions=None, measures=None, compact_every=16):
+        cube = cls.__new__(cls)
+        cube._df = None
+        partials = None
+        for chunk in chunks:
+            if partials is None:
+                cube._configure(chunk, dimensions, measures)
+                partials = {tuple(dims): [] for dims in cube._base_dim_sets()}
+            # Nilai non-numerik di potongan berikutnya tidak boleh merusak penjumlahan
+            chunk = chunk.assign(**{measure: pd.to_numeric(chunk[measure], errors='coerce') for measure in cube.measures})
+            for dims, parts in partials.items():
+                parts.append(_aggregate_cuboid(chunk, list(dims), cube.measures))
+                if len(parts) >= compact_every:
+                    parts[:] = [_merge_cuboids(parts, dims)]
+        if partials is None:
+            raise ValueError("Data kosong: tidak ada baris yang dibaca")
+        for dims, parts in partials.items():
+            cube._cuboids[dims] = _merge_cuboids(parts, dims)
+        return cube
+
+    def _configure(self, df, dimensions, measures):
+        dimensions = DEFAULT_DIMENSIONS if dimensions is None else dimensions
+        self.dimensions = [dim for dim in dimensions if dim in df.columns]
+        if measures is None:
+            measures = [
+                column for column in df.select_dtypes('number').columns
+                if column not in self.dimensions
+            ]
+        self.measures = list(measures)
+        self._cuboids = {}
+        self._results = OrderedDict()
+        self._lazy_dimensions = {}
+
+    # Cuboid dasar: jalur hierarki lengkap dan setiap dimensi di luar hierarki
+    def _base_dim_sets(self):
+        dim_sets = []
+        in_hierarchy = set()
+        for levels in HIERARCHIES.values():
+            path = [level for level in levels if level in self.dimensions]
+            in_hierarchy.update(path)
+            if path:
+                dim_sets.append(path)
+        for dim in self.dimensions:
+            if dim not in in_hierarchy:
+                dim_sets.append([dim])
+        return dim_sets
+
+    # Mengecek apakah query dapat dijawab dari cube
+    def supports(self, group_by, measure):
+        if measure not in self.measures:
+            return False
+        if self._df is None:
+            # Cube hasil streaming tidak bisa membangun cuboid baru dari data mentah
+            return any(set(group_by) <= set(dims) for dims in self._cuboids)
+        return all(dim in self.dimensions or self._is_lazy_dimension(dim) for dim in group_by)
+
+    # Mengecek apakah kolom di luar dimensi bawaan cukup ringkas untuk dijadikan cuboid baru
+    def _is_lazy_dimension(self, dim):
+        if dim not in self._lazy_dimensions:
+            column = self._df[dim] if dim in self._df.columns else None
+            self._lazy_dimensions[dim] = (
+                column is not None and len(column) > 0 and not pd.api.types.is_float_dtype(column)
+                and column.nunique(dropna=True) / len(column) <= DIMENSION_MAX_UNIQUE_RATIO
+            )
+        return self._lazy_dimensions[dim]
+
+    # Daftar nilai unik sebuah dimensi (misal tahun yang tersedia) tanpa memindai data mentah
+    def members(self, dim):
+        cuboid = self._source_cuboid([dim])
+        return cuboid[dim].drop_duplicates().sort_values().tolist()
+
+    # Query agregat: group_by berupa list dimensi, agg salah satu 'sum', 'count', atau 'mean',
+    # filters berupa dict {dimensi: nilai atau list nilai}
+    def query(self, group_by, measure, agg='sum', filters=None):
+        group_by = list(group_by)
+        filters = filters or {}
+        result_key = (tuple(group_by), measure, agg, tuple(sorted((dim, _freeze(value)) for dim, value in filters.items())))
+        if result_key in self._results:
+            self._results.move_to_end(result_key)
+            return self._results[result_key].copy()
+
+        needed = group_by + [dim for dim in filters if dim not in group_by]
+        source = self._source_cuboid(needed)
+        for dim, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                source = source[source[dim].isin(list(value))]
+            else:
+                source = source[source[dim] == value]
+
+        columns = [f'{measure}|sum', f'{measure}|count']
+        if group_by:
+            grouped = source.groupby(group_by, sort=True, observed=True)[columns].sum().reset_index()
+        else:
+            grouped = source[columns].sum().to_frame().T
+        if agg == 'sum':
+            grouped[measure] = grouped[columns[0]]
+        elif agg == 'count':
+            grouped[measure] = grouped[columns[1]]
+        elif agg == 'mean':
+            grouped[measure] = grouped[columns[0]] / grouped[columns[1]].where(grouped[columns[1]] != 0)
+        else:
+            raise ValueError(f"Agregasi tidak didukung: {agg}")
+        result = grouped[group_by + [measure]].reset_index(drop=True)
+        self._results[result_key] = result
+        while len(self._results) > CUBE_RESULTS_MAX_ENTRIES:
+            self._results.popitem(last=False)
+        return result.copy()
+
+    # Roll-up: agregat pada level tertentu dari sebuah hierarki (misal 'waktu' sampai 'Order Year')
+    def roll_up(self, hierarchy, level, measure, agg='sum', filters=None):
+        levels = HIERARCHIES[hierarchy]
+        return self.query(levels[:levels.index(level) + 1], measure, agg, filters)
+
+    # Drill-down: turun satu level di bawah jalur yang dipilih (misal [2016] -> bulan di tahun 2016)
+    def drill_down(self, hierarchy, path, measure, agg='sum'):
+        levels = HIERARCHIES[hierarchy]
+        if len(path) >= len(levels):
+            raise ValueError("Jalur sudah berada di level terbawah hierarki")
+        filters = dict(zip(levels, path))
+        return self.query([levels[len(path)]], measure, agg, filters)
+
+    def _source_cuboid(self, needed):
+        needed_set = set(needed)
+        candidates = [cuboid for dims, cuboid in self._cuboids.items() if needed_set <= set(dims)]
+        if candidates:
+            return min(candidates, key=len)
+        if self._df is None:
+            raise ValueError(f"Kombinasi dimensi {needed} membutuhkan data per baris")
+        return self._build_cuboid(needed)
+
+    def _build_cuboid(self, dims):
+        dims = list(dims)
+        cuboid = _aggregate_cuboid(self._df, dims, self.measures)
+        self._cuboids[tuple(dims)] = cuboid
+        return cuboid
+
+
+# Fungsi untuk menghitung sum dan count setiap measure per kombinasi dimensi
+def _aggregate_cuboid(df, dims, measures):
+    grouped = df.groupby(dims, sort=True, observed=True)[measures]
+    sums = grouped.sum()
+    counts = grouped.count()
+    return pd.concat(
+        [sums.add_suffix('|sum'), counts.add_suffix('|count')], axis=1
+    ).reset_index()
+
+
+# Fungsi untuk menggabungkan cuboid parsial (sum dan count bersifat aditif)
+def _merge_cuboids(parts, dims):
+    if len(parts) == 1:
+        return parts[0]
+    return pd.concat(parts, ignore_index=True).groupby(list(dims), sort=True, observed=True).sum().reset_index()
+
+
+# Fungsi untuk membuat nilai filter dapat dipakai sebagai kunci dict
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(value, key=str))
+    return value
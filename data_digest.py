@@ -0,0 +1,107 @@
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Anggaran token default untuk data yang dimasukkan ke prompt
+DIGEST_TOKEN_BUDGET = int(os.getenv('DIGEST_TOKEN_BUDGET', '1500'))
+
+# Rata-rata jumlah karakter per token untuk estimasi kasar (tanpa tokenizer)
+CHARS_PER_TOKEN = 4
+
+
+# Fungsi untuk memperkirakan jumlah token dari sebuah teks
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# Fungsi untuk mengubah tabel menjadi CSV ringkas
+def _table_text(table, decimals=2):
+    return table.round(decimals).to_csv(index=False).strip()
+
+
+# Fungsi untuk memotong tabel agar muat dalam sisa anggaran token
+def _fit_table(title, table, remaining_tokens, decimals=2):
+    text = f"{title}:\n{_table_text(table, decimals)}"
+    if estimate_tokens(text) <= remaining_tokens:
+        return text
+    # Perkiraan jumlah baris yang muat berdasarkan panjang rata-rata satu baris
+    average_row_tokens = max(1, estimate_tokens(text) / (len(table) + 1))
+    rows = int(remaining_tokens / average_row_tokens) - 2
+    while rows > 0:
+        text = f"{title} ({rows} baris teratas dari {len(table)}):\n{_table_text(table.head(rows), decimals)}"
+        if estimate_tokens(text) <= remaining_tokens:
+            return text
+        rows = int(rows * 0.8)
+    return None
+
+
+# Fungsi untuk membuat ringkasan data yang muat dalam anggaran token:
+# seluruh baris jika kecil, selain itu tabel agregat, statistik, top/bottom-k, dan sampel baris
+def build_data_digest(df, token_budget=None, group_cols=None, value_cols=None,
+                      top_k=5, sample_size=10, sort_by_value=True, random_state=0):
+    token_budget = DIGEST_TOKEN_BUDGET if token_budget is None else token_budget
+    # Setiap baris CSV minimal satu karakter per kolom (pemisah dan akhir baris), sehingga
+    # baris x kolom adalah batas bawah panjangnya; CSV penuh hanya dirender jika batas itu masih muat
+    if len(df) * len(df.columns) <= token_budget * CHARS_PER_TOKEN:
+        full_text = f"Data lengkap ({len(df)} baris, CSV):\n{df.to_csv(index=False).strip()}"
+        if estimate_tokens(full_text) <= token_budget:
+            return full_text
+    header = f"Jumlah baris: {len(df)}; kolom: {', '.join(str(column) for column in df.columns)}"
+
+    if isinstance(group_cols, str):
+        group_cols = [group_cols]
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
+    if not value_cols:
+        value_cols = df.select_dtypes('number').columns.tolist()
+    value_cols = [column for column in value_cols if column in df.columns and pd.api.types.is_numeric_dtype(df[column])]
+
+    sections = [header]
+    remaining = token_budget - estimate_tokens(header)
+
+    def add_section(title, table, decimals=2):
+        nonlocal remaining
+        if table is None or table.empty or remaining <= 0:
+            return
+        text = _fit_table(title, table, remaining, decimals)
+        if text is not None:
+            sections.append(text)
+            remaining -= estimate_tokens(text) + 1
+
+    if value_cols:
+        stats = df[value_cols].describe().T
+        stats['sum'] = df[value_cols].sum()
+        stats = stats.reset_index().rename(columns={'index': 'kolom'})
+        add_section("Statistik ringkas", stats)
+
+    if group_cols and value_cols:
+        aggregated = df.groupby(group_cols, sort=False, observed=True)[value_cols].sum().reset_index()
+        if sort_by_value:
+            aggregated = aggregated.sort_values(value_cols[0], ascending=False)
+        add_section(f"Tabel agregat (jumlah {', '.join(value_cols)} per {', '.join(group_cols)})", aggregated)
+
+    if value_cols and len(df) > top_k:
+        add_section(f"{top_k} baris dengan {value_cols[0]} tertinggi", df.nlargest(top_k, value_cols[0]))
+        add_section(f"{top_k} baris dengan {value_cols[0]} terendah", df.nsmallest(top_k, value_cols[0]))
+
+    if sample_size:
+        sample = df.sample(min(sample_size, len(df)), random_state=random_state)
+        add_section(f"Sampel acak {len(sample)} baris", sample)
+
+    return "\n\n".join(sections)
+
+
+# Fungsi untuk mengukur pengurangan ukuran data di prompt dibanding df.to_json penuh
+def digest_reduction(df, digest, duplicated_text=""):
+    original = df.to_json(orient="records", lines=True) + duplicated_text
+    return {
+        'original_chars': len(original),
+        'original_tokens': estimate_tokens(original),
+        'digest_chars': len(digest),
+        'digest_tokens': estimate_tokens(digest),
+        'reduction': 1 - len(digest) / len(original) if original else 0.0,
+    }
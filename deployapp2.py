@@ -1,64 +1,48 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os
-from streamlit_lottie import st_lottie
-import requests
-
-# Fungsi untuk memuat animasi Lottie
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-# Load environment variables
-load_dotenv()
+from narrative_cache import stream_chat_completion
+from lottie_cache import load_lottie
+# Klien Azure OpenAI bersama; impor openai ditunda sampai narasi pertama diminta
+# agar tidak memperlambat tampilan awal halaman
+from llm_client import LLMUnavailableError, get_client
 
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-# Fungsi untuk membaca file berdasarkan tipe
-def load_file(uploaded_file):
+# Fungsi untuk membaca file berdasarkan tipe, memakai cache hasil parsing berdasarkan hash isi file
+def load_file(uploaded_file, sheet_name=0):
     if uploaded_file is not None:
-        file_extension = uploaded_file.name.split('.')[-1]
-        if file_extension == 'csv':
-            df = pd.read_csv(uploaded_file)
-        elif file_extension in ['xls', 'xlsx']:
-            df = pd.read_excel(uploaded_file)
-        elif file_extension == 'json':
-            df = pd.read_json(uploaded_file)
-        else:
+        if upload_extension(uploaded_file.name) not in SUPPORTED_EXTENSIONS:
             st.error("Unsupported file format")
             return None
-        return df
+        return read_upload(uploaded_file, sheet_name=sheet_name)
     return None
 
-# Fungsi untuk membuat grafik
-def create_charts(chart_type, data_frame, x_col, y_col):
+# Fungsi untuk membaca CSV besar per potongan dengan progress; hasilnya (cube, preview, jumlah baris)
+# disimpan per upload sehingga rerun tidak membaca ulang file
+def load_file_streaming(uploaded_file):
+    dataset_id = getattr(uploaded_file, 'file_id', uploaded_file.name)
+    if st.session_state.get('stream_id') != dataset_id:
+        progress = st.sidebar.progress(0.0, text="Membaca data...")
+        st.session_state['stream_result'] = stream_csv(
+            uploaded_file, uploaded_file.size,
+            on_progress=lambda fraction, rows: progress.progress(fraction or 0.0, text=f"Membaca data... {rows:,} baris")
+        )
+        st.session_state['stream_id'] = dataset_id
+        progress.empty()
+    return st.session_state['stream_result']
+
+# Fungsi untuk membuat grafik; levels adalah tingkat aliran tambahan untuk Sankey Diagram
+def create_charts(chart_type, data_frame, x_col, y_col, x_range=None, levels=None):
     fig = None
     if chart_type == 'Line Chart':
-        fig = px.line(data_frame, x=x_col, y=y_col, title='Line Chart')
+        plot_data = downsample_frame(data_frame, x_col, y_col, x_range=x_range)
+        fig = px.line(plot_data, x=x_col, y=y_col, title='Line Chart')
     elif chart_type == 'Bar Chart':
-        fig = px.bar(data_frame, x=x_col, y=y_col, title='Bar Chart')
+        fig = px.bar(top_n_frame(data_frame, x_col, y_col), x=x_col, y=y_col, title='Bar Chart')
     elif chart_type == 'Pie Chart':
-        fig = px.pie(data_frame, names=x_col, values=y_col, title='Pie Chart')
+        fig = px.pie(top_n_frame(data_frame, x_col, y_col), names=x_col, values=y_col, title='Pie Chart')
     elif chart_type == 'Scatter Plot':
-        fig = px.scatter(data_frame, x=x_col, y=y_col, title='Scatter Plot')
+        fig = scatter_figure(data_frame, x_col, y_col, title='Scatter Plot')
     elif chart_type == 'Area Chart':
-        fig = px.area(data_frame, x=x_col, y=y_col, title='Area Chart')
+        plot_data = downsample_frame(data_frame, x_col, y_col, x_range=x_range)
+        fig = px.area(plot_data, x=x_col, y=y_col, title='Area Chart')
     elif chart_type == 'Stacked Bar Chart':
         fig = px.bar(data_frame, x=x_col, y=y_col, title='Stacked Bar Chart', barmode='stack')
     elif chart_type == 'Waterfall Chart':
@@ -73,9 +57,9 @@ def create_charts(chart_type, data_frame, x_col, y_col):
         ))
         fig.update_layout(title="Waterfall Chart")
     elif chart_type == 'Bubble Chart':
-        fig = px.scatter(data_frame, x=x_col, y=y_col, size=y_col, color=y_col, hover_name=x_col, title='Bubble Chart')
+        fig = scatter_figure(data_frame, x_col, y_col, size_col=y_col, color=y_col, hover_name=x_col, title='Bubble Chart')
     elif chart_type == 'Tree Map':
-        fig = px.treemap(data_frame, path=[x_col], values=y_col, title='Tree Map')
+        fig = px.treemap(top_n_frame(data_frame, x_col, y_col), path=[x_col], values=y_col, title='Tree Map')
     elif chart_type == 'Gauge Chart':
         fig = go.Figure(go.Indicator(
             mode="gauge+number+delta",
@@ -93,18 +77,23 @@ def create_charts(chart_type, data_frame, x_col, y_col):
                     'thickness': 0.75,
                     'value': data_frame[x_col].iloc[0]}}))
         fig.update_layout(title=f"{x_col} vs {y_col}")
+    elif chart_type == 'Sankey Diagram':
+        path, value_col = sankey_path(data_frame, x_col, y_col, levels)
+        fig = sankey_figure(data_frame, path, value_col, title='Sankey Diagram')
     else:
         st.error("Chart type not recognized.")
         return None
     return fig
 
-# Fungsi untuk menghasilkan narasi dari AI
-def generate_narrative(system_prompt, user_prompt):
+# Fungsi untuk menghasilkan narasi dari AI secara streaming (token demi token)
+def generate_narrative_stream(system_prompt, user_prompt, chart_type=None):
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
-    response = client.chat.completions.create(
+    return stream_chat_completion(
+        get_client(),
+        chart_type=chart_type,
         model="gpt-35-turbo",
         messages=messages,
         temperature=0.7,
@@ -114,7 +103,6 @@ def generate_narrative(system_prompt, user_prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
 # Gaya CSS untuk tampilan profesional dan custom button
 st.markdown("""
@@ -190,28 +178,55 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# URL animasi Lottie
-lottie_animation_url = "https://lottie.host/40eb321b-edf1-42f0-b982-a0c33c23b9ec/TbobicdLp3.json"
-lottie_animation = load_lottieurl(lottie_animation_url)
-
 # Judul aplikasi
 st.markdown('<div class="main-header">Mengubah Insight Dalam Grafik Menjadi Sebuah Narasi</div>', unsafe_allow_html=True)
 
+# URL animasi Lottie: diambil sekali per proses dengan timeout, lalu disimpan sebagai file lokal;
+# jika jaringan tidak tersedia dipakai animasi bawaan di assets/
+lottie_animation_url = "https://lottie.host/40eb321b-edf1-42f0-b982-a0c33c23b9ec/TbobicdLp3.json"
+lottie_animation = load_lottie(lottie_animation_url)
+
 # Menampilkan animasi Lottie di bawah judul
 if lottie_animation:
+    from streamlit_lottie import st_lottie
     st_lottie(lottie_animation, height=150, key="animation")
 
+# Modul pengolahan data dan grafik (pandas, plotly) diimpor setelah judul tampil sehingga
+# start dingin tidak menunda tampilan awal; pada rerun impor ini hanya mengambil dari sys.modules
+import plotly.express as px
+import plotly.graph_objects as go
+from ingest import SUPPORTED_EXTENSIONS, aggregate_chart_frame, excel_sheet_names, format_memory_report, read_upload, should_stream, stream_csv, upload_extension
+from chart_facts import extract_chart_facts, format_chart_facts
+from figure_cache import dataset_key, figure_cache, make_figure_key
+from chart_reduction import DOWNSAMPLED_CHART_TYPES, RENDER_POINT_BUDGET, TOP_N_CHART_TYPES, downsample_frame, scatter_figure, top_n_frame, zoomable_x_bounds
+from sankey import sankey_figure, sankey_path
+
 # Bagian sidebar untuk upload file
 st.sidebar.title("Upload File Anda Disini")
-uploaded_file = st.sidebar.file_uploader("Pilih File", type=["csv", "xls", "xlsx", "json"])
+uploaded_file = st.sidebar.file_uploader("Pilih File", type=SUPPORTED_EXTENSIONS)
 
 # Jika tidak ada file yang diunggah, tampilkan pesan di sidebar
 if uploaded_file is None:
     st.sidebar.info("Please upload a file.")
 
-df = load_file(uploaded_file)
+# Workbook Excel: pilih sheet dari daftar nama sheet (isi sheet lain tidak diparse)
+sheet_name = 0
+if uploaded_file is not None and upload_extension(uploaded_file.name) in ['xls', 'xlsx']:
+    sheet_names = excel_sheet_names(uploaded_file)
+    if len(sheet_names) > 1:
+        sheet_name = st.sidebar.selectbox("Pilih Sheet", sheet_names)
+
+# CSV besar dibaca secara streaming: grafik agregat dijawab dari cube, data per baris dimuat saat dibutuhkan
+cube = None
+if uploaded_file is not None and should_stream(uploaded_file.size, upload_extension(uploaded_file.name)):
+    cube, df, row_count = load_file_streaming(uploaded_file)
+    st.sidebar.caption(f"Data dibaca secara bertahap: {row_count:,} baris")
+else:
+    df = load_file(uploaded_file, sheet_name)
 
 if df is not None:
+    if 'memory_report' in df.attrs:
+        st.sidebar.caption(format_memory_report(df.attrs['memory_report']))
     # Tampilkan data
     st.markdown('<div class="main-subheader">Tampilan Data</div>', unsafe_allow_html=True)
     st.write(df.head())
@@ -222,19 +237,51 @@ if df is not None:
     y_col = st.sidebar.selectbox("Masukkan Baris (Sumbu Y)", df.columns)
     chart_type = st.sidebar.selectbox(
         "Pilih Tipe Chart:",
-        options=["Line Chart", "Bar Chart", "Pie Chart", "Scatter Plot", "Area Chart", "Stacked Bar Chart", "Waterfall Chart", "Bubble Chart", "Tree Map", "Gauge Chart"]
+        options=["Line Chart", "Bar Chart", "Pie Chart", "Scatter Plot", "Area Chart", "Stacked Bar Chart", "Waterfall Chart", "Bubble Chart", "Tree Map", "Gauge Chart", "Sankey Diagram"]
     )
+    # Sankey: aliran dari kolom sumbu X melalui tingkat tambahan (misal City -> Category -> Sub-Category);
+    # sumbu Y numerik menjadi nilai aliran, sumbu Y kategori menjadi tingkat terakhir
+    sankey_levels = []
+    if chart_type == 'Sankey Diagram':
+        sankey_levels = st.sidebar.multiselect(
+            "Tingkat Aliran Berikutnya", [column for column in df.columns if column not in (x_col, y_col)]
+        )
 
     # Tombol hasilkan chart dengan style custom
     generate_chart = st.sidebar.button("Hasilkan Chart", key="generate_chart")
     if generate_chart:
         with st.spinner("Membuat Chart..."):
-            fig = create_charts(chart_type, df, x_col, y_col)
+            chart_data = aggregate_chart_frame(cube, chart_type, x_col, y_col, sankey_levels)
+            if chart_data is None and cube is not None:
+                df = load_file(uploaded_file)
+            chart_frame = df if chart_data is None else chart_data
+            # Figure untuk spesifikasi yang sama diambil dari cache (juga dari sesi lain)
+            figure_key = make_figure_key(dataset=dataset_key(chart_frame), chart_type=chart_type, x_col=x_col, y_col=y_col,
+                                         levels=sankey_levels)
+            fig = figure_cache.get_or_build(
+                figure_key, lambda: create_charts(chart_type, chart_frame, x_col, y_col, levels=sankey_levels), chart_type
+            )
             st.session_state['fig'] = fig
+            st.session_state['chart_spec'] = (chart_type, x_col, y_col)
 
     if 'fig' in st.session_state:
         st.markdown('<div class="main-subheader">Tampilkan Grafik</div>', unsafe_allow_html=True)
         fig = st.session_state['fig']
+        # Zoom pada grafik yang di-downsample: rentang yang dipilih diambil ulang dari data asli
+        chart_spec = st.session_state.get('chart_spec')
+        if cube is not None and chart_spec and chart_spec[0] in DOWNSAMPLED_CHART_TYPES:
+            # Data per baris sudah dimuat saat grafik dibuat, sehingga diambil dari cache upload
+            df = load_file(uploaded_file)
+        if chart_spec and chart_spec[0] in DOWNSAMPLED_CHART_TYPES and chart_spec[1] in df.columns and len(df) > RENDER_POINT_BUDGET:
+            x_bounds = zoomable_x_bounds(df, chart_spec[1])
+            if x_bounds is not None and x_bounds[0] < x_bounds[1]:
+                x_range = st.slider("Rentang sumbu X (zoom)", min_value=x_bounds[0], max_value=x_bounds[1], value=x_bounds, key=f"x_zoom_{chart_spec[1]}_{len(df)}")
+                if tuple(x_range) != tuple(x_bounds):
+                    figure_key = make_figure_key(dataset=dataset_key(df), chart_type=chart_spec[0], x_col=chart_spec[1],
+                                                 y_col=chart_spec[2], x_range=x_range)
+                    fig = figure_cache.get_or_build(
+                        figure_key, lambda: create_charts(chart_spec[0], df, chart_spec[1], chart_spec[2], x_range=x_range), chart_spec[0]
+                    )
         if isinstance(fig, go.Figure):
             st.plotly_chart(fig)
         else:
@@ -248,20 +295,43 @@ if df is not None:
     generate_insight = st.button("Hasilkan Insight", key="generate_insight")
     if generate_insight:
         if user_prompt_content:
-            with st.spinner("Membuat Insight..."):
-                variable_A = df[x_col].tolist()
-                variable_B = df[y_col].tolist()
-                system_prompt = f'''
-                Kamu adalah storyteller AI yang bertugas untuk menganalisis dan menginterpretasikan visualisasi data. 
-                Data yang akan kamu analisis memiliki kolom {x_col} sebagai sumbu x dan {y_col} sebagai sumbu y. 
-                Grafik yang digunakan untuk visualisasi adalah "{chart_type}". Tugas kamu adalah untuk mengubah informasi kompleks dari grafik 
-                menjadi narasi yang jelas dan mudah dipahami, seperti yang ditemukan dalam infografis, sehingga dapat dengan mudah 
-                dipahami oleh orang yang tidak memiliki latar belakang teknis.
-                '''
-                full_prompt = system_prompt + user_prompt_content
-                insight = generate_narrative(system_prompt, user_prompt_content)
+            # Error layanan AI ditangani sama, baik saat menyiapkan prompt dan klien, sebelum token pertama,
+            # maupun di tengah stream; narasi yang sudah tampil dibiarkan di halaman
+            try:
+                # Spinner ditampilkan selama fakta dan prompt disusun, sampai token pertama diterima
+                with st.spinner("Membuat Insight..."):
+                    # Fakta ringkas grafik dihitung dari seluruh data; ukurannya tetap berapa pun jumlah barisnya
+                    facts_data = aggregate_chart_frame(cube, chart_type, x_col, y_col, sankey_levels)
+                    if facts_data is None and cube is not None:
+                        df = load_file(uploaded_file)
+                    facts_frame = df if facts_data is None else facts_data
+                    # Grafik kategori: fakta dihitung dari tabel top-N + Other yang sama dengan grafik
+                    if chart_type in TOP_N_CHART_TYPES:
+                        facts_frame = top_n_frame(facts_frame, x_col, y_col)
+                    facts = extract_chart_facts(facts_frame, chart_type, x_col, y_col, levels=sankey_levels)
+                    if facts_data is not None:
+                        facts['jumlah_baris'] = row_count
+                    chart_facts = format_chart_facts(facts)
+                    system_prompt = f'''
+                    Kamu adalah storyteller AI yang bertugas untuk menganalisis dan menginterpretasikan visualisasi data. 
+                    Data yang akan kamu analisis memiliki kolom {x_col} sebagai sumbu x dan {y_col} sebagai sumbu y. 
+                    Fakta utama yang dihitung dari seluruh data grafik: {chart_facts}. 
+                    Grafik yang digunakan untuk visualisasi adalah "{chart_type}". Tugas kamu adalah untuk mengubah informasi kompleks dari grafik 
+                    menjadi narasi yang jelas dan mudah dipahami, seperti yang ditemukan dalam infografis, sehingga dapat dengan mudah 
+                    dipahami oleh orang yang tidak memiliki latar belakang teknis.
+                    '''
+                    insight_stream = generate_narrative_stream(system_prompt, user_prompt_content, chart_type)
+                    insight = next(insight_stream, '')
                 st.markdown('<div class="main-subheader">Insight dari AI:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="narrative-container">{insight}</div>', unsafe_allow_html=True)
+                narrative_placeholder = st.empty()
+                narrative_placeholder.markdown(f'<div class="narrative-container">{insight}</div>', unsafe_allow_html=True)
+                for token in insight_stream:
+                    insight += token
+                    narrative_placeholder.markdown(f'<div class="narrative-container">{insight}</div>', unsafe_allow_html=True)
+            except LLMUnavailableError as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error(f"Gagal menghasilkan insight: {str(e)}")
         else:
             st.error("Please enter a prompt for the AI.")
 else:
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Konfigurasi cache figure dari variabel lingkungan
+FIGURE_CACHE_MAX_ENTRIES = int(os.getenv('FIGURE_CACHE_MAX_ENTRIES', '64'))
+FIGURE_CACHE_MAX_MB = float(os.getenv('FIGURE_CACHE_MAX_MB', '256'))
+
+
+# Fungsi untuk mendapatkan sidik jari dataset: hash isi upload jika tersedia (df.attrs['dataset_key']),
+# selain itu hash isi DataFrame (untuk data kecil seperti hasil agregat cube)
+def dataset_key(df):
+    key = df.attrs.get('dataset_key')
+    if key:
+        return key
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(json.dumps([[str(name), str(dtype)] for name, dtype in df.dtypes.items()]).encode('utf-8'))
+    hasher.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+# Fungsi untuk membuat kunci cache figure dari spesifikasi grafik (dataset, jenis, kolom, tahun, tema, zoom, ...)
+def make_figure_key(**spec):
+    payload = json.dumps(spec, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Cache figure Plotly dalam bentuk JSON terserialisasi, dibagi antar sesi dalam satu proses server,
+# dengan eviksi LRU berdasarkan jumlah entri dan total ukuran
+class FigureCache:
+    def __init__(self, max_entries=FIGURE_CACHE_MAX_ENTRIES, max_mb=FIGURE_CACHE_MAX_MB):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # Mengambil figure baru hasil deserialisasi (aman diubah tanpa memengaruhi entri cache).
+    # JSON berasal dari figure yang sudah tervalidasi, jadi validasi properti Plotly dilewati.
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return go.Figure(json.loads(payload), _validate=False)
+
+    def put(self, key, fig):
+        payload = fig.to_json()
+        nbytes = len(payload)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old)
+            # Figure yang lebih besar dari batas cache tidak disimpan
+            if nbytes > self.max_bytes:
+                return fig
+            self._entries[key] = payload
+            self._total_bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+        return fig
+
+    # Mengambil figure dari cache atau membangunnya lalu menyimpan hasilnya;
+    # waktu build dan deserialisasi dicatat per jenis grafik
+    def get_or_build(self, key, build, chart_type=None):
+        started = time.perf_counter()
+        fig = self.get(key)
+        if fig is not None:
+            self._record(chart_type, 'load', time.perf_counter() - started)
+            return fig
+        started = time.perf_counter()
+        fig = build()
+        if fig is not None:
+            self._record(chart_type, 'build', time.perf_counter() - started)
+            self.put(key, fig)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        per_chart = {}
+        with self._lock:
+            for chart_type, kinds in self._timings.items():
+                per_chart[chart_type] = {}
+                for kind, (count, total) in kinds.items():
+                    per_chart[chart_type][f'{kind}_count'] = count
+                    per_chart[chart_type][f'{kind}_ms'] = total / count * 1000
+        return {
+            'entries': len(self._entries),
+            'bytes': self._total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'per_chart': per_chart,
+        }
+
+    def _record(self, chart_type, kind, seconds):
+        with self._lock:
+            count, total = self._timings.setdefault(chart_type, {}).get(kind, (0, 0.0))
+            self._timings[chart_type][kind] = (count + 1, total + seconds)
+
+
+# Instance cache bersama untuk seluruh sesi dalam satu proses server
+figure_cache = FigureCache()
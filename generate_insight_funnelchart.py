@@ -1,8 +1,9 @@
 import pandas as pd
 import json
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
+from data_digest import build_data_digest
 
 # Fungsi untuk menghasilkan narasi dari AI
 def generate_narrative(system_prompt, user_prompt):
@@ -10,7 +11,9 @@ def generate_narrative(system_prompt, user_prompt):
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
-    response = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='funnel',
         model="gpt-35-turbo",
         messages=messages,
         temperature=0.7,
@@ -20,32 +23,11 @@ def generate_narrative(system_prompt, user_prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
-# Load environment variables
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-def buat_insight_dari_grafik(file_path, stages_col, values_col, chart_title):
-    # Baca data dari file CSV
-    data = pd.read_csv(file_path)
-    
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Konversi data ke format JSON
-    data_json = df.to_json(orient="records", lines=True)
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def buat_prompt_dari_grafik(df, stages_col, values_col, chart_title):
+    # Ringkasan data sesuai anggaran token (data hanya dimasukkan sekali ke prompt)
+    data_json = build_data_digest(df, group_cols=[stages_col], value_cols=[values_col], sort_by_value=False)
 
     # Deskripsi chart dan kode Python untuk membuat chart
     chart_description = f"""
@@ -53,8 +35,9 @@ def buat_insight_dari_grafik(file_path, stages_col, values_col, chart_title):
 
     import plotly.graph_objects as go
 
-    stages = {df[stages_col].tolist()}
-    values = {df[values_col].tolist()}
+    # df adalah data penjualan di atas
+    stages = df['{stages_col}'].tolist()
+    values = df['{values_col}'].tolist()
 
     fig = go.Figure(go.Funnel(
         y = stages,
@@ -93,27 +76,40 @@ Buatlah narasi yang berisi analisis harus mencakup:
 - Berikan rekomendasi berdasarkan temuan.
 """
 
+    return system_prompt, user_prompt
+
+def buat_insight_dari_grafik(file_path, stages_col, values_col, chart_title):
+    # Baca data dari file CSV
+    data = pd.read_csv(file_path)
+    
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    system_prompt, user_prompt = buat_prompt_dari_grafik(df, stages_col, values_col, chart_title)
+
     # Menghasilkan narasi dari AI
     narrative = generate_narrative(system_prompt, user_prompt)
 
     return narrative
 
-# File CSV yang diunggah oleh pengguna
-data_file = r"C:\Users\IYOM\myenvir\funnel_chart_stages.csv"  # Ganti dengan path yang benar
+if __name__ == "__main__":
+    # File CSV yang diunggah oleh pengguna
+    data_file = r"C:\Users\IYOM\myenvir\funnel_chart_stages.csv"  # Ganti dengan path yang benar
 
-# Kolom yang ada di dataset pengguna
-stages_col = "Stages"  # Nama kolom untuk tahap funnel
-values_col = "Values"  # Nama kolom untuk nilai di setiap tahap
+    # Kolom yang ada di dataset pengguna
+    stages_col = "Stages"  # Nama kolom untuk tahap funnel
+    values_col = "Values"  # Nama kolom untuk nilai di setiap tahap
 
-# Judul grafik
-chart_title = "Funnel Chart: Proses Konversi Penjualan"  # Ganti dengan judul yang sesuai
+    # Judul grafik
+    chart_title = "Funnel Chart: Proses Konversi Penjualan"  # Ganti dengan judul yang sesuai
 
-# Hasilkan insight untuk data funnel chart
-insight_funnel = buat_insight_dari_grafik(data_file, stages_col, values_col, chart_title)
-print("Insight Funnel Chart:\n", insight_funnel)
+    # Hasilkan insight untuk data funnel chart
+    insight_funnel = buat_insight_dari_grafik(data_file, stages_col, values_col, chart_title)
+    print("Insight Funnel Chart:\n", insight_funnel)
 
-# Simpan output ke file teks
-output_file = os.path.join(os.path.dirname(data_file), "insight_output_funnel.txt")
-with open(output_file, "w") as file:
-    file.write("Insight Funnel Chart:\n")
-    file.write(insight_funnel)
+    # Simpan output ke file teks
+    output_file = os.path.join(os.path.dirname(data_file), "insight_output_funnel.txt")
+    with open(output_file, "w") as file:
+        file.write("Insight Funnel Chart:\n")
+        file.write(insight_funnel)
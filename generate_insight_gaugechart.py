@@ -1,8 +1,9 @@
 import pandas as pd
 import json
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
+from data_digest import build_data_digest
 
 # Fungsi untuk menghasilkan narasi dari AI
 def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
@@ -10,7 +11,9 @@ def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
         {"role": "system", "content": prompt_sistem},
         {"role": "user", "content": prompt_pengguna}
     ]
-    respons = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='gauge',
         model="gpt-35-turbo",
         messages=pesan,
         temperature=0.7,
@@ -20,32 +23,11 @@ def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
         presence_penalty=0,
         stop=None
     )
-    return respons.choices[0].message.content
 
-# Memuat variabel lingkungan
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-def menghasilkan_insight_dari_chart(file_path, kolom_total, kolom_target, judul_chart):
-    # Baca data dari file CSV
-    data = pd.read_csv(file_path)
-    
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Konversi data ke format JSON
-    data_json = df.to_json(orient="records", lines=True)
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def menghasilkan_prompt_dari_chart(df, kolom_total, kolom_target, judul_chart):
+    # Ringkasan data sesuai anggaran token (data hanya dimasukkan sekali ke prompt)
+    data_json = build_data_digest(df, value_cols=[kolom_total, kolom_target])
 
     # Deskripsi chart dan kode Python untuk membuat chart
     deskripsi_chart = f"""
@@ -53,8 +35,9 @@ def menghasilkan_insight_dari_chart(file_path, kolom_total, kolom_target, judul_
 
     import plotly.graph_objects as go
 
-    total = {df[kolom_total].iloc[0]}
-    target = {df[kolom_target].iloc[0]}
+    # df adalah data penjualan di atas
+    total = df['{kolom_total}'].iloc[0]
+    target = df['{kolom_target}'].iloc[0]
 
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
@@ -102,27 +85,40 @@ Buatlah narasi yang berisi analisis yang harus mencakup:
 - Rekomendasi strategi untuk mencapai atau melampaui target penjualan.
 """
 
+    return prompt_sistem, prompt_pengguna
+
+def menghasilkan_insight_dari_chart(file_path, kolom_total, kolom_target, judul_chart):
+    # Baca data dari file CSV
+    data = pd.read_csv(file_path)
+    
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    prompt_sistem, prompt_pengguna = menghasilkan_prompt_dari_chart(df, kolom_total, kolom_target, judul_chart)
+
     # Menghasilkan narasi dari AI
     narasi = menghasilkan_narasi(prompt_sistem, prompt_pengguna)
 
     return narasi
 
-# File CSV yang diunggah oleh pengguna
-file_data = r"C:\Users\IYOM\myenvir\df_gauge.csv"  # Ganti dengan path yang benar
+if __name__ == "__main__":
+    # File CSV yang diunggah oleh pengguna
+    file_data = r"C:\Users\IYOM\myenvir\df_gauge.csv"  # Ganti dengan path yang benar
 
-# Kolom yang ada di dataset pengguna
-kolom_total = "total_sales"  # Pilih kolom untuk nilai total / nilai yang telah dicapai
-kolom_target = "target_sales"  # Pilih kolom untuk nilai target 
+    # Kolom yang ada di dataset pengguna
+    kolom_total = "total_sales"  # Pilih kolom untuk nilai total / nilai yang telah dicapai
+    kolom_target = "target_sales"  # Pilih kolom untuk nilai target 
 
-# Judul grafik
-judul_chart = "Gauge Chart: Total Sales vs Target Sales"  # Ganti dengan judul yang sesuai
+    # Judul grafik
+    judul_chart = "Gauge Chart: Total Sales vs Target Sales"  # Ganti dengan judul yang sesuai
 
-# Hasilkan insight untuk data gauge chart
-insight_gauge = menghasilkan_insight_dari_chart(file_data, kolom_total, kolom_target, judul_chart)
-print("Insight Gauge Chart:\n", insight_gauge)
+    # Hasilkan insight untuk data gauge chart
+    insight_gauge = menghasilkan_insight_dari_chart(file_data, kolom_total, kolom_target, judul_chart)
+    print("Insight Gauge Chart:\n", insight_gauge)
 
-# Simpan output ke file teks
-output_file = os.path.join(os.path.dirname(file_data), "insight_output_gauge.txt")
-with open(output_file, "w") as file:
-    file.write("Insight Gauge Chart:\n")
-    file.write(insight_gauge)
+    # Simpan output ke file teks
+    output_file = os.path.join(os.path.dirname(file_data), "insight_output_gauge.txt")
+    with open(output_file, "w") as file:
+        file.write("Insight Gauge Chart:\n")
+        file.write(insight_gauge)
@@ -1,9 +1,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import json
-import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
 
 # Fungsi untuk menghasilkan narasi dari AI
 def generate_narrative(system_prompt, user_prompt):
@@ -11,7 +10,9 @@ def generate_narrative(system_prompt, user_prompt):
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
-    response = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='line',
         model="gpt-35-turbo",
         messages=messages,
         temperature=0.7,
@@ -21,39 +22,9 @@ def generate_narrative(system_prompt, user_prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
-# Load environment variables
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='line'):
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Buat plot dari data
-    plt.figure(figsize=(10, 6))
-    
-    if jenis_grafik == 'line':
-        plt.plot(df[label_x], df[label_y], marker='o', linestyle='-')
-    
-    plt.title(judul)
-    plt.xlabel(label_x)
-    plt.ylabel(label_y)
-    plt.grid(True)
-    plt.show()
-    
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def buat_prompt_dari_grafik(data, label_x, label_y, judul, jenis_grafik='line'):
     # Konversi data sumbu x dan y ke format JSON
     data_json = json.dumps({
         label_x: data[label_x],
@@ -78,21 +49,43 @@ def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='line')
     # Definisikan prompt pengguna (instruksi atau pertanyaan spesifik pengguna)
     prompt_pengguna = "Buatlah narasi insight dari data dan visualisasi di atas."
 
+    return sistem_prompt, prompt_pengguna
+
+def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='line'):
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    
+    # Buat plot dari data
+    plt.figure(figsize=(10, 6))
+    
+    if jenis_grafik == 'line':
+        plt.plot(df[label_x], df[label_y], marker='o', linestyle='-')
+    
+    plt.title(judul)
+    plt.xlabel(label_x)
+    plt.ylabel(label_y)
+    plt.grid(True)
+    plt.show()
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    sistem_prompt, prompt_pengguna = buat_prompt_dari_grafik(data, label_x, label_y, judul, jenis_grafik=jenis_grafik)
+
     # Menghasilkan narasi dari AI
     narasi = generate_narrative(sistem_prompt, prompt_pengguna)
 
     return narasi
 
-# Baca data dari file CSV
-data_file = "C:/Users/IYOM/myenvir/sales_by_year_line.csv"
-data = pd.read_csv(data_file)
+if __name__ == "__main__":
+    # Baca data dari file CSV
+    data_file = "C:/Users/IYOM/myenvir/sales_by_year_line.csv"
+    data = pd.read_csv(data_file)
 
-# Konversi data ke format yang sesuai
-data_dict = {
-    "Order Year": data["Order Year"].tolist(),
-    "Sales": data["Sales"].tolist()
-}
+    # Konversi data ke format yang sesuai
+    data_dict = {
+        "Order Year": data["Order Year"].tolist(),
+        "Sales": data["Sales"].tolist()
+    }
 
-# Hasilkan insight untuk grafik garis
-insight_garis = buat_insight_dari_grafik(data_dict, "Order Year", "Sales", "Penjualan Tahunan", jenis_grafik='line')
-print("Insight Grafik Garis:\n", insight_garis)
+    # Hasilkan insight untuk grafik garis
+    insight_garis = buat_insight_dari_grafik(data_dict, "Order Year", "Sales", "Penjualan Tahunan", jenis_grafik='line')
+    print("Insight Grafik Garis:\n", insight_garis)
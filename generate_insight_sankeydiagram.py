@@ -1,8 +1,9 @@
 import pandas as pd
 import json
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
+from data_digest import build_data_digest
 
 # Fungsi untuk menghasilkan narasi dari AI
 def generate_narrative(system_prompt, user_prompt):
@@ -10,7 +11,9 @@ def generate_narrative(system_prompt, user_prompt):
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
-    response = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='sankey',
         model="gpt-35-turbo",
         messages=messages,
         temperature=0.7,
@@ -20,45 +23,27 @@ def generate_narrative(system_prompt, user_prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
-# Load environment variables
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-def buat_insight_dari_grafik(file_path, sumbu_x, sumbu_y, nilai, judul):
-    # Baca data dari file CSV
-    data = pd.read_csv(file_path)
-    
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    #print("Dataframe:\n", df.head())  # Tambahkan pemeriksaan untuk melihat isi dataframe
-    
-    # Konversi data ke format JSON
-    data_json = df.to_json(orient="records", lines=True)
-    #print("Data JSON:\n", data_json)  # Tambahkan pemeriksaan untuk melihat data JSON
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def buat_prompt_dari_grafik(df, sumbu_x, sumbu_y, nilai, judul):
+    # Ringkasan data sesuai anggaran token (data hanya dimasukkan sekali ke prompt)
+    data_json = build_data_digest(df, group_cols=[sumbu_x, sumbu_y], value_cols=[nilai])
 
     # Deskripsi chart dan kode Python untuk membuat chart
     chart_description = f"""
     Berikut adalah kode Python untuk membuat diagram sankey:
 
+    import pandas as pd
     import plotly.graph_objects as go
 
-    labels = {df[sumbu_x].unique().tolist() + df[sumbu_y].unique().tolist()}
-    source = {df[sumbu_x].apply(lambda x: df[sumbu_x].unique().tolist().index(x)).tolist()}
-    target = {df[sumbu_y].apply(lambda x: df[sumbu_y].unique().tolist().index(x) + len(df[sumbu_x].unique().tolist())).tolist()}
-    value = {df[nilai].tolist()}
+    # df adalah data penjualan di atas; setiap link adalah total {nilai} per pasangan ({sumbu_x}, {sumbu_y})
+    links = df.groupby(['{sumbu_x}', '{sumbu_y}'], sort=False)['{nilai}'].sum().reset_index()
+    source_codes, source_labels = pd.factorize(links['{sumbu_x}'])
+    target_codes, target_labels = pd.factorize(links['{sumbu_y}'])
+    labels = source_labels.tolist() + target_labels.tolist()
+    source = source_codes.tolist()
+    target = (target_codes + len(source_labels)).tolist()
+    value = links['{nilai}'].tolist()
 
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -107,28 +92,42 @@ Berikan analisis harus mencakup:
 - Berikan rekomendasi berdasarkan temuan.
 """
 
+    return sistem_prompt, prompt_pengguna
+
+def buat_insight_dari_grafik(file_path, sumbu_x, sumbu_y, nilai, judul):
+    # Baca data dari file CSV
+    data = pd.read_csv(file_path)
+    
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    #print("Dataframe:\n", df.head())  # Tambahkan pemeriksaan untuk melihat isi dataframe
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    sistem_prompt, prompt_pengguna = buat_prompt_dari_grafik(df, sumbu_x, sumbu_y, nilai, judul)
+
     # Menghasilkan narasi dari AI
     narasi = generate_narrative(sistem_prompt, prompt_pengguna)
 
     return narasi
 
-# File CSV yang diunggah oleh pengguna
-data_file =  r"C:\Users\IYOM\myenvir\df_sankey.csv"  # Ganti dengan path yang benar
+if __name__ == "__main__":
+    # File CSV yang diunggah oleh pengguna
+    data_file =  r"C:\Users\IYOM\myenvir\df_sankey.csv"  # Ganti dengan path yang benar
 
-# Kolom yang ada di dataset pengguna
-sumbu_x = "city"  # Ganti dengan nama kolom yang sesuai di dataset Anda
-sumbu_y = "product_category"  # Ganti dengan nama kolom yang sesuai di dataset Anda
-nilai = "value"  # Ganti dengan nama kolom yang sesuai di dataset Anda
+    # Kolom yang ada di dataset pengguna
+    sumbu_x = "city"  # Ganti dengan nama kolom yang sesuai di dataset Anda
+    sumbu_y = "product_category"  # Ganti dengan nama kolom yang sesuai di dataset Anda
+    nilai = "value"  # Ganti dengan nama kolom yang sesuai di dataset Anda
 
-# Judul grafik
-judul_grafik = "Aliran Penjualan Produk Berdasarkan Kota dan Kategori" # Ganti dengan judul yang sesuai
+    # Judul grafik
+    judul_grafik = "Aliran Penjualan Produk Berdasarkan Kota dan Kategori" # Ganti dengan judul yang sesuai
 
-# Hasilkan insight untuk data penjualan
-insight_sankey = buat_insight_dari_grafik(data_file, sumbu_x, sumbu_y, nilai, judul_grafik)
-print("Insight Grafik Sankey:\n", insight_sankey)
+    # Hasilkan insight untuk data penjualan
+    insight_sankey = buat_insight_dari_grafik(data_file, sumbu_x, sumbu_y, nilai, judul_grafik)
+    print("Insight Grafik Sankey:\n", insight_sankey)
 
-# Simpan output ke file teks
-output_file = os.path.join(os.path.dirname(data_file), "insight_output_sankey.txt")
-with open(output_file, "w") as file:
-    file.write("Insight Grafik Sankey:\n")
-    file.write(insight_sankey)
+    # Simpan output ke file teks
+    output_file = os.path.join(os.path.dirname(data_file), "insight_output_sankey.txt")
+    with open(output_file, "w") as file:
+        file.write("Insight Grafik Sankey:\n")
+        file.write(insight_sankey)
@@ -2,8 +2,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import json
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
 
 # Fungsi untuk menghasilkan narasi dari AI
 def generate_narrative(system_prompt, user_prompt):
@@ -11,7 +11,9 @@ def generate_narrative(system_prompt, user_prompt):
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
-    response = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='scatter',
         model="gpt-35-turbo",
         messages=messages,
         temperature=0.7,
@@ -21,39 +23,9 @@ def generate_narrative(system_prompt, user_prompt):
         presence_penalty=0,
         stop=None
     )
-    return response.choices[0].message.content
 
-# Load environment variables
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='scatter'):
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Buat plot dari data
-    plt.figure(figsize=(10, 6))
-    
-    if jenis_grafik == 'scatter':
-        plt.scatter(df[label_x], df[label_y])
-    
-    plt.title(judul)
-    plt.xlabel(label_x)
-    plt.ylabel(label_y)
-    plt.grid(True)
-    plt.show()
-    
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def buat_prompt_dari_grafik(data, label_x, label_y, judul):
     # Konversi data sumbu x dan y ke format JSON
     data_json = json.dumps({
         label_x: data[label_x],
@@ -78,31 +50,53 @@ def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='scatte
     # Definisikan prompt pengguna (instruksi atau pertanyaan spesifik pengguna)
     prompt_pengguna = "Buatlah narasi insight dari data dan visualisasi di atas dengan bahasa yang mudah dipahami."
 
+    return sistem_prompt, prompt_pengguna
+
+def buat_insight_dari_grafik(data, label_x, label_y, judul, jenis_grafik='scatter'):
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    
+    # Buat plot dari data
+    plt.figure(figsize=(10, 6))
+    
+    if jenis_grafik == 'scatter':
+        plt.scatter(df[label_x], df[label_y])
+    
+    plt.title(judul)
+    plt.xlabel(label_x)
+    plt.ylabel(label_y)
+    plt.grid(True)
+    plt.show()
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    sistem_prompt, prompt_pengguna = buat_prompt_dari_grafik(data, label_x, label_y, judul)
+
     # Menghasilkan narasi dari AI
     narasi = generate_narrative(sistem_prompt, prompt_pengguna)
 
     return narasi
 
-# Baca data dari file CSV
-data_file = "C:/Users/IYOM/myenvir/df_scatterr.csv"
-data = pd.read_csv(data_file)
+if __name__ == "__main__":
+    # Baca data dari file CSV
+    data_file = "C:/Users/IYOM/myenvir/df_scatterr.csv"
+    data = pd.read_csv(data_file)
 
-# Tampilkan kolom untuk memastikan nama kolom yang benar
-print(data.columns)
+    # Tampilkan kolom untuk memastikan nama kolom yang benar
+    print(data.columns)
 
-# Konversi data ke format yang sesuai
-data_dict = {
-    "Sales": data["Sales"].tolist(),
-    "Profit": data["Profit"].tolist()
-}
+    # Konversi data ke format yang sesuai
+    data_dict = {
+        "Sales": data["Sales"].tolist(),
+        "Profit": data["Profit"].tolist()
+    }
 
-# Hasilkan insight untuk scatter plot
-judul_grafik = "Hubungan Antara Variable X dan Variable Y"
-insight_scatter = buat_insight_dari_grafik(data_dict, "Sales", "Profit", "Hubungan Sales dengan Profit", jenis_grafik='scatter')
-print("Insight Grafik Scatter:\n", insight_scatter)
+    # Hasilkan insight untuk scatter plot
+    judul_grafik = "Hubungan Antara Variable X dan Variable Y"
+    insight_scatter = buat_insight_dari_grafik(data_dict, "Sales", "Profit", "Hubungan Sales dengan Profit", jenis_grafik='scatter')
+    print("Insight Grafik Scatter:\n", insight_scatter)
 
-# Simpan output ke file teks
-output_file = os.path.join(os.path.dirname(data_file), "insight_output_scatter.txt")
-with open(output_file, "w") as file:
-    file.write("Insight Grafik Scatter:\n")
-    file.write(insight_scatter)
+    # Simpan output ke file teks
+    output_file = os.path.join(os.path.dirname(data_file), "insight_output_scatter.txt")
+    with open(output_file, "w") as file:
+        file.write("Insight Grafik Scatter:\n")
+        file.write(insight_scatter)
@@ -1,8 +1,9 @@
 import pandas as pd
 import json
 import os
-from dotenv import load_dotenv
-from openai import AzureOpenAI
+from llm_client import get_client
+from narrative_cache import cached_chat_completion
+from data_digest import build_data_digest
 
 # Fungsi untuk menghasilkan narasi dari AI
 def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
@@ -10,7 +11,9 @@ def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
         {"role": "system", "content": prompt_sistem},
         {"role": "user", "content": prompt_pengguna}
     ]
-    respons = client.chat.completions.create(
+    return cached_chat_completion(
+        get_client(),
+        chart_type='stacked_bar',
         model="gpt-35-turbo",
         messages=pesan,
         temperature=0.7,
@@ -20,33 +23,15 @@ def menghasilkan_narasi(prompt_sistem, prompt_pengguna):
         presence_penalty=0,
         stop=None
     )
-    return respons.choices[0].message.content
 
-# Memuat variabel lingkungan
-load_dotenv()
-
-# Konfigurasi untuk Azure OpenAI API dari file .env
-azure_endpoint = os.getenv('AZURE_ENDPOINT')
-api_key = os.getenv('API_KEY')
-api_version = os.getenv('API_VERSION')
-
-# Menginisialisasi klien Azure OpenAI
-client = AzureOpenAI(
-    azure_endpoint=azure_endpoint,
-    api_key=api_key,
-    api_version=api_version
-)
-
-# Fungsi untuk menghasilkan insight dari data chart
-def menghasilkan_insight_dari_chart(file_path, kolom_1, kolom_2, judul_chart):
-    # Baca data dari file CSV
-    data = pd.read_csv(file_path)
-    
-    # Konversi data ke Pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Konversi data ke format JSON
-    data_json = df.to_json(orient="records", lines=True)
+# Fungsi untuk menyusun prompt sistem dan prompt pengguna dari data grafik
+def menghasilkan_prompt_dari_chart(df, kolom_1, kolom_2, judul_chart):
+    # Ringkasan data sesuai anggaran token (data hanya dimasukkan sekali ke prompt)
+    data_json = build_data_digest(
+        df,
+        group_cols=['Category'] if 'Category' in df.columns else None,
+        value_cols=[kolom_1, kolom_2]
+    )
 
     # Deskripsi chart dan kode Python untuk membuat chart
     deskripsi_chart = f"""
@@ -109,27 +94,41 @@ Buatlah narasi yang berisi analisis yang harus mencakup:
 - Rekomendasi strategi untuk meningkatkan penjualan di kategori dengan penjualan terendah.
 """
 
+    return prompt_sistem, prompt_pengguna
+
+# Fungsi untuk menghasilkan insight dari data chart
+def menghasilkan_insight_dari_chart(file_path, kolom_1, kolom_2, judul_chart):
+    # Baca data dari file CSV
+    data = pd.read_csv(file_path)
+    
+    # Konversi data ke Pandas DataFrame
+    df = pd.DataFrame(data)
+    
+    # Menyusun prompt sistem dan prompt pengguna
+    prompt_sistem, prompt_pengguna = menghasilkan_prompt_dari_chart(df, kolom_1, kolom_2, judul_chart)
+
     # Menghasilkan narasi dari AI
     narasi = menghasilkan_narasi(prompt_sistem, prompt_pengguna)
 
     return narasi
 
-# Bagian ini harus diubah oleh pengguna sesuai dengan dataset mereka
-file_data = r"C:\Users\IYOM\myenvir\df_stackedbar.csv"  # Ganti dengan path yang benar ke file CSV pengguna
+if __name__ == "__main__":
+    # Bagian ini harus diubah oleh pengguna sesuai dengan dataset mereka
+    file_data = r"C:\Users\IYOM\myenvir\df_stackedbar.csv"  # Ganti dengan path yang benar ke file CSV pengguna
 
-# Kolom yang ada di dataset pengguna
-kolom_1 = "Sales B2B"  # Pilih kolom 1 untuk nilai total penjualan
-kolom_2 = "Sales B2C"  # Pilih kolom 2 untuk nilai total penjualan
+    # Kolom yang ada di dataset pengguna
+    kolom_1 = "Sales B2B"  # Pilih kolom 1 untuk nilai total penjualan
+    kolom_2 = "Sales B2C"  # Pilih kolom 2 untuk nilai total penjualan
 
-# Judul grafik
-judul_chart = "Annual Product Sales by Category and Business Model"  # Ganti dengan judul yang sesuai
+    # Judul grafik
+    judul_chart = "Annual Product Sales by Category and Business Model"  # Ganti dengan judul yang sesuai
 
-# Hasilkan insight untuk data stacked bar chart
-insight_chart = menghasilkan_insight_dari_chart(file_data, kolom_1, kolom_2, judul_chart)
-print("Insight Stacked Bar Chart:\n", insight_chart)
+    # Hasilkan insight untuk data stacked bar chart
+    insight_chart = menghasilkan_insight_dari_chart(file_data, kolom_1, kolom_2, judul_chart)
+    print("Insight Stacked Bar Chart:\n", insight_chart)
 
-# Simpan output ke file teks
-output_file = os.path.join(os.path.dirname(file_data), "insight_output_stacked_bar.txt")
-with open(output_file, "w") as file:
-    file.write("Insight Stacked Bar Chart:\n")
-    file.write(insight_chart)
+    # Simpan output ke file teks
+    output_file = os.path.join(os.path.dirname(file_data), "insight_output_stacked_bar.txt")
+    with open(output_file, "w") as file:
+        file.write("Insight Stacked Bar Chart:\n")
+        file.write(insight_chart)
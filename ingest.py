@@ -0,0 +1,272 @@
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from data_cube import DIMENSION_MAX_UNIQUE_RATIO, DataCube
+from upload_cache import ParsedFrameCache, make_cache_key, parsed_frame_cache
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Kolom teks dengan rasio nilai unik di bawah ambang ini diubah menjadi categorical
+CATEGORY_MAX_UNIQUE_RATIO = DIMENSION_MAX_UNIQUE_RATIO
+
+# Lebar minimum (byte) kolom integer hasil downcast
+INTEGER_MIN_BYTES = 4
+
+# Penanda nama kolom yang berisi tanggal
+DATE_COLUMN_HINTS = ('date', 'tanggal')
+
+# File CSV berukuran di atas ambang ini (MB) dibaca per potongan (streaming)
+STREAM_INGEST_MIN_MB = float(os.getenv('STREAM_INGEST_MIN_MB', '100'))
+
+# Jumlah baris per potongan saat ingest streaming
+STREAM_CHUNK_ROWS = int(os.getenv('STREAM_CHUNK_ROWS', '200000'))
+
+# pyarrow bersifat opsional: jika terpasang, CSV dibaca dengan pembaca Arrow multithread,
+# tipe data Arrow dipertahankan, dan upload Parquet/Feather (Arrow IPC) diterima
+ARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+ARROW_DTYPES = ARROW_AVAILABLE and os.getenv('ARROW_DTYPES', '1') != '0'
+
+# Mesin pembaca Excel: python-calamine (Rust) jika terpasang, jauh lebih cepat dari openpyxl
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') is not None else None
+
+# Direktori salinan kolumnar (Parquet) dari setiap sheet Excel yang sudah diparse
+EXCEL_CACHE_DIR = os.getenv(
+    'EXCEL_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'excel_sheets')
+)
+
+# Jumlah workbook yang daftar nama sheet-nya disimpan di memori
+EXCEL_SHEET_NAMES_MAX_ENTRIES = int(os.getenv('EXCEL_SHEET_NAMES_MAX_ENTRIES', '256'))
+
+# Ekstensi file upload yang didukung
+SUPPORTED_EXTENSIONS = ['csv', 'xls', 'xlsx', 'json'] + (['parquet', 'feather', 'arrow'] if ARROW_AVAILABLE else [])
+
+# Jenis grafik yang cukup digambar dari agregat per kategori (tanpa data per baris)
+AGGREGATE_CHART_TYPES = ['Bar Chart', 'Pie Chart', 'Tree Map', 'Sankey Diagram']
+
+
+# Fungsi untuk menghitung pemakaian memori DataFrame dalam MB
+def memory_usage_mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / (1024 * 1024)
+
+
+# Fungsi untuk mem-parsing kolom tanggal sekali saat ingest (hanya jika semua nilai berhasil diparse).
+# Kolom teks Arrow tetap menjadi kolom Arrow (timestamp) agar tipe data Arrow terjaga sampai grafik
+def _parse_date_column(column):
+    parsed = pd.to_datetime(column, errors='coerce')
+    if parsed.isna().sum() != column.isna().sum():
+        return None
+    if isinstance(column.dtype, pd.ArrowDtype):
+        return _to_arrow_timestamp(parsed)
+    return parsed
+
+
+# Fungsi untuk mengecek kolom tanggal Arrow (date32/date64) hasil pembaca CSV Arrow
+def _is_arrow_date(column):
+    return isinstance(column.dtype, pd.ArrowDtype) and str(column.dtype.pyarrow_dtype).startswith('date')
+
+
+# Fungsi untuk mengubah tanggal (Arrow date atau datetime64) menjadi timestamp Arrow agar min/max dan
+# konversi epoch berperilaku sama seperti datetime64
+def _to_arrow_timestamp(column):
+    import pyarrow as pa
+    return column.astype(pd.ArrowDtype(pa.timestamp('ns')))
+
+
+# Fungsi untuk mendapatkan dtype int32 dari keluarga dtype yang sama (numpy, nullable, atau Arrow)
+def _int32_dtype(dtype):
+    if isinstance(dtype, pd.ArrowDtype):
+        import pyarrow as pa
+        return pd.ArrowDtype(pa.int32())
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return 'Int32'
+    return 'int32'
+
+
+# Fungsi untuk menurunkan presisi kolom numerik selama tidak ada nilai yang berubah. Kolom float (measure)
+# tetap float64: nilai tunggalnya mungkin muat di float32, tetapi jumlah jutaan baris tidak.
+# Integer tidak diturunkan di bawah int32 karena int8/int16 mudah overflow saat dipakai dalam aritmetika
+# (misal tahun * 100 atau selisih dua nilai).
+def _downcast_numeric(column):
+    if pd.api.types.is_bool_dtype(column):
+        return column
+    if pd.api.types.is_integer_dtype(column) and column.dtype.itemsize > INTEGER_MIN_BYTES:
+        narrow = pd.to_numeric(column, downcast='integer')
+        if narrow.dtype.itemsize < INTEGER_MIN_BYTES:
+            narrow = column.astype(_int32_dtype(column.dtype))
+        return narrow
+    return column
+
+
+# Fungsi untuk mengoptimalkan tipe data saat ingest: teks berkardinalitas rendah menjadi categorical,
+# integer diturunkan presisinya tanpa kehilangan nilai, dan kolom tanggal diparse sekali.
+# Mengembalikan DataFrame baru beserta laporan memori sebelum/sesudah (juga disimpan di df.attrs).
+def optimize_dtypes(df, category_max_ratio=CATEGORY_MAX_UNIQUE_RATIO, parse_dates=True):
+    before_mb = memory_usage_mb(df)
+    optimized = {}
+    changes = {}
+    for name, column in df.items():
+        new_column = column
+        if _is_arrow_date(column):
+            new_column = _to_arrow_timestamp(column)
+        elif pd.api.types.is_numeric_dtype(column):
+            new_column = _downcast_numeric(column)
+        elif pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            parsed = None
+            if parse_dates and any(hint in str(name).lower() for hint in DATE_COLUMN_HINTS):
+                parsed = _parse_date_column(column)
+            if parsed is not None:
+                new_column = parsed
+            elif len(column) and column.nunique(dropna=True) / len(column) <= category_max_ratio:
+                new_column = column.astype('category')
+        if new_column.dtype != column.dtype:
+            changes[name] = (str(column.dtype), str(new_column.dtype))
+        optimized[name] = new_column
+    result = pd.DataFrame(optimized, index=df.index)
+    after_mb = memory_usage_mb(result)
+    report = {
+        'before_mb': before_mb,
+        'after_mb': after_mb,
+        'reduction': 1 - after_mb / before_mb if before_mb else 0.0,
+        'columns': changes,
+    }
+    result.attrs['memory_report'] = report
+    return result, report
+
+
+# Fungsi untuk menampilkan laporan memori secara ringkas
+def format_memory_report(report):
+    return (
+        f"Memori data: {report['before_mb']:.1f} MB -> {report['after_mb']:.1f} MB "
+        f"(hemat {report['reduction']:.0%}, {len(report['columns'])} kolom dioptimalkan)"
+    )
+
+
+# Fungsi untuk mengambil ekstensi (huruf kecil) dari nama file upload
+def upload_extension(file_name):
+    return file_name.split('.')[-1].lower()
+
+
+# Fungsi untuk mem-parsing upload langsung dari buffer di memori, tanpa menyalinnya ke disk
+# atau ke objek bytes baru, lalu mengoptimalkan tipe datanya
+def parse_upload(buffer, file_extension, sheet_name=0):
+    # Buffer bisa sudah dibaca sampai akhir (misal oleh ingest streaming)
+    buffer.seek(0)
+    # Tipe data Arrow dipertahankan dari parser sampai grafik
+    arrow_kwargs = {'dtype_backend': 'pyarrow'} if ARROW_DTYPES else {}
+    if file_extension == 'csv':
+        df = None
+        if ARROW_AVAILABLE:
+            try:
+                df = pd.read_csv(buffer, engine='pyarrow', **arrow_kwargs)
+            except Exception:
+                # CSV yang tidak bisa dibaca pembaca Arrow tetap dibaca parser bawaan pandas
+                buffer.seek(0)
+        if df is None:
+            df = pd.read_csv(buffer)
+    elif file_extension in ['xls', 'xlsx']:
+        df = pd.read_excel(buffer, sheet_name=sheet_name, engine=EXCEL_ENGINE, **arrow_kwargs)
+    elif file_extension == 'json':
+        df = pd.read_json(buffer)
+    elif file_extension == 'parquet':
+        df = pd.read_parquet(buffer, **arrow_kwargs)
+    elif file_extension in ['feather', 'arrow']:
+        df = pd.read_feather(buffer, **arrow_kwargs)
+    else:
+        return None
+    df, _ = optimize_dtypes(df)
+    return df
+
+
+# Fungsi untuk mendaftar nama sheet workbook tanpa mem-parsing isi sheet-nya. Daftar disimpan per hash isi
+# workbook (kunci yang sama dengan cache sheet) sehingga rerun dan pengguna lain tidak membuka workbook lagi.
+def excel_sheet_names(buffer):
+    cache_key = make_cache_key(buffer.getbuffer(), 'xlsx', sheet_names=True)
+    with _sheet_names_lock:
+        if cache_key in _sheet_names:
+            _sheet_names.move_to_end(cache_key)
+            return list(_sheet_names[cache_key])
+    buffer.seek(0)
+    with pd.ExcelFile(buffer, engine=EXCEL_ENGINE) as workbook:
+        names = list(workbook.sheet_names)
+    with _sheet_names_lock:
+        _sheet_names[cache_key] = names
+        while len(_sheet_names) > EXCEL_SHEET_NAMES_MAX_ENTRIES:
+            _sheet_names.popitem(last=False)
+    return list(names)
+
+
+# Fungsi untuk membaca upload (misal UploadedFile Streamlit) memakai cache hasil parsing berdasarkan
+# hash isi buffer; jalur yang sama dipakai app4 dan deployapp2.
+# Sheet Excel dikonversi sekali ke salinan kolumnar sehingga rerun dan pengguna lain tidak membuka workbook lagi.
+def read_upload(uploaded_file, file_name=None, sheet_name=0):
+    file_extension = upload_extension(file_name or uploaded_file.name)
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Format file tidak didukung: {file_extension}")
+    if file_extension in ['xls', 'xlsx']:
+        cache_key = make_cache_key(uploaded_file.getbuffer(), file_extension, optimize_dtypes=True,
+                                   arrow_dtypes=ARROW_DTYPES, sheet_name=sheet_name)
+        df = excel_sheet_cache.get_or_parse(cache_key, lambda: parse_upload(uploaded_file, file_extension, sheet_name))
+    else:
+        cache_key = make_cache_key(uploaded_file.getbuffer(), file_extension, optimize_dtypes=True, arrow_dtypes=ARROW_DTYPES)
+        df = parsed_frame_cache.get_or_parse(cache_key, lambda: parse_upload(uploaded_file, file_extension))
+    if df is not None:
+        # Sidik jari isi upload, dipakai cache lain (misal cache figure) tanpa meng-hash ulang data
+        df.attrs['dataset_key'] = cache_key
+    return df
+
+
+# Fungsi untuk menentukan apakah sebuah upload dibaca secara streaming
+def should_stream(size_bytes, file_extension='csv'):
+    return file_extension == 'csv' and size_bytes >= STREAM_INGEST_MIN_MB * 1024 * 1024
+
+
+# Fungsi untuk membaca CSV per potongan sambil memperbarui cube agregat secara bertahap.
+# on_progress(fraksi, jumlah_baris) dipanggil setelah setiap potongan; fraksi None jika ukuran tidak diketahui.
+# Mengembalikan (cube, preview beberapa baris pertama, jumlah baris).
+def stream_csv(source, total_bytes=None, chunk_rows=None, on_progress=None, preview_rows=5,
+               dimensions=None, measures=None):
+    chunk_rows = STREAM_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    state = {'rows': 0, 'preview': None}
+
+    def chunks():
+        for chunk in pd.read_csv(source, chunksize=chunk_rows):
+            if state['preview'] is None:
+                state['preview'] = chunk.head(preview_rows)
+            state['rows'] += len(chunk)
+            if on_progress is not None:
+                fraction = None
+                if total_bytes and hasattr(source, 'tell'):
+                    fraction = min(source.tell() / total_bytes, 1.0)
+                on_progress(fraction, state['rows'])
+            yield chunk
+
+    cube = DataCube.from_chunks(chunks(), dimensions, measures)
+    if hasattr(source, 'getbuffer'):
+        state['preview'].attrs['dataset_key'] = make_cache_key(source.getbuffer(), 'csv', streamed=True)
+    return cube, state['preview'], state['rows']
+
+
+# Fungsi untuk mengambil data grafik agregat dari cube; None berarti grafik membutuhkan data per baris.
+# levels adalah tingkat aliran tambahan setelah x_col (Sankey Diagram)
+def aggregate_chart_frame(cube, chart_type, x_col, y_col, levels=None):
+    group_by = [x_col] + list(levels or [])
+    if cube is not None and chart_type in AGGREGATE_CHART_TYPES and cube.supports(group_by, y_col):
+        return cube.query(group_by, y_col)
+    return None
+
+
+# Cache sheet Excel yang sudah dikonversi: di memori dan sebagai salinan Parquet di disk (butuh pyarrow)
+excel_sheet_cache = ParsedFrameCache(spill_dir=EXCEL_CACHE_DIR if ARROW_AVAILABLE else None)
+
+# Daftar nama sheet per isi workbook (LRU), dibagi antar sesi dalam satu proses server
+_sheet_names = OrderedDict()
+_sheet_names_lock = threading.Lock()
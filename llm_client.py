@@ -0,0 +1,243 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+import weakref
+
+from dotenv import load_dotenv
+
+from llm_scheduler import INTERACTIVE, estimate_prompt_tokens, estimate_request_tokens, request_scheduler
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Konfigurasi untuk Azure OpenAI API dari file .env
+azure_endpoint = os.getenv('AZURE_ENDPOINT')
+api_key = os.getenv('API_KEY')
+api_version = os.getenv('API_VERSION')
+
+# Batas waktu request (detik): total per request dan khusus untuk membuka koneksi
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+
+# Pool koneksi keep-alive yang dipakai bersama seluruh sesi dalam satu proses
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_MAX_KEEPALIVE = int(os.getenv('LLM_MAX_KEEPALIVE', '10'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+
+# Retry dengan exponential backoff + jitter; Retry-After dari server dipakai jika ada
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+LLM_RETRY_AFTER_MAX = float(os.getenv('LLM_RETRY_AFTER_MAX', '60'))
+
+# Status HTTP yang bersifat sementara dan aman untuk dicoba ulang
+RETRYABLE_STATUS = {408, 409, 429}
+
+# Klien sinkron tunggal per proses; klien asinkron per event loop karena koneksinya terikat ke loop
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+# Layanan AI tetap gagal setelah seluruh percobaan ulang (rate limit, timeout, atau gangguan server)
+class LLMUnavailableError(RuntimeError):
+    pass
+
+
+# Fungsi untuk mengambil modul HTTP yang dipakai SDK openai (httpx, atau httpx2 pada SDK versi baru)
+def _http_module():
+    try:
+        import httpx
+    except ImportError:
+        import httpx2 as httpx
+    return httpx
+
+
+# Fungsi untuk menyusun argumen klien Azure OpenAI. Retry bawaan SDK dimatikan karena
+# retry ditangani call_with_retries (agar backoff dan Retry-After konsisten di semua jalur).
+def _client_kwargs():
+    httpx = _http_module()
+    return {
+        'azure_endpoint': azure_endpoint,
+        'api_key': api_key,
+        'api_version': api_version,
+        'max_retries': 0,
+        'timeout': httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    }, httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+# Fungsi untuk mendapatkan klien Azure OpenAI bersama. Klien dibuat sekali per proses (bukan per
+# rerun Streamlit), sehingga koneksi TLS ke endpoint dipakai ulang antar narasi dan antar sesi.
+def get_client():
+    global _client
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            import openai
+            kwargs, limits = _client_kwargs()
+            _client = openai.AzureOpenAI(http_client=openai.DefaultHttpxClient(limits=limits), **kwargs)
+        return _client
+
+
+# Fungsi untuk mendapatkan klien AsyncAzureOpenAI bersama untuk event loop yang sedang berjalan
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            import openai
+            kwargs, limits = _client_kwargs()
+            client = openai.AsyncAzureOpenAI(http_client=openai.DefaultAsyncHttpxClient(limits=limits), **kwargs)
+            _async_clients[loop] = client
+        return client
+
+
+# Fungsi untuk membaca Retry-After (retry-after-ms, detik, atau tanggal HTTP) dari respons error
+def retry_after_seconds(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    retry_at = email.utils.parsedate_to_datetime(value) if email.utils.parsedate_tz(value) else None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# Fungsi untuk mengecek apakah error bersifat sementara: koneksi/timeout, 408, 409, 429, atau 5xx
+def is_retryable(error):
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+# Fungsi untuk menghitung jeda sebelum percobaan ke-(attempt + 1): Retry-After dari server jika ada,
+# selain itu exponential backoff dengan full jitter
+def backoff_delay(attempt, error=None, base=LLM_BACKOFF_BASE, maximum=LLM_BACKOFF_MAX):
+    retry_after = retry_after_seconds(error) if error is not None else None
+    if retry_after is not None:
+        return min(retry_after, LLM_RETRY_AFTER_MAX)
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+# Fungsi untuk memanggil func dengan retry untuk error sementara
+def call_with_retries(func, *args, max_retries=LLM_MAX_RETRIES, **kwargs):
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt >= max_retries:
+                raise LLMUnavailableError(_unavailable_message(e, attempt)) from e
+            delay = backoff_delay(attempt, e)
+            _throttle(e, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+# Versi asinkron dari call_with_retries
+async def call_with_retries_async(func, *args, max_retries=LLM_MAX_RETRIES, **kwargs):
+    attempt = 0
+    while True:
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt >= max_retries:
+                raise LLMUnavailableError(_unavailable_message(e, attempt)) from e
+            delay = backoff_delay(attempt, e)
+            _throttle(e, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Fungsi untuk memanggil chat completion lewat klien bersama dengan retry. Setiap percobaan
+# menunggu giliran di penjadwal kuota (RPM/TPM); priority INTERACTIVE untuk sesi Streamlit,
+# BATCH untuk job latar belakang, owner untuk giliran yang adil antar sesi/job.
+# trace (dict, opsional) diisi estimasi token prompt, jumlah percobaan, dan lama menunggu kuota.
+# Untuk stream=True, retry mencakup pembukaan stream (sebelum token pertama diterima).
+def chat_completion(client=None, priority=INTERACTIVE, owner=None, trace=None, **params):
+    client = get_client() if client is None else client
+    prompt_tokens = estimate_prompt_tokens(params)
+    cost = estimate_request_tokens(params, prompt_tokens)
+    trace = _start_trace(trace, prompt_tokens)
+
+    def send():
+        trace['queue_wait_s'] += request_scheduler.acquire(cost, priority, owner)
+        trace['attempts'] += 1
+        response = client.chat.completions.create(**params)
+        _settle(prompt_tokens, response)
+        return response
+
+    return call_with_retries(send)
+
+
+# Versi asinkron dari chat_completion; penantian kuota dijalankan di thread agar event loop tetap bebas
+async def chat_completion_async(client=None, priority=INTERACTIVE, owner=None, trace=None, **params):
+    client = get_async_client() if client is None else client
+    prompt_tokens = estimate_prompt_tokens(params)
+    cost = estimate_request_tokens(params, prompt_tokens)
+    trace = _start_trace(trace, prompt_tokens)
+    if owner is None:
+        owner = asyncio.current_task().get_name()
+
+    async def send():
+        trace['queue_wait_s'] += await asyncio.to_thread(request_scheduler.acquire, cost, priority, owner)
+        trace['attempts'] += 1
+        response = await client.chat.completions.create(**params)
+        _settle(prompt_tokens, response)
+        return response
+
+    return await call_with_retries_async(send)
+
+
+def _start_trace(trace, prompt_tokens):
+    trace = {} if trace is None else trace
+    trace.update(prompt_tokens=prompt_tokens, attempts=0, queue_wait_s=0.0)
+    return trace
+
+
+# Fungsi untuk mengoreksi estimasi token prompt dengan usage dari respons (tidak tersedia pada respons stream)
+def _settle(prompt_tokens, response):
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        request_scheduler.settle(prompt_tokens, usage.prompt_tokens)
+
+
+# Fungsi untuk menahan antrean penjadwal setelah 429 agar request lain tidak ikut ditolak
+def _throttle(error, delay):
+    if getattr(error, 'status_code', None) == 429:
+        request_scheduler.pause(delay)
+
+
+def _unavailable_message(error, attempt):
+    status = getattr(error, 'status_code', None)
+    reason = f"status {status}" if status else type(error).__name__
+    return f"Layanan AI sedang tidak tersedia ({reason}) setelah {attempt + 1} percobaan. Silakan coba lagi nanti."
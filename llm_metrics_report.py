@@ -0,0 +1,80 @@
+import argparse
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from llm_telemetry import LLM_METRICS_PATH, read_metrics
+
+# Load environment variables
+load_dotenv()
+
+# Harga per 1.000 token (USD) untuk estimasi biaya; sesuaikan dengan harga deployment
+LLM_PRICE_PROMPT_PER_1K = float(os.getenv('LLM_PRICE_PROMPT_PER_1K', '0.0005'))
+LLM_PRICE_COMPLETION_PER_1K = float(os.getenv('LLM_PRICE_COMPLETION_PER_1K', '0.0015'))
+
+
+# Fungsi untuk meringkas metrik panggilan narasi per jenis grafik: jumlah panggilan, rasio cache,
+# persentil latensi dan time to first token, rata-rata ukuran prompt/token, dan estimasi biaya
+def summarize_metrics(records, prompt_price=LLM_PRICE_PROMPT_PER_1K, completion_price=LLM_PRICE_COMPLETION_PER_1K):
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    for column in ['prompt_tokens', 'completion_tokens', 'error']:
+        if column not in df.columns:
+            df[column] = None
+    df['prompt_tokens'] = pd.to_numeric(df['prompt_tokens'], errors='coerce')
+    df['completion_tokens'] = pd.to_numeric(df['completion_tokens'], errors='coerce')
+    df['cost'] = (df['prompt_tokens'].fillna(0) * prompt_price + df['completion_tokens'].fillna(0) * completion_price) / 1000
+    df['hit'] = df['cache'] == 'hit'
+    df['failed'] = df['error'].notna()
+    # Persentil latensi panggilan API hanya dari panggilan yang tidak dilayani cache
+    api = df[~df['hit'] & ~df['failed']]
+
+    grouped = df.groupby('chart_type', sort=True)
+    summary = pd.DataFrame({
+        'calls': grouped.size(),
+        'cache_hit_rate': grouped['hit'].mean(),
+        'errors': grouped['failed'].sum(),
+        'prompt_chars_avg': grouped['prompt_chars'].mean(),
+        'cost_usd': grouped['cost'].sum(),
+    })
+    api_grouped = api.groupby('chart_type', sort=True)
+    for name, fraction in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]:
+        summary[f'latency_ms_{name}'] = api_grouped['latency_ms'].quantile(fraction)
+    for name, fraction in [('p50', 0.5), ('p95', 0.95)]:
+        summary[f'ttft_ms_{name}'] = api_grouped['ttft_ms'].quantile(fraction)
+    summary['prompt_tokens_avg'] = api_grouped['prompt_tokens'].mean()
+    summary['completion_tokens_avg'] = api_grouped['completion_tokens'].mean()
+    summary['cost_usd_per_call'] = summary['cost_usd'] / (summary['calls'] * (1 - summary['cache_hit_rate'])).where(lambda calls: calls > 0)
+    return summary.sort_values('cost_usd', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meringkas metrik panggilan narasi AI per jenis grafik.")
+    parser.add_argument('path', nargs='?', default=LLM_METRICS_PATH, help="File JSONL metrik (default: LLM_METRICS_PATH)")
+    parser.add_argument('--since-hours', type=float, default=None, help="Hanya panggilan dalam N jam terakhir")
+    parser.add_argument('--prompt-price', type=float, default=LLM_PRICE_PROMPT_PER_1K, help="Harga per 1K token prompt (USD)")
+    parser.add_argument('--completion-price', type=float, default=LLM_PRICE_COMPLETION_PER_1K, help="Harga per 1K token jawaban (USD)")
+    parser.add_argument('--csv', default=None, help="Simpan ringkasan ke file CSV")
+    args = parser.parse_args()
+
+    records = read_metrics(args.path)
+    if args.since_hours is not None:
+        cutoff = pd.Timestamp.now().timestamp() - args.since_hours * 3600
+        records = [record for record in records if record.get('ts', 0) >= cutoff]
+    if not records:
+        print(f"Belum ada metrik di {args.path}")
+        return
+
+    summary = summarize_metrics(records, args.prompt_price, args.completion_price)
+    print(f"{len(records)} panggilan narasi dari {args.path}")
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:,.4g}'.format):
+        print(summary)
+    if args.csv:
+        summary.to_csv(args.csv)
+        print(f"Ringkasan disimpan ke {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
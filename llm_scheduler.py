@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Kuota deployment Azure OpenAI per menit. Secara bawaan (0) penjadwal nonaktif dan request langsung dikirim;
+# operator mengaktifkannya dengan mengisi LLM_RPM_LIMIT (request per menit) dan LLM_TPM_LIMIT (token per menit)
+# di .env sesuai kuota deployment di portal Azure (Quotas / Rate limit), misal LLM_RPM_LIMIT=60 dan
+# LLM_TPM_LIMIT=40000 untuk deployment 40K TPM. Cukup salah satu yang diisi untuk mengaktifkan penjadwal.
+# Kuota berlaku per proses; jika beberapa proses memakai deployment yang sama, bagi kuotanya.
+LLM_RPM_LIMIT = float(os.getenv('LLM_RPM_LIMIT', '0'))
+LLM_TPM_LIMIT = float(os.getenv('LLM_TPM_LIMIT', '0'))
+
+# max_tokens yang diasumsikan jika request tidak menyebutkannya
+LLM_DEFAULT_MAX_TOKENS = int(os.getenv('LLM_DEFAULT_MAX_TOKENS', '800'))
+
+# Tambahan token per pesan (role dan pemisah) pada estimasi prompt
+TOKENS_PER_MESSAGE = 4
+
+# Prioritas request: angka lebih kecil dilayani lebih dulu
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+# Jumlah waktu tunggu terakhir yang disimpan per prioritas untuk menghitung persentil
+WAIT_SAMPLES = 1000
+
+
+# Fungsi untuk memperkirakan token prompt sebuah request chat completion
+def estimate_prompt_tokens(params):
+    from data_digest import estimate_tokens
+    prompt_tokens = 0
+    for message in params.get('messages') or []:
+        content = message.get('content') or ''
+        if not isinstance(content, str):
+            content = str(content)
+        prompt_tokens += estimate_tokens(content) + TOKENS_PER_MESSAGE
+    return prompt_tokens
+
+
+# Fungsi untuk memperkirakan kuota yang dipakai sebuah request: prompt ditambah max_tokens
+# (Azure memperhitungkan max_tokens, bukan jumlah token jawaban, saat menegakkan kuota TPM)
+def estimate_request_tokens(params, prompt_tokens=None):
+    prompt_tokens = estimate_prompt_tokens(params) if prompt_tokens is None else prompt_tokens
+    max_tokens = params.get('max_tokens')
+    return prompt_tokens + (LLM_DEFAULT_MAX_TOKENS if max_tokens is None else max_tokens)
+
+
+# Penjadwal request LLM dengan dua token bucket (request dan token per menit).
+# Request menunggu di antrean per prioritas; di dalam satu prioritas, pemilik (sesi Streamlit
+# atau job batch) dilayani bergiliran sehingga satu pemilik tidak memonopoli kuota.
+class RequestScheduler:
+    def __init__(self, rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT, period=60.0, clock=time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.period = period
+        self._clock = clock
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._queues = {rank: OrderedDict() for rank in sorted(PRIORITIES.values())}
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.throttled = 0
+        self.charged_tokens = 0
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self._wait_totals = {priority: [0, 0.0, 0.0] for priority in PRIORITIES}
+
+    @property
+    def enabled(self):
+        return bool(self.rpm or self.tpm)
+
+    # Menunggu sampai kuota tersedia dan giliran tiba, lalu memakai kuota sebesar cost token.
+    # Mengembalikan lama menunggu (detik).
+    def acquire(self, cost, priority=INTERACTIVE, owner=None):
+        if not self.enabled:
+            return 0.0
+        owner = threading.get_ident() if owner is None else owner
+        # Request yang lebih besar dari kapasitas bucket tetap bisa lewat saat bucket penuh
+        cost = min(cost, self.tpm) if self.tpm else cost
+        ticket = object()
+        started = self._clock()
+        with self._cond:
+            owners = self._queues[PRIORITIES[priority]]
+            owners.setdefault(owner, deque()).append(ticket)
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    timeout = None
+                    if self._head() is ticket:
+                        timeout = self._time_until_available(cost, now)
+                        if timeout <= 0:
+                            break
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._remove(owners, owner, ticket)
+                self._cond.notify_all()
+                raise
+            self._requests -= 1
+            self._tokens -= cost
+            self._remove(owners, owner, ticket)
+            waited = self._clock() - started
+            self.granted += 1
+            self.charged_tokens += cost
+            self._waits[priority].append(waited)
+            totals = self._wait_totals[priority]
+            totals[0] += 1
+            totals[1] += waited
+            totals[2] = max(totals[2], waited)
+            self._cond.notify_all()
+        return waited
+
+    # Mengoreksi bucket token dengan jumlah token prompt sebenarnya dari respons (usage.prompt_tokens)
+    def settle(self, estimated_prompt, actual_prompt):
+        if not self.enabled or actual_prompt is None:
+            return
+        with self._cond:
+            self.charged_tokens += actual_prompt - estimated_prompt
+            if self.tpm:
+                self._tokens = min(self.tpm, self._tokens + estimated_prompt - actual_prompt)
+            self._cond.notify_all()
+
+    # Menahan seluruh antrean selama beberapa detik (misal setelah 429 dengan Retry-After),
+    # agar request lain tidak ikut terkena 429
+    def pause(self, seconds):
+        if not self.enabled or not seconds or seconds <= 0:
+            return
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._cond.notify_all()
+
+    def queue_depth(self, priority=None):
+        with self._cond:
+            if priority is not None:
+                return self._depth(PRIORITIES[priority])
+            return sum(self._depth(rank) for rank in self._queues)
+
+    def stats(self):
+        with self._cond:
+            self._refill(self._clock())
+            waits = {}
+            for priority, rank in PRIORITIES.items():
+                count, total, longest = self._wait_totals[priority]
+                recent = sorted(self._waits[priority])
+                waits[priority] = {
+                    'queued': self._depth(rank),
+                    'granted': count,
+                    'wait_ms_avg': total / count * 1000 if count else 0.0,
+                    'wait_ms_p95': recent[int(0.95 * (len(recent) - 1))] * 1000 if recent else 0.0,
+                    'wait_ms_max': longest * 1000,
+                }
+            return {
+                'queue_depth': sum(self._depth(rank) for rank in self._queues),
+                'granted': self.granted,
+                'throttled': self.throttled,
+                'requests_available': self._requests,
+                'tokens_available': self._tokens,
+                'charged_tokens': self.charged_tokens,
+                'per_priority': waits,
+            }
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / self.period)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / self.period)
+
+    # Tiket berikutnya yang boleh jalan: prioritas tertinggi, pemilik paling lama tidak dilayani
+    def _head(self):
+        for owners in self._queues.values():
+            if owners:
+                return next(iter(owners.values()))[0]
+        return None
+
+    def _time_until_available(self, cost, now):
+        wait = self._paused_until - now
+        if self.rpm and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * self.period / self.rpm)
+        if self.tpm and self._tokens < cost:
+            wait = max(wait, (cost - self._tokens) * self.period / self.tpm)
+        return wait
+
+    # Mengeluarkan tiket dari antrean; pemilik yang masih punya antrean pindah ke belakang (giliran)
+    def _remove(self, owners, owner, ticket):
+        tickets = owners.get(owner)
+        if tickets is None or ticket not in tickets:
+            return
+        was_head = tickets[0] is ticket
+        tickets.remove(ticket)
+        if not tickets:
+            del owners[owner]
+        elif was_head:
+            owners.move_to_end(owner)
+
+    def _depth(self, rank):
+        return sum(len(tickets) for tickets in self._queues[rank].values())
+
+
+# Penjadwal bersama untuk seluruh sesi dan job dalam satu proses
+request_scheduler = RequestScheduler()
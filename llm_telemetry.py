@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Lokasi file JSONL metrik panggilan narasi (kosongkan untuk mematikan pencatatan)
+LLM_METRICS_PATH = os.getenv(
+    'LLM_METRICS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm_metrics.jsonl')
+)
+
+
+# Penampung metrik berupa file JSON Lines; satu baris per panggilan narasi, aman dipakai banyak thread
+class JsonlSink:
+    def __init__(self, path=LLM_METRICS_PATH):
+        self.path = path or None
+        self._lock = threading.Lock()
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def write(self, record):
+        if not self.path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(line)
+        except OSError:
+            # Metrik tidak boleh menggagalkan narasi
+            pass
+
+
+# Penampung metrik bersama untuk seluruh modul dalam satu proses
+metrics_sink = JsonlSink()
+
+
+# Fungsi untuk membaca seluruh record metrik dari file JSONL (baris rusak dilewati)
+def read_metrics(path=LLM_METRICS_PATH):
+    records = []
+    if not path or not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+# Pencatat satu panggilan narasi: dipakai sebagai context manager di sekitar cache dan panggilan API.
+# Mencatat latensi, time to first token, token prompt/jawaban, jenis grafik, ukuran prompt, dan status cache.
+class NarrativeCall:
+    def __init__(self, chart_type, params, stream=False, sink=None):
+        self.sink = metrics_sink if sink is None else sink
+        messages = params.get('messages') or []
+        self.record = {
+            'chart_type': chart_type or 'unknown',
+            'model': params.get('model'),
+            'stream': stream,
+            'max_tokens': params.get('max_tokens'),
+            'prompt_chars': sum(len(str(message.get('content') or '')) for message in messages),
+            'cache': 'miss',
+        }
+        # Diisi llm_client.chat_completion: estimasi token prompt, jumlah percobaan, dan lama menunggu kuota
+        self.trace = {}
+        self._started = None
+        self._first_token = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def cache_hit(self):
+        self.record['cache'] = 'hit'
+
+    def first_token(self):
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+
+    # Menyimpan hasil panggilan; tanpa usage (misal respons stream) token jawaban diperkirakan dari teks
+    def finish(self, content, usage=None):
+        if self.record['cache'] == 'hit':
+            return
+        if usage is not None:
+            self.record['prompt_tokens'] = usage.prompt_tokens
+            self.record['completion_tokens'] = usage.completion_tokens
+            self.record['tokens_estimated'] = False
+        else:
+            from data_digest import estimate_tokens
+            self.record['prompt_tokens'] = self.trace.get('prompt_tokens')
+            self.record['completion_tokens'] = estimate_tokens(content or '')
+            self.record['tokens_estimated'] = True
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        self.record['ts'] = time.time()
+        self.record['latency_ms'] = (ended - self._started) * 1000
+        self.record['ttft_ms'] = ((self._first_token or ended) - self._started) * 1000
+        self.record['attempts'] = self.trace.get('attempts', 0)
+        self.record['queue_wait_ms'] = self.trace.get('queue_wait_s', 0.0) * 1000
+        if exc_type is not None:
+            self.record['error'] = exc_type.__name__
+        self.sink.write(self.record)
+        return False
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Konfigurasi pengambilan animasi Lottie dari variabel lingkungan
+LOTTIE_TIMEOUT = float(os.getenv('LOTTIE_TIMEOUT', '3'))
+LOTTIE_CACHE_DIR = os.getenv(
+    'LOTTIE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'lottie')
+)
+LOTTIE_FALLBACK_PATH = os.getenv(
+    'LOTTIE_FALLBACK_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'lottie_animation.json')
+)
+
+# Hasil per URL disimpan selama proses server hidup sehingga URL hanya diambil sekali
+_animations = {}
+_lock = threading.Lock()
+
+
+# Fungsi untuk membaca file JSON; None jika tidak ada atau rusak
+def _read_json(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+# Fungsi untuk menyimpan animasi ke cache lokal secara atomik
+def _write_json(path, animation):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(animation, handle)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+# Fungsi untuk mengambil animasi dari jaringan dengan batas waktu
+def _fetch(url, timeout):
+    import requests
+    try:
+        response = requests.get(url, timeout=timeout)
+        if response.status_code != 200:
+            return None
+        return response.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+# Fungsi untuk memuat animasi Lottie: memori proses, lalu cache file lokal, lalu jaringan
+# (sekali per proses, dengan timeout), dan terakhir file bawaan jika jaringan tidak tersedia
+def load_lottie(url, timeout=LOTTIE_TIMEOUT, cache_dir=LOTTIE_CACHE_DIR, fallback_path=LOTTIE_FALLBACK_PATH):
+    if url in _animations:
+        return _animations[url]
+    with _lock:
+        if url in _animations:
+            return _animations[url]
+        cache_path = os.path.join(cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+        animation = _read_json(cache_path)
+        if animation is None:
+            animation = _fetch(url, timeout)
+            if animation is not None:
+                _write_json(cache_path, animation)
+        if animation is None:
+            animation = _read_json(fallback_path)
+        _animations[url] = animation
+        return animation
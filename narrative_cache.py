@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+from llm_client import chat_completion, chat_completion_async
+from llm_scheduler import INTERACTIVE
+from llm_telemetry import NarrativeCall
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Konfigurasi cache narasi dari variabel lingkungan
+NARRATIVE_CACHE_TTL = float(os.getenv('NARRATIVE_CACHE_TTL', '3600'))
+NARRATIVE_CACHE_MAX_ENTRIES = int(os.getenv('NARRATIVE_CACHE_MAX_ENTRIES', '256'))
+NARRATIVE_CACHE_DB = os.getenv(
+    'NARRATIVE_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'narrative_cache.sqlite3')
+)
+
+
+# Fungsi untuk membuat kunci cache dari parameter request chat completion
+def make_request_key(params):
+    # Parameter bernilai None tidak dikirim ke API, jadi tidak ikut membedakan kunci
+    normalized = {name: value for name, value in params.items() if value is not None}
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Cache narasi dua tingkat: LRU di memori dan SQLite lokal, keduanya dengan TTL
+class NarrativeCache:
+    def __init__(self, ttl=NARRATIVE_CACHE_TTL, max_entries=NARRATIVE_CACHE_MAX_ENTRIES, db_path=NARRATIVE_CACHE_DB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS narratives ("
+                    "key TEXT PRIMARY KEY, content TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Mengambil narasi dari memori, lalu dari SQLite jika belum kedaluwarsa
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content
+                del self._entries[key]
+        content, expires_at = self._read_db(key, now)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, content, expires_at)
+        return content
+
+    # Menyimpan narasi ke kedua tingkat cache
+    def put(self, key, content, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, content, expires_at)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO narratives (key, content, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, content, now, expires_at)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM narratives")
+
+    # Menghapus entri kedaluwarsa dari SQLite
+    def purge_expired(self):
+        if not self.db_path:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM narratives WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _store(self, key, content, expires_at):
+        self._entries[key] = (content, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_db(self, key, now):
+        if not self.db_path:
+            return None, None
+        with self._connect() as conn:
+            row = conn.execute("SELECT content, expires_at FROM narratives WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, None
+            if row[1] <= now:
+                conn.execute("DELETE FROM narratives WHERE key = ?", (key,))
+                return None, None
+        return row
+
+
+# Instance cache bersama untuk seluruh modul dalam satu proses
+narrative_cache = NarrativeCache()
+
+
+# Fungsi untuk memanggil chat completion dengan cache exact-match di depannya;
+# client None berarti klien bersama dari llm_client, priority menentukan urutan antrean kuota,
+# chart_type dicatat di metrik panggilan (llm_telemetry)
+def cached_chat_completion(client=None, cache=None, priority=INTERACTIVE, chart_type=None, **params):
+    cache = narrative_cache if cache is None else cache
+    with NarrativeCall(chart_type, params) as call:
+        key = make_request_key(params)
+        content = cache.get(key)
+        if content is not None:
+            call.cache_hit()
+            return content
+        response = chat_completion(client, priority, trace=call.trace, **params)
+        content = response.choices[0].message.content
+        call.finish(content, getattr(response, 'usage', None))
+        if content is not None:
+            cache.put(key, content)
+        return content
+
+
+
+# Versi asinkron dari cached_chat_completion untuk klien AsyncAzureOpenAI
+async def cached_chat_completion_async(client=None, cache=None, priority=INTERACTIVE, chart_type=None, **params):
+    cache = narrative_cache if cache is None else cache
+    with NarrativeCall(chart_type, params) as call:
+        key = make_request_key(params)
+        content = cache.get(key)
+        if content is not None:
+            call.cache_hit()
+            return content
+        response = await chat_completion_async(client, priority, trace=call.trace, **params)
+        content = response.choices[0].message.content
+        call.finish(content, getattr(response, 'usage', None))
+        if content is not None:
+            cache.put(key, content)
+        return content
+
+# Fungsi untuk memanggil chat completion secara streaming; hasil akhirnya sama dengan jalur non-streaming
+def stream_chat_completion(client=None, cache=None, priority=INTERACTIVE, chart_type=None, **params):
+    cache = narrative_cache if cache is None else cache
+    with NarrativeCall(chart_type, params, stream=True) as call:
+        key = make_request_key(params)
+        content = cache.get(key)
+        if content is not None:
+            call.cache_hit()
+            yield content
+            return
+        parts = []
+        for chunk in chat_completion(client, priority, trace=call.trace, stream=True, **params):
+            # Azure dapat mengirim chunk tanpa choices (hasil content filter) di awal stream
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                call.first_token()
+                parts.append(delta)
+                yield delta
+        call.finish(''.join(parts))
+        if parts:
+            cache.put(key, ''.join(parts))
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Fungsi untuk menentukan jalur aliran Sankey dari pilihan sumbu: kolom X, lalu tingkat tambahan
+# (misal City -> Category -> Sub-Category). Sumbu Y numerik menjadi nilai aliran; sumbu Y kategori
+# menjadi tingkat terakhir dan aliran dihitung dari jumlah baris.
+def sankey_path(df, x_col, y_col, levels=None):
+    path = [x_col] + [level for level in (levels or []) if level not in (x_col, y_col)]
+    if y_col != x_col and pd.api.types.is_numeric_dtype(df[y_col]):
+        return path, y_col
+    if y_col not in path:
+        path.append(y_col)
+    return path, None
+
+
+# Fungsi untuk menyusun node dan link Sankey. Setiap kolom jalur di-factorize sekali, lalu link
+# dijumlahkan per pasangan (sumber, tujuan) antar tingkat berurutan dengan bincount atas kunci gabungan,
+# sehingga biayanya linear terhadap jumlah baris dan jumlah link sama dengan jumlah pasangan unik.
+# Node diberi offset per tingkat agar label yang sama di tingkat berbeda tetap menjadi node terpisah.
+def sankey_links(df, path, value_col=None):
+    codes = []
+    labels = []
+    for column in path:
+        level_codes, uniques = pd.factorize(df[column])
+        codes.append(level_codes)
+        labels.append([str(label) for label in uniques])
+    weights = None
+    if value_col is not None:
+        weights = pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype=float)
+        weights = np.where(np.isnan(weights), 0.0, weights)
+    offsets = np.cumsum([0] + [len(level_labels) for level_labels in labels])
+
+    sources, targets, values = [], [], []
+    for level in range(len(path) - 1):
+        width = len(labels[level + 1])
+        size = len(labels[level]) * width
+        valid = (codes[level] >= 0) & (codes[level + 1] >= 0)
+        key = codes[level][valid].astype(np.int64) * width + codes[level + 1][valid]
+        if size <= max(len(key), 1 << 16):
+            pair_keys, inverse = np.arange(size), key
+        else:
+            # Kardinalitas tinggi: kunci dipadatkan dulu agar array bincount tidak sebesar hasil kali kategori
+            inverse, pair_keys = pd.factorize(key, sort=True)
+        counts = np.bincount(inverse, minlength=len(pair_keys))
+        totals = counts if weights is None else np.bincount(inverse, weights=weights[valid], minlength=len(pair_keys))
+        present = counts > 0
+        pair_keys = pair_keys[present]
+        sources.append(pair_keys // width + offsets[level])
+        targets.append(pair_keys % width + offsets[level + 1])
+        values.append(totals[present])
+
+    return {
+        'labels': [label for level_labels in labels for label in level_labels],
+        'level_sizes': [len(level_labels) for level_labels in labels],
+        'source': np.concatenate(sources) if sources else np.array([], dtype=np.int64),
+        'target': np.concatenate(targets) if targets else np.array([], dtype=np.int64),
+        'value': np.concatenate(values).astype(float) if values else np.array([], dtype=float),
+    }
+
+
+# Fungsi untuk membuat diagram Sankey dari link teragregasi
+def sankey_figure(df, path, value_col=None, title='Sankey Diagram'):
+    links = sankey_links(df, path, value_col)
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="black", width=0.5),
+            label=links['labels']
+        ),
+        link=dict(
+            source=links['source'],
+            target=links['target'],
+            value=links['value']
+        )
+    )])
+    fig.update_layout(title_text=title, font_size=10)
+    return fig
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modul aplikasi berada di akar repositori (bukan paket), sama seperti pada benchmarks/;
+# generator data sintetis dipakai bersama dengan benchmark
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
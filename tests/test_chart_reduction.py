@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_facts import extract_chart_facts
+from chart_reduction import CATEGORY_OTHER_LABEL, downsample_frame, lttb_bucket_edges, lttb_indices, minmax_indices, top_n_frame
+from synthetic_data import make_categories, make_series, make_spiky_values
+
+
+# Fungsi untuk memeriksa bahwa setiap bucket mempertahankan baris min dan max-nya
+def assert_bucket_extrema_kept(y, bucket, kept):
+    kept_set = set(kept.tolist())
+    for b in np.unique(bucket):
+        members = np.flatnonzero(bucket == b)
+        values = y[members]
+        if np.isnan(values).all():
+            continue
+        assert members[np.nanargmin(values)] in kept_set, f"min bucket {b} hilang"
+        assert members[np.nanargmax(values)] in kept_set, f"max bucket {b} hilang"
+
+
+@pytest.mark.parametrize('n, n_out', [(1_000, 100), (10_007, 500), (100_000, 5_000)])
+def test_minmax_keeps_every_bucket_extrema(n, n_out):
+    y = make_spiky_values(n)
+    kept = minmax_indices(y, n_out)
+    assert len(kept) <= n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    n_buckets = max(1, (n_out - 2) // 2)
+    assert_bucket_extrema_kept(y, np.arange(n) * n_buckets // n, kept)
+
+
+@pytest.mark.parametrize('n, n_out', [(1_000, 100), (10_007, 500), (100_000, 5_000)])
+def test_lttb_keeps_every_bucket_extrema(n, n_out):
+    x = np.arange(n, dtype=float)
+    y = make_spiky_values(n)
+    kept = lttb_indices(x, y, n_out)
+    assert len(kept) <= n_out
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert (np.diff(kept) > 0).all()
+    edges = lttb_bucket_edges(n, max(1, (n_out - 2) // 3))
+    inner = np.arange(1, n - 1)
+    kept_inner = kept[(kept > 0) & (kept < n - 1)] - 1
+    assert_bucket_extrema_kept(y[1:-1], np.searchsorted(edges, inner, side='right') - 1, kept_inner)
+
+
+def test_minmax_ignores_nan_inside_buckets():
+    y = make_spiky_values(10_000)
+    y[::7] = np.nan
+    kept = minmax_indices(y, 200)
+    assert_bucket_extrema_kept(y, np.arange(len(y)) * 99 // len(y), kept)
+    assert np.nanmax(y) in y[kept] and np.nanmin(y) in y[kept]
+
+
+def test_nan_only_input_keeps_endpoints():
+    y = np.full(10_000, np.nan)
+    assert minmax_indices(y, 100).tolist() == [0, 9_999]
+    df = pd.DataFrame({'x': np.arange(10_000), 'y': y})
+    for method in ['minmax', 'lttb']:
+        reduced = downsample_frame(df, 'x', 'y', budget=100, method=method)
+        assert reduced['x'].tolist() == [0, 9_999]
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_under_budget_returns_every_row(method):
+    df = pd.DataFrame({'x': np.arange(50), 'y': make_spiky_values(50)})
+    reduced = downsample_frame(df, 'x', 'y', budget=50, method=method)
+    assert len(reduced) == 50
+    assert minmax_indices(df['y'], 50).tolist() == list(range(50))
+    assert lttb_indices(df['x'], df['y'], 50).tolist() == list(range(50))
+
+
+@pytest.mark.parametrize('budget', [10, 1_000])
+def test_output_is_sorted_by_x_under_and_over_budget(budget):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'x': rng.permutation(500), 'y': make_spiky_values(500)})
+    reduced = downsample_frame(df, 'x', 'y', budget=budget)
+    assert reduced['x'].is_monotonic_increasing
+    zoomed = downsample_frame(df, 'x', 'y', budget=budget, x_range=(100, 120))
+    assert zoomed['x'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize('as_category', [False, True])
+@pytest.mark.parametrize('budget', [2, 1_000])
+def test_text_and_categorical_x_keep_row_order(as_category, budget):
+    months = pd.Series(['Jan', 'Feb', 'Mar', 'Apr'])
+    df = pd.DataFrame({'Bulan': months.astype('category') if as_category else months, 'Sales': [4.0, 1.0, 3.0, 2.0]})
+    reduced = downsample_frame(df, 'Bulan', 'Sales', budget=budget)
+    assert reduced.index.is_monotonic_increasing
+    if budget >= len(df):
+        assert reduced['Bulan'].tolist() == ['Jan', 'Feb', 'Mar', 'Apr']
+    else:
+        assert reduced['Bulan'].tolist() == ['Jan', 'Feb', 'Apr']
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_downsample_frame_keeps_global_extrema_and_endpoints(method):
+    df = make_series(200_000, seed=1)
+    reduced = downsample_frame(df, 'Order Date', ['Sales', 'Profit'], budget=5_000, method=method)
+    assert len(reduced) <= 5_000 + 4
+    assert reduced['Order Date'].is_monotonic_increasing
+    for y_col in ['Sales', 'Profit']:
+        assert reduced[y_col].max() == df[y_col].max()
+        assert reduced[y_col].min() == df[y_col].min()
+    assert reduced['Order Date'].min() == df['Order Date'].min()
+    assert reduced['Order Date'].max() == df['Order Date'].max()
+
+
+def test_lttb_with_nan_values():
+    n = 50_000
+    y = make_spiky_values(n)
+    y[np.random.default_rng(2).choice(n, size=5_000, replace=False)] = np.nan
+    y[0] = np.nan
+    df = pd.DataFrame({'x': np.arange(n), 'y': y})
+    reduced = downsample_frame(df, 'x', 'y', budget=1_000, method='lttb')
+    assert len(reduced) <= 1_000 + 2
+    assert reduced['x'].iloc[0] == 0 and reduced['x'].iloc[-1] == n - 1
+    assert reduced['y'].max() == np.nanmax(y)
+    assert reduced['y'].min() == np.nanmin(y)
+    # Hanya titik awal/akhir yang boleh NaN; titik hasil LTTB selalu bernilai
+    assert reduced['y'].iloc[1:-1].notna().all()
+
+
+def test_x_range_zoom_returns_full_resolution():
+    n = 100_000
+    df = pd.DataFrame({'x': np.arange(n)[::-1], 'y': make_spiky_values(n)})
+    zoomed = downsample_frame(df, 'x', 'y', budget=5_000, x_range=(40_000, 41_000))
+    assert len(zoomed) == 1_001
+    assert zoomed['x'].between(40_000, 41_000).all()
+
+    wide = downsample_frame(df, 'x', 'y', budget=5_000, x_range=(10_000, 90_000))
+    assert len(wide) <= 5_000
+    assert wide['x'].between(10_000, 90_000).all()
+    inside = df[df['x'].between(10_000, 90_000)]
+    assert wide['y'].max() == inside['y'].max() and wide['y'].min() == inside['y'].min()
+
+
+# Fungsi untuk memeriksa tabel top-N terhadap groupby penuh: batas mark, total terjaga,
+# kategori yang dipertahankan benar-benar N teratas, dan ringkasan penggabungan
+def assert_reduction(df, reduced, x_col, y_col, budget):
+    numeric = pd.api.types.is_numeric_dtype(df[y_col])
+    grouped = df.groupby(x_col, observed=True)[y_col]
+    totals = grouped.sum() if numeric else grouped.count()
+    assert len(reduced) <= budget
+    assert np.isclose(reduced[y_col].sum(), totals.sum())
+    assert reduced.attrs['source_rows'] == len(df)
+    reduction = reduced.attrs.get('category_reduction')
+    if len(totals) <= budget:
+        assert reduction is None and len(reduced) == len(totals)
+        return
+    kept = reduced.iloc[:-1]
+    assert reduced[x_col].iloc[-1] == reduction['label_lainnya']
+    assert reduction['label_lainnya'] not in set(kept[x_col])
+    assert reduction['jumlah_kategori'] == len(totals)
+    assert reduction['ditampilkan'] + reduction['digabung'] == len(totals)
+    threshold = totals.abs().nlargest(budget - 1).min()
+    assert (kept[y_col].abs() >= threshold - 1e-9).all()
+    assert np.allclose(kept[y_col].to_numpy(), totals.loc[kept[x_col]].to_numpy())
+    assert (np.diff(kept[y_col].to_numpy()) <= 0).all()
+
+
+@pytest.mark.parametrize('cardinality', [10, 1_000, 100_000, 1_000_000])
+@pytest.mark.parametrize('y_col', ['Sales', 'Profit', 'Segment'])
+def test_top_n_frame_caps_marks_up_to_1m_categories(cardinality, y_col):
+    df = make_categories(max(cardinality, 200_000), cardinality)
+    reduced = top_n_frame(df, 'Product Name', y_col, budget=30)
+    assert_reduction(df, reduced, 'Product Name', y_col, 30)
+    # Prompt narasi memakai tabel yang sama dengan grafik
+    facts = extract_chart_facts(reduced, 'Bar Chart', 'Product Name', y_col)
+    assert facts['jumlah_baris'] == len(df)
+    assert ('pengurangan_kategori' in facts) == (cardinality > 30)
+
+
+def test_real_other_category_in_top_n_gets_distinct_label():
+    df = pd.DataFrame({
+        'Kategori': ['Other'] * 5 + [f"K{i}" for i in range(20)],
+        'Sales': [100.0] * 5 + list(range(1, 21)),
+    })
+    reduced = top_n_frame(df, 'Kategori', 'Sales', budget=5, other_label='Other')
+    assert reduced['Kategori'].iloc[0] == 'Other'
+    assert reduced['Sales'].iloc[0] == 500.0
+    label = reduced.attrs['category_reduction']['label_lainnya']
+    assert label != 'Other' and label.startswith('Other')
+    assert reduced['Kategori'].iloc[-1] == label
+    assert reduced['Kategori'].is_unique
+
+
+def test_real_other_category_in_tail_is_folded_into_bucket():
+    df = pd.DataFrame({'Kategori': ['Other'] + [f"K{i}" for i in range(20)], 'Sales': [0.5] + list(range(1, 21))})
+    reduced = top_n_frame(df, 'Kategori', 'Sales', budget=5, other_label='Other')
+    assert reduced['Kategori'].tolist() == ['K19', 'K18', 'K17', 'K16', 'Other']
+    assert reduced['Sales'].iloc[-1] == 0.5 + sum(range(1, 17))
+
+
+def test_non_numeric_y_falls_back_to_row_count():
+    df = pd.DataFrame({'Kategori': list('aaabbc') + [f"z{i}" for i in range(10)], 'Segment': ['x'] * 16})
+    reduced = top_n_frame(df, 'Kategori', 'Segment', budget=4)
+    assert reduced['Kategori'].tolist()[:2] == ['a', 'b']
+    assert reduced['Segment'].tolist() == [3, 2, 1, 10]
+    assert reduced['Segment'].sum() == len(df)
+
+
+def test_negative_totals_rank_by_magnitude():
+    df = pd.DataFrame({
+        'Kategori': ['rugi besar', 'untung', 'rugi kecil', 'netral', 'kecil'],
+        'Profit': [-1_000.0, 500.0, -10.0, 0.0, 5.0],
+    })
+    reduced = top_n_frame(df, 'Kategori', 'Profit', budget=3)
+    # Kategori dengan nilai absolut terbesar dipertahankan, diurutkan menurun menurut nilainya
+    assert reduced['Kategori'].tolist() == ['untung', 'rugi besar', CATEGORY_OTHER_LABEL]
+    assert reduced['Profit'].tolist() == [500.0, -1_000.0, -5.0]
+
+
+@pytest.mark.parametrize('cardinality', [10, 1_000_000])
+def test_same_x_and_y_column_is_capped_by_row_count(cardinality):
+    df = make_categories(max(cardinality, 200_000), cardinality)
+    reduced = top_n_frame(df, 'Product Name', 'Product Name', budget=30)
+    counts = df['Product Name'].value_counts()
+    assert reduced.columns.tolist() == ['Product Name']
+    assert reduced.attrs['source_rows'] == len(df)
+    if cardinality <= 30:
+        assert sorted(reduced['Product Name']) == sorted(counts.index)
+        return
+    assert len(reduced) == 30
+    reduction = reduced.attrs['category_reduction']
+    assert reduced['Product Name'].iloc[-1] == reduction['label_lainnya']
+    assert reduction['jumlah_kategori'] == len(counts)
+    kept = reduced['Product Name'].iloc[:-1]
+    assert (counts.loc[kept] >= counts.nlargest(29).min()).all()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import data_cube
+from data_cube import DataCube
+
+
+def make_orders(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Order ID': [f"ORD-{i:06d}" for i in range(n)],
+        'Region': rng.choice(['East', 'West', 'Central', 'South'], n),
+        'Ship Priority': rng.integers(1, 4, n),
+        'Discount': rng.random(n).round(6),
+        'Sales': rng.gamma(1.5, 200.0, n),
+    })
+
+
+def test_lazy_cuboids_only_for_low_cardinality_columns():
+    df = make_orders()
+    cube = DataCube(df)
+    assert cube.supports(['Region'], 'Sales')
+    assert cube.supports(['Ship Priority'], 'Sales')
+    assert not cube.supports(['Order ID'], 'Sales')
+    assert not cube.supports(['Discount'], 'Sales')
+    assert not cube.supports(['Region', 'Order ID'], 'Sales')
+    expected = df.groupby('Ship Priority')['Sales'].sum()
+    result = cube.query(['Ship Priority'], 'Sales').set_index('Ship Priority')['Sales']
+    assert np.allclose(result.loc[expected.index], expected)
+
+
+def test_query_results_are_bounded(monkeypatch):
+    monkeypatch.setattr(data_cube, 'CUBE_RESULTS_MAX_ENTRIES', 3)
+    cube = DataCube(make_orders(1_000))
+    for priority in [1, 2, 3, 1, 2]:
+        cube.query(['Region'], 'Sales', filters={'Ship Priority': priority})
+    assert len(cube._results) == 3
+    first = cube.query(['Region'], 'Sales')
+    first['Sales'] = 0
+    assert (cube.query(['Region'], 'Sales')['Sales'] > 0).all()
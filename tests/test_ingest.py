@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import optimize_dtypes
+
+
+def test_float_measures_stay_float64_so_totals_are_exact():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Region': rng.choice(['East', 'West'], 2_000_000), 'Revenue': rng.integers(1, 2_500, 2_000_000) * 1.0})
+    optimized, _ = optimize_dtypes(df)
+    assert optimized['Revenue'].dtype == np.float64
+    expected = df.groupby('Region')['Revenue'].sum()
+    actual = optimized.groupby('Region', observed=True)['Revenue'].sum()
+    assert (actual.loc[expected.index] == expected).all()
+
+
+def test_integers_are_not_downcast_below_int32():
+    df = pd.DataFrame({'Quantity': np.arange(100) % 14 + 1, 'Order Year': 2016, 'Order Month': np.arange(100) % 12 + 1, 'Row ID': np.arange(100)})
+    optimized, _ = optimize_dtypes(df)
+    for column in df.columns:
+        assert optimized[column].dtype == np.int32
+    # Kunci (tahun, bulan) tidak overflow seperti pada int16/int8
+    assert (optimized['Order Year'] * 100 + optimized['Order Month']).max() == 201612
+
+
+def test_gauge_facts_do_not_overflow_on_narrow_integers():
+    from chart_facts import extract_chart_facts
+    df = pd.DataFrame({'Total': np.array([-120], dtype=np.int8), 'Target': np.array([100], dtype=np.int8)})
+    facts = extract_chart_facts(df, 'Gauge Chart', 'Total', 'Target')
+    assert facts['selisih'] == -220
+
+
+def test_arrow_csv_keeps_arrow_dtypes():
+    import io
+
+    import ingest
+    if not ingest.ARROW_DTYPES:
+        pytest.skip("pyarrow tidak terpasang atau ARROW_DTYPES=0")
+    csv = (
+        b"Order Date,Ship Date,Region,Sales,Quantity\n"
+        b"01/02/2016,2016-01-05,West,1500.0,3\n"
+        b"02/03/2016,2016-02-05,East,2.5,4\n"
+        b"03/04/2016,2016-03-05,West,12.25,5\n"
+    )
+    df = ingest.parse_upload(io.BytesIO(csv), 'csv')
+    for column in ['Order Date', 'Ship Date', 'Sales', 'Quantity']:
+        assert isinstance(df[column].dtype, pd.ArrowDtype), column
+    assert str(df['Sales'].dtype.pyarrow_dtype) == 'double'
+    assert df['Order Date'].min() == pd.Timestamp('2016-01-02')
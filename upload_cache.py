@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from dotenv import load_dotenv
+
+# Memuat variabel lingkungan dari file .env
+load_dotenv()
+
+# Konfigurasi cache dari variabel lingkungan
+UPLOAD_CACHE_MAX_ENTRIES = int(os.getenv('UPLOAD_CACHE_MAX_ENTRIES', '8'))
+UPLOAD_CACHE_MAX_MB = float(os.getenv('UPLOAD_CACHE_MAX_MB', '1024'))
+UPLOAD_CACHE_SPILL_DIR = os.getenv('UPLOAD_CACHE_SPILL_DIR')
+UPLOAD_CACHE_SPILL_MAX_FILES = int(os.getenv('UPLOAD_CACHE_SPILL_MAX_FILES', '32'))
+
+
+# Fungsi untuk membuat kunci cache dari isi file, tipe file, dan opsi parsing
+def make_cache_key(data, file_type, **options):
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(memoryview(data))
+    hasher.update(b'\0' + str(file_type).lower().encode('utf-8'))
+    hasher.update(b'\0' + json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    return hasher.hexdigest()
+
+
+# Fungsi untuk menghitung ukuran DataFrame di memori (byte)
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# Cache DataFrame hasil parsing dengan eviksi LRU dan spill opsional ke Parquet
+class ParsedFrameCache:
+    def __init__(self, max_entries=UPLOAD_CACHE_MAX_ENTRIES, max_mb=UPLOAD_CACHE_MAX_MB,
+                 spill_dir=UPLOAD_CACHE_SPILL_DIR, spill_max_files=UPLOAD_CACHE_SPILL_MAX_FILES):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+        self.spill_max_files = spill_max_files
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # Mengambil DataFrame dari memori, lalu dari disk jika tersedia
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        df = self._read_spill(key)
+        if df is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._store(key, df)
+        return df
+
+    # Menyimpan DataFrame ke cache (dan ke disk jika spill aktif)
+    def put(self, key, df):
+        with self._lock:
+            self._store(key, df)
+        self._write_spill(key, df)
+        return df
+
+    # Mengambil dari cache atau mem-parsing lalu menyimpan hasilnya
+    def get_or_parse(self, key, parse):
+        df = self.get(key)
+        if df is None:
+            df = parse()
+            if df is not None:
+                self.put(key, df)
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._total_bytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+        }
+
+    def _store(self, key, df):
+        nbytes = frame_nbytes(df)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        # DataFrame yang lebih besar dari batas cache tidak disimpan di memori
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (df, nbytes)
+        self._total_bytes += nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_bytes
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.parquet")
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            return None
+        os.utime(path)
+        return df
+
+    def _write_spill(self, key, df):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            # Spill bersifat opsional: kolom yang tidak bisa ditulis ke Parquet cukup dilewati
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._prune_spill()
+
+    def _prune_spill(self):
+        files = [os.path.join(self.spill_dir, name) for name in os.listdir(self.spill_dir) if name.endswith('.parquet')]
+        if len(files) <= self.spill_max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.spill_max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Instance cache bersama untuk seluruh sesi dalam satu proses server
+parsed_frame_cache = ParsedFrameCache()
@@ -0,0 +1,136 @@
+import calendar
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Indeks waterfall per cube dataset; ikut terhapus saat cube-nya tidak dipakai lagi
+_indexes = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+# Indeks waterfall: total per (tahun, bulan) dihitung sekali per measure dalam satu agregasi berkelompok,
+# lalu dipartisi per tahun. Deret bulanan tahun mana pun dan deret tahunan (beserta measure
+# absolute/relative/total) diambil dari partisi ini, sehingga mengganti tahun tidak memindai ulang baris.
+class WaterfallIndex:
+    def __init__(self, cube=None, df=None):
+        # Referensi lemah agar indeks (nilai di _indexes) tidak menahan cube (kuncinya) tetap hidup
+        self._cube = weakref.ref(cube) if cube is not None else None
+        self.df = df
+        self._months = {}
+        self._years = {}
+        self._series = {}
+        self._month_names = None
+
+    # Fungsi untuk menghitung total per (tahun, bulan), atau per tahun jika data tidak memiliki bulan;
+    # dijawab dari cuboid cube jika tersedia, selain itu satu groupby pada data per baris
+    def _totals(self, measure, data):
+        data = self.df if data is None else data
+        cube = self._cube() if self._cube is not None else None
+        for group_by in (['Order Year', 'Order Month'], ['Order Year']):
+            if cube is not None and cube.supports(group_by, measure):
+                return cube.query(group_by, measure)
+            if data is not None and all(column in data.columns for column in group_by):
+                return _group_sum(data, group_by, measure)
+        raise ValueError(f"Data tidak memiliki kolom 'Order Year' untuk waterfall {measure}")
+
+    def _partition(self, measure, data=None):
+        if measure in self._years:
+            return
+        totals = self._totals(measure, data)
+        if 'Order Month' in totals.columns:
+            self._months[measure] = {
+                year: part[['Order Month', measure]].reset_index(drop=True)
+                for year, part in totals.groupby('Order Year', sort=True)
+            }
+            self._years[measure] = totals.groupby('Order Year', sort=True)[measure].sum().reset_index()
+        else:
+            self._months[measure] = {}
+            self._years[measure] = totals[['Order Year', measure]].reset_index(drop=True)
+
+    # Deret bulanan satu tahun: Order Month (1-12 lalu 'Total'), nilai, dan Measure untuk go.Waterfall.
+    # data (per baris) hanya dipakai jika cube tidak dapat menjawab measure ini.
+    def monthly(self, year, measure='Profit', data=None):
+        key = (measure, year)
+        if key not in self._series:
+            self._partition(measure, data)
+            months = self._months[measure].get(year, pd.DataFrame({'Order Month': [], measure: []}))
+            series = _with_measures(months, 'Order Month', measure)
+            month_order = list(range(1, 13)) + ['Total']
+            series['Order Month'] = pd.Categorical(series['Order Month'], categories=month_order, ordered=True)
+            self._series[key] = series
+        return self._series[key].copy()
+
+    # Deret tahunan: Order Year lalu 'Total', nilai, dan Measure
+    def yearly(self, measure='Profit', data=None):
+        key = (measure, None)
+        if key not in self._series:
+            self._partition(measure, data)
+            self._series[key] = _with_measures(self._years[measure], 'Order Year', measure)
+        return self._series[key].copy()
+
+    # Label bulan untuk sumbu X: dari kolom 'Month Name' data (dibaca sekali), selain itu nama bulan bawaan
+    def month_labels(self, months, data=None):
+        if self._month_names is None:
+            data = self.df if data is None else data
+            if data is not None and 'Month Name' in data.columns:
+                pairs = data[['Order Month', 'Month Name']].drop_duplicates('Order Month')
+                self._month_names = dict(zip(pairs['Order Month'], pairs['Month Name'].astype(str)))
+            else:
+                self._month_names = {month: calendar.month_name[month] for month in range(1, 13)}
+        return [self._month_names.get(month, str(month)) for month in months]
+
+
+# Fungsi untuk menjumlahkan measure per (tahun, bulan) dari data per baris. Tahun dan bulan digabung menjadi
+# satu indeks periode rapat ((tahun - tahun pertama) * 12 + bulan - 1) yang dijumlahkan dengan bincount,
+# jauh lebih hemat daripada groupby dua kolom. Indeks dihitung di int64 (kolom hasil ingest bisa bertipe int32
+# atau lebih sempit dari sumber lain dan bisa overflow jika dikalikan langsung). Kolom non-integer, nilai kosong, atau bulan di luar 1-12
+# memakai groupby biasa.
+def _group_sum(data, group_by, measure):
+    if group_by == ['Order Year', 'Order Month'] and len(data) and pd.api.types.is_numeric_dtype(data[measure]) and all(
+            pd.api.types.is_integer_dtype(data[column]) and not data[column].hasnans for column in group_by):
+        months = data['Order Month'].to_numpy()
+        if 1 <= months.min() and months.max() <= 12:
+            key = data['Order Year'].to_numpy(dtype=np.int64)
+            first_year = key.min()
+            key -= first_year
+            key *= 12
+            key += months
+            key -= 1
+            weights = data[measure].to_numpy(dtype=float, na_value=np.nan)
+            if np.isnan(weights).any():
+                weights = np.nan_to_num(weights)
+            periods = np.flatnonzero(np.bincount(key))
+            sums = np.bincount(key, weights=weights)[periods]
+            if pd.api.types.is_integer_dtype(data[measure]):
+                sums = sums.astype(np.int64)
+            return pd.DataFrame({
+                'Order Year': periods // 12 + first_year,
+                'Order Month': periods % 12 + 1,
+                measure: sums,
+            })
+    return data.groupby(group_by, sort=True, observed=True)[measure].sum().reset_index()
+
+
+# Fungsi untuk menambahkan kolom Measure (periode pertama absolute, sisanya relative) dan baris Total
+def _with_measures(frame, period_col, measure):
+    series = frame[[period_col, measure]].copy()
+    series['Measure'] = 'relative'
+    if len(series):
+        series.loc[series.index[0], 'Measure'] = 'absolute'
+    total_row = pd.DataFrame({period_col: ['Total'], measure: [series[measure].sum()], 'Measure': ['total']})
+    return pd.concat([series, total_row], ignore_index=True)
+
+
+# Fungsi untuk mendapatkan indeks waterfall sebuah dataset. Dengan cube, indeks disimpan selama cube
+# hidup (satu per dataset per sesi); tanpa cube, indeks dibangun dari df untuk sekali pakai.
+def waterfall_index(cube=None, df=None):
+    if cube is None:
+        return WaterfallIndex(df=df)
+    with _lock:
+        index = _indexes.get(cube)
+        if index is None:
+            index = WaterfallIndex(cube=cube)
+            _indexes[cube] = index
+        return index